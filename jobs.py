@@ -0,0 +1,65 @@
+'''
+Scheduled jobs, run outside the API process.
+
+Under Lambda (Mangum) the API only runs while it serves a request, so
+background loops started with the app do not run in between. These jobs are
+separate Lambda functions on a schedule (serverless.yml), or a CLI for the
+uvicorn/docker deployment (cron):
+
+    python jobs.py archive_reservations
+    python jobs.py sync_activities      # without a deadline: runs until stopped
+
+The uvicorn API also runs sync_activities in-process (ACTIVITY_SYNC_IN_PROCESS);
+running the CLI next to it is safe, jobs are claimed with SKIP LOCKED.
+'''
+from src.config.logging_config import init_logging
+log = init_logging()
+
+import asyncio
+import sys
+import time
+from typing import Optional
+
+from src.app.reservation.activity_sync import _activity_sync
+from src.app.reservation.archive import _reservation_archiver
+
+# seconds kept back from the Lambda timeout to finish the current batch
+DEADLINE_MARGIN_SECS = 10
+
+# one loop for the life of the (warm) Lambda container, as Mangum does:
+# pooled asyncpg connections are bound to the loop that opened them
+_loop = asyncio.new_event_loop()
+
+
+def _deadline_of(context) -> Optional[float]:
+    if context is None:
+        return None
+    remaining = context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_SECS
+    return time.monotonic() + max(remaining, 0)
+
+
+def archive_reservations(event=None, context=None):
+    archived = _loop.run_until_complete(
+        _reservation_archiver.run_once(deadline=_deadline_of(context)))
+    return {'archived': archived}
+
+
+def sync_activities(event=None, context=None):
+    # scheduled every minute and runs until the deadline, so a job waits at
+    # most ~ACTIVITY_JOB_POLL_INTERVAL; overlapping runs are safe (SKIP LOCKED)
+    synced = _loop.run_until_complete(
+        _activity_sync.run(deadline=_deadline_of(context)))
+    return {'synced': synced}
+
+
+JOBS = {
+    'archive_reservations': archive_reservations,
+    'sync_activities': sync_activities,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in JOBS:
+        print(f'usage: python jobs.py [{"|".join(JOBS)}]')
+        sys.exit(2)
+    print(JOBS[sys.argv[1]]())
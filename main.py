@@ -11,12 +11,19 @@ from fastapi.responses import JSONResponse
 from mangum import Mangum
 
 from src.config import exception
+from src.config.conf import RESERVATION_CHANGE_FEED_ENABLED, ACTIVITY_SYNC_IN_PROCESS
 from src.router.v1 import (
     user,
     mentor, file_controller,
     account,
+    metrics,
+    tag_catalog,
 )
 from src.infra.resource.manager import resource_manager
+from src.infra.cache.shared_cache import listen_cache_invalidations
+from src.app.reservation.change_feed import _reservation_change_hub
+from src.app.reservation.activity_sync import _activity_sync
+from src.infra.shard_router import shard_router
 
 STAGE = os.environ.get('STAGE')
 root_path = '/' if not STAGE else f'/{STAGE}'
@@ -32,21 +39,33 @@ app.add_middleware(
 
 @app.on_event('startup')
 async def startup_event():
+    # sharded reservations need disjoint id sequences; fail fast otherwise
+    await shard_router.check_id_sequences()
     # init global connection pool
     await resource_manager.initial()
     asyncio.create_task(resource_manager.keeping_probe())
+    asyncio.create_task(listen_cache_invalidations())
+    # reservation change feed (SSE) via Postgres LISTEN/NOTIFY; uvicorn only
+    if RESERVATION_CHANGE_FEED_ENABLED:
+        asyncio.create_task(_reservation_change_hub.listen())
+    # google calendar sync; under Lambda it's the scheduled jobs.sync_activities
+    if ACTIVITY_SYNC_IN_PROCESS:
+        asyncio.create_task(_activity_sync.run())
 
 
 @app.on_event('shutdown')
 async def shutdown_event():
     # close connection pool
     await resource_manager.close()
+    await shard_router.close()
 
 router_v1 = APIRouter(prefix='/user-service/api/v1')
 router_v1.include_router(user.router)
 router_v1.include_router(mentor.router)
 router_v1.include_router(file_controller.router)
 router_v1.include_router(account.router)
+router_v1.include_router(metrics.router)
+router_v1.include_router(tag_catalog.router)
 
 app.include_router(router_v1)
 
@@ -12,18 +12,29 @@ from src.domain.mentor.dao.schedule_repository import ScheduleRepository
 from src.domain.mentor.service.notify_service import NotifyService
 from src.domain.user.dao.profile_repository import ProfileRepository
 from src.domain.user.dao.reservation_repository import ReservationRepository
-from src.domain.user.dao.tag_repository import TagRepository
+from src.domain.user.dao.tag_catalog_cache import TagCatalogCache, _tag_catalog_cache
 from src.domain.user.service.delete_account_service import DeleteAccountService
 from src.domain.user.dao.activity_repository import ActivityRepository
+from src.domain.user.dao.activity_job_repository import ActivityJobRepository
 from src.domain.user.service.reservation_service import ReservationService
+from src.domain.user.service.saga_reservation_service import (
+    SagaReservationService,
+    ScaleOutReservationService,
+)
 from src.domain.user.service.activity_service import ActivityService
 from src.domain.user.service.profile_service import ProfileService
 from src.domain.user.service.tag_service import TagService
 from src.app.account.delete import DeleteAccount
-from src.app.reservation.booking import Booking
+from src.app.reservation.booking import Booking, ScaleOutBooking
+from src.app.reservation.list import ScaleOutReservationList
+from src.app.reservation.change_feed import ReservationChangeFeed, _reservation_change_feed
 from src.app.mentor_profile.upsert import MentorProfile
 from src.infra.cache.local_cache import _local_cache
+from src.infra.cache.shared_cache import _shared_cache
+from src.infra.template.cache import ICache
 from src.infra.resource.manager import resource_manager
+from src.infra.databse import SessionLocal
+from src.infra.shard_router import ShardRouter, shard_router
 from src.infra.mq.sqs_mq_adapter import SqsMqAdapter
 from src.infra.template.service_api import IServiceApi
 from src.infra.client.async_service_api_adapter import AsyncServiceApiAdapter
@@ -53,18 +64,28 @@ def get_activity_dao() -> ActivityRepository:
     return ActivityRepository()
 
 
-def get_tag_dao() -> TagRepository:
-    return TagRepository()
+def get_activity_job_dao() -> ActivityJobRepository:
+    return ActivityJobRepository()
+
+
+def get_tag_catalog() -> TagCatalogCache:
+    # process-wide singleton, so the snapshot outlives a single request
+    return _tag_catalog_cache
 
 
 def get_tag_service(
-    tag_repository: TagRepository = Depends(get_tag_dao),
+    tag_catalog: TagCatalogCache = Depends(get_tag_catalog),
 ) -> TagService:
-    return TagService(tag_repository)
+    return TagService(tag_catalog)
+
+
+def get_cache() -> ICache:
+    return _shared_cache
 
 
 def get_service_api() -> IServiceApi:
-    return AsyncServiceApiAdapter()
+    http_rsc = resource_manager.get("http_rsc")
+    return AsyncServiceApiAdapter(http_rsc=http_rsc)
 
 def get_sqs_mq_adapter() -> SqsMqAdapter:
     sqs_rsc = resource_manager.get("sqs_rsc")
@@ -89,12 +110,15 @@ def get_mentor_service(
     profile_repository: ProfileRepository = Depends(get_profile_dao),
     profile_service: ProfileService = Depends(get_profile_service),
     tag_service: TagService = Depends(get_tag_service),
+    cache: ICache = Depends(get_cache),
 ) -> MentorService:
     return MentorService(
         mentor_repository,
         profile_repository,
         profile_service,
         tag_service,
+        cache,
+        SessionLocal,
     )
 
 
@@ -110,9 +134,15 @@ def get_schedule_service(
 
 def get_activity_service(
     activity_repository: ActivityRepository = Depends(get_activity_dao),
+    activity_job_repository: ActivityJobRepository = Depends(get_activity_job_dao),
     service_api: IServiceApi = Depends(get_service_api),
 ) -> ActivityService:
-    return ActivityService(activity_repository, service_api)
+    return ActivityService(activity_repository, activity_job_repository, service_api)
+
+
+def get_reservation_change_feed() -> ReservationChangeFeed:
+    # process-wide singleton; its LISTEN loop is started in main.py
+    return _reservation_change_feed
 
 
 def get_reservation_service(
@@ -122,9 +152,45 @@ def get_reservation_service(
     return ReservationService(reservation_repository, activity_service)
 
 
+def get_shard_router() -> ShardRouter:
+    return shard_router
+
+
+def get_scale_out_reservation_service(
+    reservation_repository: ReservationRepository = Depends(get_reservation_dao),
+    activity_service: ActivityService = Depends(get_activity_service),
+    router: ShardRouter = Depends(get_shard_router),
+) -> ScaleOutReservationService:
+    return ScaleOutReservationService(
+        SagaReservationService(reservation_repository),
+        activity_service,
+        router,
+        SessionLocal,
+    )
+
+
+def get_scale_out_reservation_list(
+    reservation_repository: ReservationRepository = Depends(get_reservation_dao),
+    profile_repository: ProfileRepository = Depends(get_profile_dao),
+    router: ShardRouter = Depends(get_shard_router),
+) -> ScaleOutReservationList:
+    return ScaleOutReservationList(
+        SagaReservationService(reservation_repository),
+        profile_repository,
+        router,
+    )
+
+
 def get_booking_service(
     reservation_service: ReservationService = Depends(get_reservation_service),
+    scale_out_reservation_service: ScaleOutReservationService = Depends(get_scale_out_reservation_service),
+    scale_out_reservation_list: ScaleOutReservationList = Depends(get_scale_out_reservation_list),
+    router: ShardRouter = Depends(get_shard_router),
 ):
+    # DB_SHARDS 設定多個 shard 時，預約改走 SAGA (ScaleOutBooking)
+    if router.sharded:
+        return ScaleOutBooking(scale_out_reservation_service,
+                               scale_out_reservation_list)
     return Booking(reservation_service)
 
 
@@ -149,8 +215,9 @@ def get_canned_message_dao() -> CannedMessageRepository:
 
 def get_delete_account_service(
     reservation_repository: ReservationRepository = Depends(get_reservation_dao),
+    router: ShardRouter = Depends(get_shard_router),
 ) -> DeleteAccountService:
-    return DeleteAccountService(reservation_repository)
+    return DeleteAccountService(reservation_repository, router)
 
 
 def get_delete_account_app(
@@ -161,6 +228,8 @@ def get_delete_account_app(
     profile_repository: ProfileRepository = Depends(get_profile_dao),
     file_repository: FileRepository = Depends(get_file_dao),
     notify_service: NotifyService = Depends(get_notify_service),
+    mentor_service: MentorService = Depends(get_mentor_service),
+    router: ShardRouter = Depends(get_shard_router),
 ) -> DeleteAccount:
     return DeleteAccount(
         delete_account_service,
@@ -170,4 +239,6 @@ def get_delete_account_app(
         profile_repository,
         file_repository,
         notify_service,
+        mentor_service,
+        router,
     )
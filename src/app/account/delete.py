@@ -5,10 +5,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.file.dao.file_repository import FileRepository
 from src.domain.mentor.dao.canned_message_repository import CannedMessageRepository
 from src.domain.mentor.dao.schedule_repository import ScheduleRepository
+from src.domain.mentor.service.mentor_service import MentorService
 from src.domain.mentor.service.notify_service import NotifyService
 from src.domain.user.dao.profile_repository import ProfileRepository
 from src.domain.user.dao.reservation_repository import ReservationRepository
 from src.domain.user.service.delete_account_service import DeleteAccountService
+from src.infra.shard_router import ShardRouter
 
 log = logging.getLogger(__name__)
 
@@ -23,6 +25,8 @@ class DeleteAccount:
         profile_repository: ProfileRepository,
         file_repository: FileRepository,
         notify_service: NotifyService,
+        mentor_service: MentorService,
+        shard_router: ShardRouter,
     ):
         self.__delete_account_service = delete_account_service
         self.__schedule_repo = schedule_repository
@@ -31,6 +35,8 @@ class DeleteAccount:
         self.__profile_repo = profile_repository
         self.__file_repo = file_repository
         self.__notify_service = notify_service
+        self.__mentor_service = mentor_service
+        self.__shard_router = shard_router
 
     async def execute(self, db: AsyncSession, user_id: int) -> None:
         profile = await self.__profile_repo.find_by_user_id(db, user_id)
@@ -43,12 +49,16 @@ class DeleteAccount:
         # profile row implicitly drops them, so there's no separate cleanup.
         await self.__schedule_repo.delete_all_by_user_id(db, user_id)
         await self.__canned_message_repo.delete_all_by_user_id(db, user_id)
-        await self.__reservation_repo.anonymize_by_my_user_id(db, user_id)
-        await self.__reservation_repo.anonymize_by_user_id(db, user_id)
+        if not self.__shard_router.sharded:
+            await self.__reservation_repo.anonymize_by_my_user_id(db, user_id)
+            await self.__reservation_repo.anonymize_by_user_id(db, user_id)
         await self.__file_repo.soft_delete_all_by_user_id(db, user_id)
         await self.__profile_repo.delete_profile(db, user_id)
 
         await db.commit()
+        if self.__shard_router.sharded:
+            await self.__anonymize_reservations_on_shards(user_id)
+        await self.__mentor_service.invalidate_mentor_profile(user_id)
 
         if is_mentor:
             try:
@@ -57,3 +67,21 @@ class DeleteAccount:
                 log.error(
                     f"[DeleteAccount] SQS DELETE_MENTOR_PROFILE failed, user_id={user_id}: {e}"
                 )
+
+    async def __anonymize_reservations_on_shards(self, user_id: int) -> None:
+        # Reservations are sharded by my_user_id: the user's own rows are on
+        # shard_of(user_id), rows naming them as counterparty (user_id) can be
+        # on any shard. Each shard commits on its own; a failed shard is
+        # logged for a manual re-run and doesn't stop the others.
+        own_shard = self.__shard_router.shard_of(user_id)
+        for shard, session_factory in enumerate(self.__shard_router.session_factories):
+            try:
+                async with session_factory() as shard_db:
+                    if shard == own_shard:
+                        await self.__reservation_repo.anonymize_by_my_user_id(shard_db, user_id)
+                    await self.__reservation_repo.anonymize_by_user_id(shard_db, user_id)
+                    await shard_db.commit()
+            except Exception as e:
+                log.error(
+                    f"[DeleteAccount] anonymize reservations failed, user_id={user_id}, shard={shard}: {e}"
+                )
@@ -36,7 +36,12 @@ class MentorProfile:
     async def upsert_profile(
         self, db: AsyncSession, dto: user.ProfileDTO, background_tasks: BackgroundTasks
     ):
-        res: user.ProfileVO = await self.profile_service.upsert_profile(db, dto)
+        res, changed = await self.profile_service.upsert_profile(db, dto)
+        # 內容未變更 (重複送出) 時，不需清 cache 也不通知 Search Service
+        if not changed:
+            return res
+        # profile fields are part of the cached MentorProfileVO
+        await self.mentor_service.invalidate_mentor_profile(res.user_id)
         # 若為 is_mentor 狀態，則需通知 Search Service
         if res.is_mentor:
             background_tasks.add_task(
@@ -51,9 +56,12 @@ class MentorProfile:
         profile_dto: mentor.MentorProfileDTO,
         background_tasks: BackgroundTasks,
     ):
-        res: mentor.MentorProfileVO = await self.mentor_service.upsert_mentor_profile(
+        res, changed = await self.mentor_service.upsert_mentor_profile(
             db, profile_dto
         )
+        # 內容未變更 (重複送出) 時，不需通知 Search Service
+        if not changed:
+            return res
         # 若為 is_mentor 狀態，則需通知 Search Service. Experiences are part
         # of the same payload, so a single PUT_MENTOR_PROFILE message covers
         # both the mentor-specific fields and the experiences array.
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import (
+    ACTIVITY_JOB_POLL_INTERVAL,
+    ACTIVITY_JOB_BATCH,
+    ACTIVITY_JOB_MAX_ATTEMPTS,
+    ACTIVITY_JOB_BACKOFF_BASE,
+    ACTIVITY_JOB_BACKOFF_MAX,
+    ACTIVITY_JOB_LEASE_SECS,
+)
+from src.config.exception import (
+    ClientException,
+    UnauthorizedException,
+    ForbiddenException,
+    NotAcceptableException,
+    UnprocessableClientException,
+)
+from src.domain.user.dao.activity_job_repository import ActivityJobRepository
+from src.domain.user.dao.activity_repository import ActivityRepository
+from src.domain.user.model.reservation_model import ActivityJobVO
+from src.domain.user.service.activity_service import ActivityService
+from src.infra.client.async_service_api_adapter import AsyncServiceApiAdapter
+from src.infra.databse import SessionLocal
+from src.infra.resource.manager import resource_manager
+
+log = logging.getLogger(__name__)
+
+# the calendar service rejected the request itself; retrying won't help
+PERMANENT_ERRORS = (
+    ClientException,
+    UnauthorizedException,
+    ForbiddenException,
+    NotAcceptableException,
+    UnprocessableClientException,
+)
+
+
+class ActivitySync:
+    '''
+    Applies the activity_jobs outbox (Google Calendar create/cancel).
+
+    - under Lambda it runs as a scheduled job (jobs.py), not from the request:
+      BackgroundTasks finish before the response and a background loop only
+      runs during other requests
+    - under uvicorn/docker the API process runs it (ACTIVITY_SYNC_IN_PROCESS)
+    Jobs are claimed with FOR UPDATE SKIP LOCKED plus a lease, so overlapping
+    runs (and several instances) don't double-process.
+    '''
+
+    def __init__(
+        self,
+        activity_service: ActivityService,
+        activity_job_repository: ActivityJobRepository,
+        session_factory: Callable[[], AsyncSession],
+    ):
+        self.activity_service = activity_service
+        self.activity_job_repo = activity_job_repository
+        self.session_factory = session_factory
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as db:
+            jobs: List[ActivityJobVO] = await self.activity_job_repo.claim_due(
+                db, limit=ACTIVITY_JOB_BATCH, lease_secs=ACTIVITY_JOB_LEASE_SECS)
+            for job in jobs:
+                await self.__apply(db, job)
+        return len(jobs)
+
+    async def run(self, deadline: Optional[float] = None) -> int:
+        '''
+        deadline: time.monotonic() 的期限，到期後不再 claim 新的 batch；
+        None 則一直執行 (docker/cron worker)
+        '''
+        synced = 0
+        while deadline is None or time.monotonic() < deadline:
+            claimed = 0
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                log.error('activity sync failed: %s', str(e))
+            synced += claimed
+            # a full batch means there may be more due jobs; go again
+            if claimed < ACTIVITY_JOB_BATCH:
+                await asyncio.sleep(_poll_secs(deadline))
+        return synced
+
+    async def __apply(self, db: AsyncSession, job: ActivityJobVO):
+        try:
+            await self.activity_service.apply_job(db, job)
+            await self.activity_job_repo.mark_done(db, job)
+            return
+        except PERMANENT_ERRORS as e:
+            await db.rollback()
+            log.error('activity job %s failed permanently: %s', job.id, str(e))
+            await self.activity_job_repo.mark_failed(db, job, error=_error_of(e))
+            return
+        except Exception as e:
+            await db.rollback()
+            error = _error_of(e)
+
+        if job.attempts >= ACTIVITY_JOB_MAX_ATTEMPTS:
+            log.error('activity job %s gave up after %s attempts: %s',
+                      job.id, job.attempts, error)
+            await self.activity_job_repo.mark_failed(db, job, error=error)
+            return
+
+        delay = _backoff_secs(job.attempts)
+        log.warning('activity job %s retry in %ss (attempt %s): %s',
+                    job.id, delay, job.attempts, error)
+        await self.activity_job_repo.retry_later(db, job, delay_secs=delay, error=error)
+
+
+def _poll_secs(deadline: Optional[float]) -> float:
+    if deadline is None:
+        return ACTIVITY_JOB_POLL_INTERVAL
+    return max(0, min(ACTIVITY_JOB_POLL_INTERVAL, deadline - time.monotonic()))
+
+
+def _backoff_secs(attempts: int) -> int:
+    ceiling = min(ACTIVITY_JOB_BACKOFF_MAX, ACTIVITY_JOB_BACKOFF_BASE * (2 ** (attempts - 1)))
+    return max(1, int(random.uniform(ceiling / 2, ceiling)))
+
+
+def _error_of(e: Exception) -> str:
+    return getattr(e, 'msg', None) or str(e) or e.__class__.__name__
+
+
+_activity_job_repository = ActivityJobRepository()
+_activity_sync = ActivitySync(
+    ActivityService(
+        ActivityRepository(),
+        _activity_job_repository,
+        AsyncServiceApiAdapter(http_rsc=resource_manager.get('http_rsc')),
+    ),
+    _activity_job_repository,
+    SessionLocal,
+)
@@ -0,0 +1,79 @@
+import logging
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import (
+    RESERVATION_ARCHIVE_AFTER_SECS,
+    RESERVATION_ARCHIVE_BATCH,
+)
+from src.domain.user.dao.reservation_archive_repository import ReservationArchiveRepository
+from src.infra.shard_router import shard_router
+from src.infra.util.time_util import current_seconds
+
+log = logging.getLogger(__name__)
+
+
+class ReservationArchiver:
+    '''
+    Moves reservations that ended RESERVATION_ARCHIVE_AFTER_SECS ago from
+    reservations to reservations_archive, on every shard.
+
+    - the live table then only holds recent and upcoming rows, so the
+      upcoming/pending lists and the unique/exclusion checks stay the same
+      size as the archive grows
+    - monthly partitions are created before the rows that need them are moved
+    - batches use SKIP LOCKED, so several instances can run at once
+    - run as a scheduled job (jobs.py), not inside the API process: under
+      Lambda a background loop only runs during other requests
+    '''
+
+    def __init__(
+        self,
+        reservation_archive_repository: ReservationArchiveRepository,
+        session_factories: List[Callable[[], AsyncSession]],
+    ):
+        self.archive_repo = reservation_archive_repository
+        self.session_factories = session_factories
+
+    async def run_once(self, deadline: Optional[float] = None) -> int:
+        '''
+        deadline: time.monotonic() 的期限，到期後不再開始新的 batch；
+        沒搬完的留給下一次排程
+        '''
+        cutoff = current_seconds() - RESERVATION_ARCHIVE_AFTER_SECS
+        archived = 0
+        for shard, session_factory in enumerate(self.session_factories):
+            try:
+                archived += await self.__archive_shard(session_factory, cutoff, deadline)
+            except Exception as e:
+                log.error('reservation archive failed, shard: %s, err: %s', shard, str(e))
+        log.info('reservations archived: %s', archived)
+        return archived
+
+    async def __archive_shard(self,
+                              session_factory: Callable[[], AsyncSession],
+                              cutoff: int,
+                              deadline: Optional[float]) -> int:
+        async with session_factory() as db:
+            oldest = await self.archive_repo.oldest_dtend(db, cutoff)
+            if oldest is None:
+                return 0
+            await self.archive_repo.ensure_partitions(db, oldest, cutoff)
+
+            archived = 0
+            while deadline is None or time.monotonic() < deadline:
+                moved = await self.archive_repo.archive_before(
+                    db, cutoff, limit=RESERVATION_ARCHIVE_BATCH)
+                archived += moved
+                # a short batch means the rest are gone or locked by a writer
+                if moved < RESERVATION_ARCHIVE_BATCH:
+                    break
+            return archived
+
+
+_reservation_archiver = ReservationArchiver(
+    ReservationArchiveRepository(),
+    shard_router.session_factories,
+)
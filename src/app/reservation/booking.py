@@ -6,8 +6,12 @@ from src.domain.user.model.reservation_model import (
     ReservationQueryDTO,
     ReservationInfoVO,
     ReservationInfoListVO,
+    ReservationSummaryQueryDTO,
+    ReservationSummaryVO,
 )
 from src.domain.user.service.reservation_service import ReservationService
+from src.domain.user.service.saga_reservation_service import ScaleOutReservationService
+from src.app.reservation.list import ScaleOutReservationList
 
 
 class Booking:
@@ -21,6 +25,9 @@ class Booking:
     async def list(self, db, user_id: int, query_dto: ReservationQueryDTO) -> ReservationInfoListVO:
         return await self.reservation_service.get_reservations(db, user_id, query_dto)
 
+    async def summary(self, db, user_id: int, query_dto: ReservationSummaryQueryDTO) -> ReservationSummaryVO:
+        return await self.reservation_service.get_reservation_summary(db, user_id, query_dto)
+
     # 聚合根 => 原子性的完成
     async def create(self, db, 
                      reservation_dto: ReservationDTO
@@ -53,41 +60,44 @@ class Booking:
 
 '''
 ScaleOutBooking 用來處理跨 DB 的預約建立、更新狀態的操作:
-    - SAGA Pattern
+    - SAGA Pattern (ScaleOutReservationService)
+    - 介面與 Booking 相同；db 參數是 request 的 primary session，預約改由 shard 的 session 存取
 '''
 
 
 class ScaleOutBooking:
-    def __init__(self, remote_reservation_service):
-        self.reservation_service = remote_reservation_service
-
-    async def accept(self, db_list, reservation_dto: ReservationDTO):
+    def __init__(self,
+                 scale_out_reservation_service: ScaleOutReservationService,
+                 reservation_list: ScaleOutReservationList,
+                 ):
+        self.reservation_service = scale_out_reservation_service
+        self.reservation_list = reservation_list
 
-        # sender
-        db = db_list.next_db  # sharding by my_user_id
-        # TODO: check date conflict with sender
-        await self.reservation_service.accept(db, reservation_dto)
+    async def list(self, db, user_id: int, query_dto: ReservationQueryDTO) -> ReservationInfoListVO:
+        return await self.reservation_list.list(db, user_id, query_dto)
 
-        # participant
-        db = db_list.next_db  # sharding by user_id
-        await self.reservation_service.accept(db, reservation_dto)
+    async def summary(self, db, user_id: int, query_dto: ReservationSummaryQueryDTO) -> ReservationSummaryVO:
+        return await self.reservation_list.summary(db, user_id, query_dto)
 
-        # TODO: notify participant
-        # notify_service.notify_participant(reservation_dto)
+    async def create(self, db,
+                     reservation_dto: ReservationDTO
+                     ) -> Optional[ReservationVO]:
+        previous_reserve = reservation_dto.previous_reserve
+        if not previous_reserve or len(previous_reserve) == 0:
+            return await self.reservation_service.create(reservation_dto)
 
-    async def reject(self, db_list, reservation_dto: ReservationDTO):
+        return await self.reservation_service.create_new_and_reject_previous(reservation_dto)
 
-        # sender
-        db = db_list.next_db  # sharding by my_user_id
-        # TODO: check date conflict with sender
-        await self.reservation_service.reject(db, reservation_dto)
-        # participant
-        # db = db.next_db(sharding by user_id)
-        db = db_list.next_db  # sharding by user_id
-        await self.reservation_service.reject(db, reservation_dto)
+    async def update_reservation_status(self, db,
+                                        reservation_id: int,
+                                        reservation_dto: UpdateReservationDTO
+                                        ) -> Optional[ReservationVO]:
+        res = await self.reservation_service.update_reservation_status(reservation_id,
+                                                                       reservation_dto)
 
         # TODO: notify participant
         # notify_service.notify_participant(reservation_dto)
+        return res
 
 
 '''
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from src.config.conf import (
+    RESERVATION_CHANGE_CHANNEL,
+    RESERVATION_CHANGE_KEEPALIVE_SECS,
+    RESERVATION_CHANGE_QUEUE_SIZE,
+)
+from src.infra.shard_router import shard_router
+from src.infra.mq.pg_notify_hub import PgNotifyHub
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ReservationChangeFeed:
+    '''
+    Server-sent events of a user's reservation changes, so the frontend
+    reloads the reservation lists only when something changed.
+
+    ReservationRepository.save_all NOTIFYs a delta per written row; the
+    delta goes to the stream of its my_user_id (sender and participant each
+    get their own row). Events:
+    - reservation: one row changed (id, my_status, status, ...)
+    - resync: events may have been missed; reload the lists
+    A comment line is sent every keepalive_secs to keep proxies from
+    closing an idle stream.
+    '''
+
+    def __init__(self, hub: PgNotifyHub, keepalive_secs: float = RESERVATION_CHANGE_KEEPALIVE_SECS):
+        self.hub = hub
+        self.keepalive_secs = keepalive_secs
+
+    async def stream(self,
+                     user_id: int,
+                     is_disconnected: Callable[[], Awaitable[bool]],
+                     ) -> AsyncIterator[str]:
+        async with self.hub.subscribe(user_id) as sub:
+            # the client reloads once on connect; later changes are pushed
+            yield _event('resync', {'user_id': user_id})
+            while True:
+                try:
+                    change = await asyncio.wait_for(sub.get(), timeout=self.keepalive_secs)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ': keepalive\n\n'
+                    continue
+
+                if change is None:
+                    yield _event('resync', {'user_id': user_id})
+                else:
+                    yield _event('reservation', change)
+
+
+def _event(name: str, data: Optional[Dict[str, Any]]) -> str:
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+# save_all NOTIFYs on the shard it writes to; listen on every shard
+_reservation_change_hub = PgNotifyHub(
+    shard_router.engines,
+    RESERVATION_CHANGE_CHANNEL,
+    key_of=lambda change: change.get('my_user_id'),
+    queue_size=RESERVATION_CHANGE_QUEUE_SIZE,
+)
+_reservation_change_feed = ReservationChangeFeed(_reservation_change_hub)
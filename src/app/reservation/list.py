@@ -1,9 +1,23 @@
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.user.dao.profile_repository import ProfileRepository
 from src.domain.user.model.reservation_model import (
     ReservationQueryDTO,
     ReservationInfoVO,
     ReservationInfoListVO,
+    ReservationSummaryQueryDTO,
+    ReservationSummaryVO,
+    RUserInfoVO,
 )
 from src.domain.user.service.reservation_service import ReservationService
+from src.domain.user.service.saga_reservation_service import SagaReservationService
+from src.infra.shard_router import ShardRouter
+import logging
+
+log = logging.getLogger(__name__)
+
 
 class ReservationList:
     def __init__(self, reservation_service: ReservationService):
@@ -14,9 +28,53 @@ class ReservationList:
 
 '''
 ScaleOutReservationList 用來處理跨 DB 的預約列表
+    - 預約只在 user 自己的 shard (依 my_user_id)，分頁 (dtend, id) 與單一 DB 相同
+    - profile 只寫在 primary DB (ProfileRepository 走 SessionLocal)，
+      對方的 profile 以一次 find_reservation_infos 從 primary 取回
+    - profile 查詢失敗時，列表只少了 name/avatar 等欄位，照常回傳
 '''
 class ScaleOutReservationList:
-    pass
+    def __init__(self,
+                 saga_reservation_service: SagaReservationService,
+                 profile_repository: ProfileRepository,
+                 shard_router: ShardRouter,
+                 ):
+        self.saga_service = saga_reservation_service
+        self.profile_repo = profile_repository
+        self.shard_router = shard_router
+
+    async def list(self, db: AsyncSession, user_id: int, query_dto: ReservationQueryDTO) -> ReservationInfoListVO:
+        async with self.shard_router.session(user_id) as shard_db:
+            res: ReservationInfoListVO = \
+                await self.saga_service.get_reservations(shard_db, user_id, query_dto, join_profile=False)
+        await self.__attach_profiles(db, res.reservations)
+        return res
+
+    async def summary(self, db: AsyncSession, user_id: int, query_dto: ReservationSummaryQueryDTO) -> ReservationSummaryVO:
+        async with self.shard_router.session(user_id) as shard_db:
+            res: ReservationSummaryVO = \
+                await self.saga_service.get_reservation_summary(shard_db, user_id, query_dto, join_profile=False)
+        await self.__attach_profiles(db, [
+            reservation
+            for state in res.states.values()
+            for reservation in state.reservations
+        ])
+        return res
+
+    async def __attach_profiles(self, db: AsyncSession, reservations: List[ReservationInfoVO]):
+        # db: the primary session, where profiles are written
+        user_ids = {r.participant.user_id for r in reservations}
+        if not user_ids:
+            return
+        try:
+            profiles: Dict[int, RUserInfoVO] = \
+                await self.profile_repo.find_reservation_infos(db, user_ids)
+        except Exception as e:
+            log.error('find profiles failed, err: %s', str(e))
+            profiles = {}
+
+        for reservation in reservations:
+            reservation.with_participant_profile(profiles.get(reservation.participant.user_id))
 
 
 '''
@@ -6,11 +6,27 @@ BATCH = int(os.getenv('BATCH', 20))
 MAX_PERIOD_SECS = int(os.getenv('MAX_PERIOD_SECS', 86400 * 31))
 DATETIME_FORMAT = os.getenv('DATETIME_FORMAT', '%Y%m%dT%H%M%S%z').strip()
 DEFAULT_LANGUAGE = os.getenv('DEFAULT_LANGUAGE', 'zh_TW').strip()
+# logging: root level, per-module overrides ('src.domain.user.dao=DEBUG,sqlalchemy.engine=WARNING'),
+# json/text output, and the fraction of sampled hot-path debug events that get emitted
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '').strip()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').strip().lower()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.01))
 # resource probe cycle secs
 PROBE_CYCLE_SECS = int(os.getenv("PROBE_CYCLE_SECS", 3))
 
 # default cache ttl: 5 minutes
 CACHE_TTL = int(os.getenv('CACHE_TTL', 300))
+# local (in-process) cache: max entries before LRU eviction, and how many
+# expired keys each write may sweep
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', 10000))
+LOCAL_CACHE_SWEEP_BATCH = int(os.getenv('LOCAL_CACHE_SWEEP_BATCH', 20))
+# hydrated mentor profile (MentorProfileVO) cache ttl
+MENTOR_PROFILE_CACHE_TTL = int(os.getenv('MENTOR_PROFILE_CACHE_TTL', CACHE_TTL))
+# max user_ids per POST /mentors/{language}/mentor_profiles/batch
+MENTOR_PROFILE_BATCH_MAX = int(os.getenv('MENTOR_PROFILE_BATCH_MAX', 300))
+# tag catalog snapshot ttl: 1 hour; the tags table only changes on reseed
+TAG_CATALOG_TTL = int(os.getenv('TAG_CATALOG_TTL', 3600))
 # db config params
 DB_HOST = os.getenv('DB_HOST', 'localhost').strip()
 DB_PORT = os.getenv('DB_PORT', '5432').strip()
@@ -21,7 +37,16 @@ DB_SCHEMA = os.getenv('DB_SCHEMA', 'public').strip()
 # asyncpg ssl 模式: disable / allow / prefer / require / verify-ca / verify-full
 # RDS 預設要求加密 (rds.force_ssl)，明文連線會被 pg_hba 以 "no encryption" 拒絕
 DB_SSL = os.getenv('DB_SSL', '').strip()  # AWS 上設 'require'，空字串為本機不加密
+# reservations sharded by user_id: 'url#schema,url#schema,...' (schema optional,
+# defaults to DB_SCHEMA); empty = one shard, the primary DB above
+DB_SHARDS = os.getenv('DB_SHARDS', '').strip()
 RESERVATION_ISOLAION_LEVEL = os.getenv('RESERVATION_ISOLAION_LEVEL', 'SERIALIZABLE').strip()
+# 交易遇到 serialization failure (40001) / deadlock (40P01) 時整段重試
+TX_RETRY_MAX_ATTEMPTS = int(os.getenv('TX_RETRY_MAX_ATTEMPTS', 4))
+TX_RETRY_BACKOFF_BASE = float(os.getenv('TX_RETRY_BACKOFF_BASE', 0.02))
+TX_RETRY_BACKOFF_MAX = float(os.getenv('TX_RETRY_BACKOFF_MAX', 0.5))
+# 預約訊息串保留的最新筆數 (reservations.messages)；0 表示不限制
+RESERVATION_MESSAGES_MAX = int(os.getenv('RESERVATION_MESSAGES_MAX', 0))
 
 # db connection pool config params
 # 資料庫連接池配置 - 可通過環境變量覆蓋默認值
@@ -38,7 +63,62 @@ DB_JIT_OFF = True if DB_JIT_OFF >= 1 else False
 
 SEARCH_SERVICE_URL = os.getenv('SEARCH_SERVICE_URL', 'http://127.0.0.1:8012/search-service/api').strip()
 AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://127.0.0.1:8008/auth-service/api').strip()
-    
+
+
+# shared httpx client for downstream services (auth/search)
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+HTTP_WRITE_TIMEOUT = float(os.getenv('HTTP_WRITE_TIMEOUT', 10))
+HTTP_POOL_TIMEOUT = float(os.getenv('HTTP_POOL_TIMEOUT', 3))          # 等待連線池空出連線的時間
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30))
+# per downstream host (AUTH/SEARCH_SERVICE_URL) connection cap; 0 = share the global pool
+HTTP_PER_HOST_MAX_CONNECTIONS = int(os.getenv('HTTP_PER_HOST_MAX_CONNECTIONS', 0))
+# downstream retry budget: idempotent calls (GET/PUT/DELETE) retry on
+# connection errors / 502-504 with jittered backoff, all within the deadline
+HTTP_REQUEST_DEADLINE = float(os.getenv('HTTP_REQUEST_DEADLINE', 8))
+HTTP_RETRY_MAX_ATTEMPTS = int(os.getenv('HTTP_RETRY_MAX_ATTEMPTS', 3))
+HTTP_RETRY_BACKOFF_BASE = float(os.getenv('HTTP_RETRY_BACKOFF_BASE', 0.1))
+HTTP_RETRY_BACKOFF_MAX = float(os.getenv('HTTP_RETRY_BACKOFF_MAX', 1.0))
+# circuit breaker per downstream base url: open after N consecutive
+# failures, allow a trial call after RECOVERY_SECS
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_SECS = float(os.getenv('CIRCUIT_RECOVERY_SECS', 30))
+# HTTP/2 needs the optional `h2` package; falls back to HTTP/1.1 without it
+HTTP2_ENABLED = int(os.getenv('HTTP2_ENABLED', 0))
+HTTP2_ENABLED = True if HTTP2_ENABLED >= 1 else False
+
+# google calendar sync (activity_jobs outbox); the scheduled worker
+# (jobs.sync_activities) polls every POLL_INTERVAL secs until its deadline.
+# uvicorn/docker has no scheduler, so the API process runs the loop itself
+ACTIVITY_SYNC_IN_PROCESS = int(os.getenv(
+    'ACTIVITY_SYNC_IN_PROCESS', 0 if os.getenv('AWS_LAMBDA_FUNCTION_NAME') else 1)) >= 1
+ACTIVITY_JOB_POLL_INTERVAL = float(os.getenv('ACTIVITY_JOB_POLL_INTERVAL', 10))
+ACTIVITY_JOB_BATCH = int(os.getenv('ACTIVITY_JOB_BATCH', 20))
+ACTIVITY_JOB_MAX_ATTEMPTS = int(os.getenv('ACTIVITY_JOB_MAX_ATTEMPTS', 8))
+ACTIVITY_JOB_BACKOFF_BASE = int(os.getenv('ACTIVITY_JOB_BACKOFF_BASE', 5))
+ACTIVITY_JOB_BACKOFF_MAX = int(os.getenv('ACTIVITY_JOB_BACKOFF_MAX', 900))
+# a claimed job is hidden from other workers this long; must exceed HTTP_REQUEST_DEADLINE
+ACTIVITY_JOB_LEASE_SECS = int(os.getenv('ACTIVITY_JOB_LEASE_SECS', 60))
+
+# reservation change feed (SSE), fed by Postgres LISTEN/NOTIFY; the channel
+# is per schema, since several stages may share one database.
+# Needs a long-lived streaming response and a listener running between
+# requests: uvicorn/docker only. Under Lambda (Mangum buffers the body,
+# API Gateway REST cuts it at 30s) the route is not registered.
+RESERVATION_CHANGE_FEED_ENABLED = int(os.getenv(
+    'RESERVATION_CHANGE_FEED_ENABLED', 0 if os.getenv('AWS_LAMBDA_FUNCTION_NAME') else 1)) >= 1
+RESERVATION_CHANGE_CHANNEL = os.getenv('RESERVATION_CHANGE_CHANNEL', f'reservation_changes_{DB_SCHEMA}').strip()
+RESERVATION_CHANGE_KEEPALIVE_SECS = float(os.getenv('RESERVATION_CHANGE_KEEPALIVE_SECS', 15))
+# events buffered per stream; a slower client gets a resync event instead
+RESERVATION_CHANGE_QUEUE_SIZE = int(os.getenv('RESERVATION_CHANGE_QUEUE_SIZE', 100))
+
+# reservation archive: rows that ended ARCHIVE_AFTER_SECS ago are moved to
+# reservations_archive (monthly partitions) by the scheduled job in jobs.py;
+# HISTORY reads both tables
+RESERVATION_ARCHIVE_AFTER_SECS = int(os.getenv('RESERVATION_ARCHIVE_AFTER_SECS', 86400 * 30))
+RESERVATION_ARCHIVE_BATCH = int(os.getenv('RESERVATION_ARCHIVE_BATCH', 1000))
 
 # sqs/event bus conf
 MQ_CONNECT_TIMEOUT = int(os.getenv("MQ_CONNECT_TIMEOUT", 10))
@@ -48,3 +128,12 @@ MQ_MAX_ATTEMPTS = int(os.getenv("MQ_MAX_ATTEMPTS", 3))
 # sqs
 # for retry failed pub events
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', 'https://sqs.{REGION}.amazonaws.com/{ACCOUNT_ID}/{QUEUE_NAME}').strip()
+
+# redis (shared L2 cache); empty REDIS_URL = local cache only
+REDIS_URL = os.getenv('REDIS_URL', '').strip()
+REDIS_CONNECT_TIMEOUT = int(os.getenv('REDIS_CONNECT_TIMEOUT', 3))
+REDIS_KEY_PREFIX = os.getenv('REDIS_KEY_PREFIX', 'xc-user:').strip()
+# L1 ttl caps how long another node's write can stay invisible when an
+# invalidation message is missed (e.g. a frozen Lambda instance)
+L1_CACHE_TTL = int(os.getenv('L1_CACHE_TTL', 30))
+CACHE_INVALIDATION_CHANNEL = os.getenv('CACHE_INVALIDATION_CHANNEL', 'xc-user:cache-invalidation').strip()
@@ -56,6 +56,12 @@ class ActivityStatus(str, Enum):
     SCHEDULED = 'SCHEDULED'
     CANCELLED = 'CANCELLED'
 
+
+class ActivityJobStatus(str, Enum):
+    PENDING = 'PENDING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
 class SortingBy(str, Enum):
     UPDATED_TIME = 'UPDATED_TIME'
     # VIEW = 'VIEW'
@@ -1,15 +1,109 @@
+import json
 import logging
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict
 
-def init_logging():
+from src.config.conf import (
+    LOG_LEVEL,
+    LOG_LEVELS,
+    LOG_FORMAT,
+    LOG_SAMPLE_RATE,
+)
+
+# attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are emitted as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SampledLogger:
+    """
+    For high-volume debug events on hot paths: the level check comes first,
+    so at the default level a call costs one comparison; when enabled only
+    `rate` of the events are emitted, tagged with sample_rate.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float):
+        self.logger = logger
+        self.rate = rate
+
+    def debug(self, msg: str, *args, **kwargs):
+        self.__log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs):
+        self.__log(logging.INFO, msg, *args, **kwargs)
+
+    def __log(self, level: int, msg: str, *args, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        if self.rate < 1 and random.random() >= self.rate:
+            return
+        extra = kwargs.pop('extra', None) or {}
+        extra['sample_rate'] = self.rate
+        self.logger.log(level, msg, *args, extra=extra, stacklevel=3, **kwargs)
+
+
+def get_sampled_logger(name: str, rate: float = LOG_SAMPLE_RATE) -> SampledLogger:
+    return SampledLogger(logging.getLogger(name), rate)
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    # 'src.domain.user.dao=DEBUG,sqlalchemy.engine=WARNING'
+    levels: Dict[str, str] = {}
+    for item in spec.split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def init_logging() -> logging.Logger:
     """
     初始化全域 logging 設定
 
-    - 設定 root logger 層級為 INFO
-    - 打印初始化訊息
+    - root logger 層級為 LOG_LEVEL，LOG_LEVELS 可個別調整 module 層級
+    - LOG_FORMAT=json (預設) 每行一筆 JSON；text 為一般文字格式
+    - 取代既有的 handler (例如 Lambda runtime 預設的)，避免重複輸出
     """
 
     root_logger = logging.getLogger()
-    
-    root_logger.setLevel(logging.INFO)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(LOG_LEVEL)
+
+    module_levels = _parse_levels(LOG_LEVELS)
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(level)
 
-    root_logger.info("Logging initialized (root level=INFO)")
\ No newline at end of file
+    root_logger.info('logging initialized', extra={
+        'root_level': LOG_LEVEL,
+        'module_levels': module_levels,
+        'format': LOG_FORMAT,
+    })
+    return root_logger
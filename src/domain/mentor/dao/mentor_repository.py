@@ -1,11 +1,17 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import Select, select
+from sqlalchemy import BigInteger, Select, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config.exception import NotFoundException
 from src.domain.mentor.model.mentor_model import MentorProfileDTO
 from src.infra.db.orm.init.user_init import Profile
-from src.infra.util.convert_util import get_first_template
+from src.infra.util.convert_util import (
+    get_all_template,
+    get_first_template,
+    upsert_if_changed,
+)
 
 
 # Per-bucket replace inputs and the inline experiences batch on
@@ -21,6 +27,8 @@ _INPUT_BUCKET_FIELDS = {
 # (dto, want_tags, have_tags) — the storage arrays travel alongside the dto
 # rather than on it, so the API-facing dto stays free of plumbing fields.
 ProfileWithTags = Tuple[MentorProfileDTO, List[str], List[str]]
+# ProfileWithTags + changed — False when the upsert skipped an identical row.
+UpsertedMentorProfile = Tuple[MentorProfileDTO, List[str], List[str], bool]
 
 
 class MentorRepository:
@@ -34,6 +42,19 @@ class MentorRepository:
             return None
         return self._split(mentor)
 
+    async def get_mentor_profiles_by_ids(
+        self, db: AsyncSession, user_ids: List[int]
+    ) -> Dict[int, ProfileWithTags]:
+        # One `user_id = ANY(:user_ids)` round-trip for the whole batch; the
+        # array binds as a single parameter whatever the batch size.
+        if not user_ids:
+            return {}
+        stmt: Select = select(Profile).filter(
+            Profile.user_id == any_(bindparam('user_ids', user_ids, type_=ARRAY(BigInteger)))
+        )
+        rows: List[Profile] = await get_all_template(db, stmt)
+        return {row.user_id: self._split(row) for row in rows}
+
     async def find_profile_by_user_id(
         self, db: AsyncSession, user_id: int
     ) -> Optional[ProfileWithTags]:
@@ -53,33 +74,44 @@ class MentorRepository:
         want_tags: List[str],
         have_tags: List[str],
         experiences: Optional[List[dict]],
-    ) -> ProfileWithTags:
-        # Load-or-create rather than db.merge: the input bucket fields aren't
-        # Profile columns, and merge would clobber want_tags/have_tags/
-        # experiences columns the dto doesn't carry. Storage state comes in
-        # as kwargs because the API-facing dto stays small.
+    ) -> UpsertedMentorProfile:
+        # Single INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING
+        # rather than db.merge: the input bucket fields aren't Profile
+        # columns, and merge would clobber want_tags/have_tags/experiences
+        # columns the dto doesn't carry. Only the columns in the payload are
+        # overwritten on conflict. Storage state comes in as kwargs because
+        # the API-facing dto stays small.
         payload = mentor_profile_dto.model_dump(exclude=_INPUT_BUCKET_FIELDS)
         payload['want_tags'] = want_tags
         payload['have_tags'] = have_tags
         if experiences is not None:
             payload['experiences'] = experiences
 
-        existing: Optional[Profile] = await db.get(Profile, mentor_profile_dto.user_id)
-        if existing is None:
-            # First-time mentor: a missing experiences kwarg means "no
-            # experiences yet", which is the column default.
-            payload.setdefault('experiences', [])
-            model = Profile(**payload)
-            db.add(model)
+        update_columns = [k for k in payload if k != 'user_id']
+        # First-time mentor: a missing experiences kwarg means "no
+        # experiences yet", which is the column default. On conflict the
+        # column is left alone (it's not in update_columns).
+        insert_values = {'experiences': [], **payload}
+
+        row, changed = await upsert_if_changed(
+            db, Profile,
+            insert_values=insert_values,
+            update_columns=update_columns,
+            index_elements=['user_id'],
+        )
+        if row is None:
+            # an identical resubmit returns the stored row from the same
+            # statement; only a concurrent insert/delete of the row misses it
             await db.commit()
-            await db.refresh(model)
-            return self._split(model)
+            stored = await self.get_mentor_profile_by_id(db, mentor_profile_dto.user_id)
+            if stored is None:
+                raise NotFoundException(msg="not a valid user")
+            return (*stored, False)
 
-        for key, value in payload.items():
-            setattr(existing, key, value)
+        # convert before commit: commit expires the returned instance
+        res = self._split(row)
         await db.commit()
-        await db.refresh(existing)
-        return self._split(existing)
+        return (*res, changed)
 
     @staticmethod
     def _split(profile: Profile) -> ProfileWithTags:
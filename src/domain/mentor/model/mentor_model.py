@@ -110,6 +110,17 @@ class MentorProfileVO(ProfileVO):
         }
 
 
+class MentorProfileBatchDTO(BaseModel):
+    user_ids: List[int] = Field(default_factory=list)
+
+
+class MentorProfileListVO(BaseModel):
+    # Same order as the requested user_ids (duplicates collapsed); ids with
+    # no profile row are listed in not_found instead.
+    mentor_profiles: List[MentorProfileVO] = Field(default_factory=list)
+    not_found: List[int] = Field(default_factory=list)
+
+
 class TimeSlotDTO(BaseModel):
     id: Optional[int] = Field(None, example=0)
     user_id: int = Field(..., example=1)
@@ -1,27 +1,41 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.conf import DEFAULT_LANGUAGE
+from src.config.conf import DEFAULT_LANGUAGE, MENTOR_PROFILE_CACHE_TTL
+from src.config.constant import Language
 from src.config.exception import NotFoundException, raise_http_exception
 from src.domain.mentor.dao.mentor_repository import MentorRepository
-from src.domain.mentor.model.mentor_model import MentorProfileDTO, MentorProfileVO
+from src.domain.mentor.model.mentor_model import (
+    MentorProfileDTO,
+    MentorProfileListVO,
+    MentorProfileVO,
+)
 from src.domain.user.dao.profile_repository import ProfileRepository
+from src.domain.user.model.tag_model import TagVO
 from src.domain.user.service.profile_service import ProfileService
 from src.domain.user.service.tag_service import TagService
+from src.infra.template.cache import ICache
 import logging
 
 log = logging.getLogger(__name__)
 
 class MentorService:
     def __init__(self, mentor_repository: MentorRepository, profile_repository: ProfileRepository,
-                 profile_service: ProfileService, tag_service: TagService):
+                 profile_service: ProfileService, tag_service: TagService,
+                 cache: ICache, session_factory: Callable[[], AsyncSession]):
         self.__mentor_repository: MentorRepository = mentor_repository
         self.__profile_repository: ProfileRepository = profile_repository
         self.__profile_service: ProfileService = profile_service
         self.__tag_service: TagService = tag_service
+        self.__cache: ICache = cache
+        # cache loaders open their own session: a load is shared with other
+        # requests' callers and can outlive the request that started it
+        self.__session_factory = session_factory
 
-    async def upsert_mentor_profile(self, db: AsyncSession, profile_dto: MentorProfileDTO) -> MentorProfileVO:
+    async def upsert_mentor_profile(self, db: AsyncSession, profile_dto: MentorProfileDTO) \
+            -> Tuple[MentorProfileVO, bool]:
+        # Returns (vo, changed); changed is False for an identical resubmit.
         try:
             language = profile_dto.language or DEFAULT_LANGUAGE
 
@@ -62,18 +76,32 @@ class MentorService:
             # Storage arrays travel as kwargs — they're state, not API.
             # is_mentor is *not* recomputed here; the dto carries whatever the
             # client sent, and the column is written from there.
-            res_dto, res_want, res_have = await self.__mentor_repository.upsert_mentor(
+            res_dto, res_want, res_have, changed = await self.__mentor_repository.upsert_mentor(
                 db, profile_dto,
                 want_tags=new_want,
                 have_tags=new_have,
                 experiences=column_payload,
             )
 
-            res_vo: MentorProfileVO = await self.__profile_service.convert_to_mentor_profile_vo(
-                db, res_dto, language=language, want_tags=res_want,
+            # the row is already written, so a catalog failure only degrades
+            # the response
+            res_vo, hydrated = await self.__assemble_mentor_profile_vo_best_effort(
+                db, res_dto, res_want, res_have, language,
             )
-            await self.__hydrate_buckets(db, res_vo, res_want, res_have, language)
-            return res_vo
+
+            # upsert_mentor has committed; drop every language's cached copy
+            # and prime the one we just built (unless it's degraded). An
+            # identical resubmit changed nothing, so the cached copies are
+            # still good.
+            if changed:
+                await self.invalidate_mentor_profile(profile_dto.user_id)
+            if changed and hydrated and _cacheable(language):
+                await self.__cache.set(
+                    _mentor_profile_key(profile_dto.user_id, language),
+                    res_vo.model_copy(deep=True),
+                    MENTOR_PROFILE_CACHE_TTL,
+                )
+            return res_vo, changed
         except Exception as e:
             log.error(f'upsert_mentor_profile error: %s', str(e))
             err_msg = getattr(e, 'msg', 'upsert mentor profile response failed')
@@ -84,46 +112,155 @@ class MentorService:
     async def get_mentor_profile_by_id(self, db: AsyncSession, user_id: int, language: str) \
             -> MentorProfileVO:
         try:
-            row = await self.__mentor_repository.get_mentor_profile_by_id(db, user_id)
-            if row is None:
-                raise NotFoundException(msg=f"No such user with id: {user_id}")
-            mentor_dto, want_tags, have_tags = row
-            res_vo: MentorProfileVO = await self.__profile_service.convert_to_mentor_profile_vo(
-                db, mentor_dto, language=language, want_tags=want_tags,
+            if not _cacheable(language):
+                return await self.__load_mentor_profile(db, user_id, language, best_effort=True)
+
+            # Read-through: concurrent misses share one load. The cached VO
+            # is shared, so callers get their own copy to mutate.
+            async def _load() -> MentorProfileVO:
+                async with self.__session_factory() as load_db:
+                    return await self.__load_mentor_profile(load_db, user_id, language)
+
+            res_vo: MentorProfileVO = await self.__cache.get_or_load(
+                _mentor_profile_key(user_id, language), _load,
+                ex=MENTOR_PROFILE_CACHE_TTL,
             )
-            await self.__hydrate_buckets(db, res_vo, want_tags, have_tags, language)
-            return res_vo
+            return res_vo.model_copy(deep=True)
         except Exception as e:
             log.error(f'get_mentor_profile_by_id error: %s', str(e))
             err_msg = getattr(e, 'msg', 'get mentor profile response failed')
             raise_http_exception(e, msg=err_msg)
 
-    async def __hydrate_buckets(
+    async def get_mentor_profiles_by_ids(self, db: AsyncSession, user_ids: List[int], language: str) \
+            -> MentorProfileListVO:
+        # Batch read for search/listing pages: one bulk cache read, then one
+        # query for every miss; tags come from the in-memory catalog.
+        try:
+            if not _cacheable(language):
+                found = await self.__load_mentor_profiles(db, user_ids, language, best_effort=True)
+            else:
+                keys = {user_id: _mentor_profile_key(user_id, language) for user_id in user_ids}
+                user_id_of = {key: user_id for user_id, key in keys.items()}
+
+                async def _load(missing_keys: List[str]) -> Dict[str, MentorProfileVO]:
+                    async with self.__session_factory() as load_db:
+                        loaded = await self.__load_mentor_profiles(
+                            load_db, [user_id_of[key] for key in missing_keys], language)
+                    return {keys[user_id]: vo for user_id, vo in loaded.items()}
+
+                # misses are filled without a broadcast and only if no write
+                # to the key happened during the load
+                cached = await self.__cache.get_or_load_many(
+                    list(user_id_of), _load, ex=MENTOR_PROFILE_CACHE_TTL)
+                found = {user_id_of[key]: vo for key, vo in cached.items()}
+
+            return MentorProfileListVO(
+                mentor_profiles=[
+                    found[user_id].model_copy(deep=True)
+                    for user_id in user_ids if user_id in found
+                ],
+                not_found=[user_id for user_id in user_ids if user_id not in found],
+            )
+        except Exception as e:
+            log.error(f'get_mentor_profiles_by_ids error: %s', str(e))
+            err_msg = getattr(e, 'msg', 'get mentor profiles response failed')
+            raise_http_exception(e, msg=err_msg)
+
+    async def invalidate_mentor_profile(self, user_id: int) -> None:
+        # Called after any write that changes what get_mentor_profile_by_id
+        # returns: profile, mentor fields, or account deletion.
+        for language in Language:
+            await self.__cache.delete(_mentor_profile_key(user_id, language.value))
+
+    async def __load_mentor_profile(self, db: AsyncSession, user_id: int, language: str,
+                                    best_effort: bool = False) -> MentorProfileVO:
+        row = await self.__mentor_repository.get_mentor_profile_by_id(db, user_id)
+        if row is None:
+            raise NotFoundException(msg=f"No such user with id: {user_id}")
+        mentor_dto, want_tags, have_tags = row
+        return await self.__assemble_loaded(db, mentor_dto, want_tags, have_tags, language, best_effort)
+
+    async def __load_mentor_profiles(self, db: AsyncSession, user_ids: List[int], language: str,
+                                     best_effort: bool = False) -> Dict[int, MentorProfileVO]:
+        rows = await self.__mentor_repository.get_mentor_profiles_by_ids(db, user_ids)
+        return {
+            user_id: await self.__assemble_loaded(db, mentor_dto, want_tags, have_tags, language, best_effort)
+            for user_id, (mentor_dto, want_tags, have_tags) in rows.items()
+        }
+
+    async def __assemble_loaded(self, db: AsyncSession, dto: MentorProfileDTO, want_tags: List[str],
+                                have_tags: List[str], language: str, best_effort: bool) \
+            -> MentorProfileVO:
+        # Cache loaders are strict: a tagless VO would be cached (and shared
+        # via L2) for the whole TTL, so a catalog failure fails the load.
+        if not best_effort:
+            return await self.__assemble_mentor_profile_vo(db, dto, want_tags, have_tags, language)
+        vo, _ = await self.__assemble_mentor_profile_vo_best_effort(
+            db, dto, want_tags, have_tags, language)
+        return vo
+
+    async def __assemble_mentor_profile_vo_best_effort(
         self,
         db: AsyncSession,
-        vo: MentorProfileVO,
+        dto: MentorProfileDTO,
         want_tags: List[str],
         have_tags: List[str],
         language: str,
-    ) -> None:
-        # Best-effort: hydration failure shouldn't fail the whole profile read.
-        # Empty buckets ([]) are explicit on the wire so the frontend can
-        # distinguish "user has none" from "field absent".
+    ) -> Tuple[MentorProfileVO, bool]:
+        # Uncached paths only: catalog failure shouldn't fail the whole
+        # profile read. Returns (vo, hydrated); a tagless VO must not be cached.
         try:
-            buckets = await self.__tag_service.hydrate_buckets(
-                db,
-                want_tags=want_tags,
-                have_tags=have_tags,
-                language=language,
-            )
+            vo = await self.__assemble_mentor_profile_vo(db, dto, want_tags, have_tags, language)
+            return vo, True
         except Exception as e:
-            log.warning("hydrate buckets failed for user %s: %s", vo.user_id, e)
-            buckets = {
+            log.warning("hydrate profile tags failed for user %s: %s", dto.user_id, e)
+        vo = self.__build_mentor_profile_vo(
+            dto, want_tags, language, industry=None, buckets={
                 'want_position': [], 'want_skill': [], 'want_topic': [],
                 'have_skill': [], 'have_topic': [],
-            }
+            },
+        )
+        return vo, False
+
+    async def __assemble_mentor_profile_vo(
+        self,
+        db: AsyncSession,
+        dto: MentorProfileDTO,
+        want_tags: List[str],
+        have_tags: List[str],
+        language: str,
+    ) -> MentorProfileVO:
+        # One catalog-snapshot pass for industry + buckets; together with the
+        # single profile row read, a cold mentor profile view is one query.
+        # Empty buckets ([]) are explicit on the wire so the frontend can
+        # distinguish "user has none" from "field absent".
+        industry, buckets = await self.__tag_service.hydrate_profile_tags(
+            db,
+            industry=dto.industry,
+            want_tags=want_tags,
+            have_tags=have_tags,
+            language=language,
+        )
+        return self.__build_mentor_profile_vo(dto, want_tags, language, industry, buckets)
+
+    def __build_mentor_profile_vo(self, dto: MentorProfileDTO, want_tags: List[str], language: str,
+                                  industry: Optional[TagVO], buckets: Dict[str, List[str]]) \
+            -> MentorProfileVO:
+        vo: MentorProfileVO = self.__profile_service.build_mentor_profile_vo(
+            dto, language, want_tags=want_tags, industry=industry,
+        )
         vo.want_position = buckets['want_position']
         vo.want_skill = buckets['want_skill']
         vo.want_topic = buckets['want_topic']
         vo.have_skill = buckets['have_skill']
         vo.have_topic = buckets['have_topic']
+        return vo
+
+def _mentor_profile_key(user_id: int, language: str) -> str:
+    return f'mentor_profile:{user_id}:{language}'
+
+
+def _cacheable(language: str) -> bool:
+    # Only supported languages are cached, so invalidate_mentor_profile can
+    # enumerate every key a user may have.
+    return language in Language._value2member_map_
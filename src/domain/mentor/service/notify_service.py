@@ -40,10 +40,10 @@ class NotifyService:
                 "action": "UPSERT_MENTOR_PROFILE",
             }
             await self.mq_adapter.publish_message(payload, group_id=str(user_id))
-            log.info(f"[NotifyService] published UPSERT_MENTOR_PROFILE, user_id={user_id}")
+            log.info("[NotifyService] published UPSERT_MENTOR_PROFILE, user_id=%s", user_id)
 
         except Exception as e:
-            log.error(f"[NotifyService] failed to publish user profile update, user_id={user_id}: {e}")
+            log.error("[NotifyService] failed to publish user profile update, user_id=%s: %s", user_id, e)
 
     async def updated_mentor_profile(self, mentor_profile: mentor.MentorProfileVO):
         """Triggered by PUT /mentors/mentor_profile — updates mentor-specific fields,
@@ -55,9 +55,9 @@ class NotifyService:
                 "action": "PUT_MENTOR_PROFILE",
             }
             await self.mq_adapter.publish_message(payload, group_id=str(user_id))
-            log.info(f"[NotifyService] published PUT_MENTOR_PROFILE, user_id={user_id}")
+            log.info("[NotifyService] published PUT_MENTOR_PROFILE, user_id=%s", user_id)
         except Exception as e:
-            log.error(f"[NotifyService] failed to publish mentor profile update, user_id={user_id}: {e}")
+            log.error("[NotifyService] failed to publish mentor profile update, user_id=%s: %s", user_id, e)
 
     async def notify_delete_mentor_profile(self, user_id: int) -> None:
         try:
@@ -66,7 +66,7 @@ class NotifyService:
                 "user_id": user_id,
             }
             await self.mq_adapter.publish_message(payload, group_id=str(user_id))
-            log.info(f"[NotifyService] published DELETE_MENTOR_PROFILE, user_id={user_id}")
+            log.info("[NotifyService] published DELETE_MENTOR_PROFILE, user_id=%s", user_id)
         except Exception as e:
-            log.error(f"[NotifyService] failed to publish DELETE_MENTOR_PROFILE, user_id={user_id}: {e}")
+            log.error("[NotifyService] failed to publish DELETE_MENTOR_PROFILE, user_id=%s: %s", user_id, e)
             raise
@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.constant import ActivityJobStatus, ActivityStatus
+from src.domain.user.model.reservation_model import ActivityJobVO
+from src.infra.db.orm.init.user_init import ActivityJob
+from src.infra.util.time_util import current_seconds
+
+
+class ActivityJobRepository:
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        mentor_reservation_id: int,
+        mentee_reservation_id: int,
+        target_status: ActivityStatus,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # NOTE: 不 commit，與預約狀態的更新在同一個 transaction 內提交
+        now = current_seconds()
+        stmt = pg_insert(ActivityJob).values(
+            mentor_reservation_id=mentor_reservation_id,
+            mentee_reservation_id=mentee_reservation_id,
+            target_status=target_status.value,
+            payload=payload or {},
+            status=ActivityJobStatus.PENDING.value,
+            next_run_at=now,
+        )
+        # 已被 worker claim 且 lease 未到期的 pending job (attempts > 0, next_run_at > now)
+        # 不能馬上再被取出，否則新舊 revision 會被兩個 worker 同時執行；
+        # 保留 lease (與 attempts)，舊 revision 的 settle 會因 revision 不符而略過，
+        # lease 到期後新的 revision 才會被取出
+        in_flight = and_(
+            ActivityJob.status == ActivityJobStatus.PENDING.value,
+            ActivityJob.attempts > 0,
+            ActivityJob.next_run_at > now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                ActivityJob.mentor_reservation_id,
+                ActivityJob.mentee_reservation_id,
+            ],
+            set_={
+                'target_status': stmt.excluded.target_status,
+                'payload': stmt.excluded.payload,
+                'status': ActivityJobStatus.PENDING.value,
+                'revision': ActivityJob.revision + 1,
+                'attempts': case((in_flight, ActivityJob.attempts), else_=0),
+                'next_run_at': case((in_flight, ActivityJob.next_run_at), else_=stmt.excluded.next_run_at),
+                'last_error': None,
+                'updated_at': func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+    async def claim_due(
+        self,
+        db: AsyncSession,
+        limit: int,
+        lease_secs: int,
+    ) -> List[ActivityJobVO]:
+        # 取出到期的 job 並延後 next_run_at (lease)，其他 worker 在 lease 期間看不到；
+        # worker 掛掉時 lease 到期後會被重新取出
+        now = current_seconds()
+        due = (
+            select(ActivityJob.id)
+            .where(
+                ActivityJob.status == ActivityJobStatus.PENDING.value,
+                ActivityJob.next_run_at <= now,
+            )
+            .order_by(ActivityJob.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(ActivityJob)
+            .where(ActivityJob.id.in_(due))
+            .values(
+                attempts=ActivityJob.attempts + 1,
+                next_run_at=now + lease_secs,
+            )
+            .returning(
+                ActivityJob.id,
+                ActivityJob.mentor_reservation_id,
+                ActivityJob.mentee_reservation_id,
+                ActivityJob.target_status,
+                ActivityJob.payload,
+                ActivityJob.revision,
+                ActivityJob.attempts,
+            )
+        )
+        result = await db.execute(stmt)
+        jobs = [ActivityJobVO.model_validate(row) for row in result.all()]
+        await db.commit()
+        return jobs
+
+    async def mark_done(self, db: AsyncSession, job: ActivityJobVO) -> bool:
+        return await self.__settle(db, job, status=ActivityJobStatus.DONE.value, last_error=None)
+
+    async def mark_failed(self, db: AsyncSession, job: ActivityJobVO, error: str) -> bool:
+        return await self.__settle(db, job, status=ActivityJobStatus.FAILED.value, last_error=error)
+
+    async def retry_later(
+        self,
+        db: AsyncSession,
+        job: ActivityJobVO,
+        delay_secs: int,
+        error: str,
+    ) -> bool:
+        return await self.__settle(db, job, next_run_at=current_seconds() + delay_secs, last_error=error)
+
+    async def __settle(self, db: AsyncSession, job: ActivityJobVO, **values) -> bool:
+        # 只處理 claim 到的 revision；期間若有新的 enqueue，保留給下一輪
+        stmt = (
+            update(ActivityJob)
+            .where(and_(
+                ActivityJob.id == job.id,
+                ActivityJob.revision == job.revision,
+            ))
+            .values(updated_at=func.now(), **values)
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount > 0
@@ -1,6 +1,7 @@
 from typing import Optional
 
-from sqlalchemy import Select, select, update, insert
+from sqlalchemy import Select, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.constant import ActivityService, ActivityStatus, RoleType
@@ -34,13 +35,14 @@ class ActivityRepository:
         mentor_reservation_id: int,
         mentee_reservation_id: int,
     ) -> None:
-        stmt = insert(Activity).values(
+        # event_id 已存在 (retry 時重複寫入) 則略過
+        stmt = pg_insert(Activity).values(
             id=event_id,
             mentor_reservation_id=mentor_reservation_id,
             mentee_reservation_id=mentee_reservation_id,
             service=ActivityService.GOOGLE,
             status=ActivityStatus.SCHEDULED,
-        )
+        ).on_conflict_do_nothing(index_elements=[Activity.id])
         await db.execute(stmt)
         await db.commit()
 
@@ -1,12 +1,18 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import select, Select, delete as sa_delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.exception import NotFoundException
 from src.domain.user.model.user_model import ProfileDTO
+from src.domain.user.model.reservation_model import RUserInfoVO
 from src.infra.db.orm.init.user_init import Profile
-from src.infra.util.convert_util import get_first_template
+from src.infra.util.convert_util import get_first_template, upsert_if_changed
+
+
+# (dto, want_tags, have_tags, changed) — changed is False when the upsert
+# found an identical row and skipped the write.
+UpsertedProfile = Tuple[ProfileDTO, List[str], List[str], bool]
 
 
 def _row_to_tuple(row: Profile) -> Tuple[ProfileDTO, List[str], List[str]]:
@@ -39,29 +45,60 @@ class ProfileRepository:
             return None
         return ProfileDTO.model_validate(query)
 
+    async def find_reservation_infos(
+        self, db: AsyncSession, user_ids: Iterable[int],
+    ) -> Dict[int, RUserInfoVO]:
+        # the profile fields shown on a reservation, for many users in one query
+        stmt: Select = select(
+            Profile.user_id,
+            Profile.name,
+            Profile.avatar,
+            Profile.job_title,
+            Profile.years_of_experience,
+        ).where(Profile.user_id.in_(list(user_ids)))
+        result = await db.execute(stmt)
+        return {
+            row.user_id: RUserInfoVO(
+                user_id=row.user_id,
+                name=row.name,
+                avatar=row.avatar,
+                job_title=row.job_title,
+                years_of_experience=row.years_of_experience,
+            )
+            for row in result.all()
+        }
+
     async def upsert_profile(
         self, db: AsyncSession, dto: ProfileDTO,
-    ) -> Tuple[ProfileDTO, List[str], List[str]]:
+    ) -> UpsertedProfile:
         if (dto is None) or (dto.user_id is None):
             raise NotFoundException(msg="not a valid user")
 
-        # Load-or-create instead of db.merge — ProfileDTO no longer covers
-        # every Profile column (mentor-only want_tags/have_tags live on the
-        # row but not the mentee dto), and merge would copy unset attrs as
-        # NULL, clobbering existing tag arrays.
-        existing: Optional[Profile] = await db.get(Profile, dto.user_id)
-        if existing is None:
-            model = Profile(**dto.model_dump())
-            db.add(model)
+        # Single INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING.
+        # Only the ProfileDTO columns are written on conflict — mentor-only
+        # want_tags/have_tags live on the row but not the mentee dto, and
+        # must not be clobbered.
+        # The frontend re-PUTs the whole profile on every save, so the
+        # UPDATE only fires when a column actually differs.
+        payload = dto.model_dump()
+        row, changed = await upsert_if_changed(
+            db, Profile,
+            insert_values=payload,
+            update_columns=[k for k in payload if k != 'user_id'],
+            index_elements=['user_id'],
+        )
+        if row is None:
+            # an identical resubmit returns the stored row from the same
+            # statement; only a concurrent insert/delete of the row misses it
             await db.commit()
-            await db.refresh(model)
-            return _row_to_tuple(model)
+            # raises NotFoundException if the row was deleted meanwhile
+            stored = await self.get_by_user_id(db, dto.user_id)
+            return (*stored, False)
 
-        for key, value in dto.model_dump().items():
-            setattr(existing, key, value)
+        # convert before commit: commit expires the returned instance
+        res = _row_to_tuple(row)
         await db.commit()
-        await db.refresh(existing)
-        return _row_to_tuple(existing)
+        return (*res, changed)
 
     async def delete_profile(self, db: AsyncSession, user_id: int) -> None:
         stmt = sa_delete(Profile).where(Profile.user_id == user_id)
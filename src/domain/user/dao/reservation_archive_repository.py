@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.infra.db.orm.init.user_init import Reservation, ReservationArchive
+
+# same column order on both sides of the move
+_ARCHIVE_COLUMNS = (
+    'id', 'schedule_id', 'dtstart', 'dtend', 'my_user_id', 'my_status', 'my_role',
+    'user_id', 'status', 'messages', 'previous_reserve', 'created_at', 'updated_at',
+)
+
+
+class ReservationArchiveRepository:
+
+    async def oldest_dtend(self, db: AsyncSession, cutoff: int) -> Optional[int]:
+        stmt = select(func.min(Reservation.dtend)).where(Reservation.dtend < cutoff)
+        return await db.scalar(stmt)
+
+    async def ensure_partitions(self, db: AsyncSession,
+                                dtend_from: int,
+                                dtend_to: int) -> List[str]:
+        '''
+        每月一個 partition: [月初, 下個月初) 的 epoch seconds (UTC)
+        - 已存在的 partition 不動 (IF NOT EXISTS)
+        - 表名不加 schema，依連線的 search_path (DB_SCHEMA / shard schema)
+        '''
+        names = []
+        month = _month_of(dtend_from)
+        while _epoch_of(month) <= dtend_to:
+            next_month = _next_month(month)
+            name = f'{ReservationArchive.__tablename__}_p{month.year:04d}{month.month:02d}'
+            await db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {name} '
+                f'PARTITION OF {ReservationArchive.__tablename__} '
+                f'FOR VALUES FROM ({_epoch_of(month)}) TO ({_epoch_of(next_month)})'
+            ))
+            names.append(name)
+            month = next_month
+        await db.commit()
+        return names
+
+    async def archive_before(self, db: AsyncSession,
+                             cutoff: int,
+                             limit: int) -> int:
+        '''
+        1次 IO: 將 dtend < cutoff 的預約 (最舊的 limit 筆) 從 reservations
+        搬到 reservations_archive (DELETE ... RETURNING 接 INSERT)
+        - SKIP LOCKED: 正在更新的 row 留到下一輪，不阻塞預約流程
+        - 對應月份的 partition 須先由 ensure_partitions 建好
+        '''
+        due = (
+            select(Reservation.id)
+            .where(Reservation.dtend < cutoff)
+            .order_by(Reservation.dtend)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte('due')
+        )
+        moved = (
+            delete(Reservation)
+            .where(Reservation.id.in_(select(due.c.id)))
+            .returning(*[getattr(Reservation, c) for c in _ARCHIVE_COLUMNS])
+            .cte('moved')
+        )
+        stmt = (
+            insert(ReservationArchive)
+            .from_select(list(_ARCHIVE_COLUMNS), select(*[moved.c[c] for c in _ARCHIVE_COLUMNS]))
+            .returning(ReservationArchive.id)
+        )
+        result = await db.execute(stmt)
+        archived = len(result.all())
+        await db.commit()
+        return archived
+
+
+def _month_of(ts: int) -> datetime:
+    d = datetime.fromtimestamp(ts, tz=timezone.utc)
+    return datetime(d.year, d.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _epoch_of(month: datetime) -> int:
+    return int(month.timestamp())
@@ -1,7 +1,9 @@
 from typing import List, Optional, Dict
-from sqlalchemy import func, Integer, Select, select, update, insert, join, and_, bindparam, exists
+import json
+from sqlalchemy import func, Integer, BigInteger, String, Text, Select, select, update, insert, join, and_, bindparam, exists, cast, tuple_, case, literal, true, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, JSONPATH
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.config.conf import BATCH, RESERVATION_ISOLAION_LEVEL
+from src.config.conf import BATCH, RESERVATION_MESSAGES_MAX, RESERVATION_CHANGE_CHANNEL
 from src.domain.user.model.reservation_model import *
 from src.infra.db.orm.init.user_init import *
 from src.infra.util.convert_util import (
@@ -10,9 +12,16 @@ from src.infra.util.convert_util import (
     fetch_all_template,
     convert_dto_to_model,
 )
+from src.config.logging_config import get_sampled_logger
 import logging
 
 log = logging.getLogger(__name__)
+# per-booking events: debug level and sampled, so they cost nothing by default
+log_sampled = get_sampled_logger(__name__)
+
+# DB-side booking checks (sql/init/user_init.sql, migration 20261018_0004)
+RESERVATION_PERIOD_CONSTRAINT = 'excl_reservation_accepted_user_period'
+RESERVATION_ACTIVE_UNIQUE_INDEX = 'uidx_reservation_active_user_dtstart_dtend_schedule_id_user_id'
 
 
 class ReservationRepository:
@@ -38,7 +47,10 @@ class ReservationRepository:
             Reservation.my_user_id == user_id
         ).values(my_user_id=-user_id)
         result = await db.execute(stmt)
-        return result.rowcount
+        archived = await db.execute(update(ReservationArchive).where(
+            ReservationArchive.my_user_id == user_id
+        ).values(my_user_id=-user_id))
+        return result.rowcount + archived.rowcount
 
     async def anonymize_by_user_id(
         self, db: AsyncSession, user_id: int
@@ -47,7 +59,10 @@ class ReservationRepository:
             Reservation.user_id == user_id
         ).values(user_id=-user_id)
         result = await db.execute(stmt)
-        return result.rowcount
+        archived = await db.execute(update(ReservationArchive).where(
+            ReservationArchive.user_id == user_id
+        ).values(user_id=-user_id))
+        return result.rowcount + archived.rowcount
 
     async def find_by_id(self, db: AsyncSession,
                          reserve_id: int,
@@ -139,101 +154,140 @@ class ReservationRepository:
         # this user's row keeps `my_status=ACCEPT` (status=REJECT mirrors the
         # counterparty). Filtering on my_status=ACCEPT alone treats those dead
         # rows as live conflicts and blocks re-booking the same slot.
+        # Same rows and [dtstart, dtend) overlap as RESERVATION_PERIOD_CONSTRAINT.
         stmt: Select = select(Reservation).where(
             and_(
                 Reservation.my_user_id == my_user_id,
                 Reservation.my_status == BookingStatus.ACCEPT,
                 Reservation.status != BookingStatus.REJECT,
-                Reservation.dtstart >= dtstart,
-                Reservation.dtend <= dtend,
+                Reservation.dtstart < dtend,
+                Reservation.dtend > dtstart,
             )
-        )
+        ).order_by(Reservation.dtstart)
         reservations = await get_all_template(db, stmt)
         return [ReservationVO.model_validate(reservation) for reservation in reservations]
 
 
-    async def save_all(self, db: AsyncSession, reservations: List[Reservation]):
-        log.info(f"=== save_all 开始执行 ===")
-        log.info(f"Reservations 数量: {len(reservations)}")
-
+    async def save_all(self, db: AsyncSession,
+                       reservations: List[Reservation],
+                       new_messages: Optional[List[Dict]] = None):
+        '''
+        - 新增: 寫入完整欄位 (含 messages)
+        - 更新: 只更新狀態；messages 不整串寫回，new_messages 在 DB 端
+          prepend 到既有訊息串 (new || messages)，超過 RESERVATION_MESSAGES_MAX 的舊訊息捨棄
+        '''
         # 分離更新和插入操作
         updates = [r for r in reservations if r.id]
         inserts = [r for r in reservations if not r.id]
+        log_sampled.debug('save_all', extra={'updates': len(updates), 'inserts': len(inserts)})
 
-        log.info(f"更新操作数量: {len(updates)}, 插入操作数量: {len(inserts)}")
-
-        # 记录每个 reservation 的详细信息
-        for i, r in enumerate(reservations):
-            log.info(f"Reservation {i}: id={r.id}, my_role={r.my_role}, my_user_id={r.my_user_id}, schedule_id={r.schedule_id}")
+        if not updates and not inserts:
+            await db.commit()
+            return
 
+        # 1次 IO：更新以 unnest 陣列 join (id, my_user_id)、新增以 unnest 陣列，
+        # 都放在 CTE 裡，連同 change feed 的 pg_notify 同一個 statement 送出
+        written = []
         if updates:
-            log.info("开始执行批量更新操作")
-            # 批量更新
-            stmt = update(Reservation).where(
-                and_(
-                    Reservation.id == bindparam('b_id'),
-                    Reservation.my_user_id == bindparam('b_my_user_id')
-                )
-            ).values({
-                'my_status': bindparam('b_my_status'),
-                'status': bindparam('b_status'),
-                'messages': bindparam('b_messages'),
-            })
-
-            for i, r in enumerate(updates):
-                update_data = {
-                    'b_id': r.id,
-                    'b_my_user_id': r.my_user_id,
-                    'b_my_status': r.my_status,
-                    'b_status': r.status,
-                    'b_messages': r.messages,
-                }
-                log.info(f"执行更新 {i}: {update_data}")
-                await db.execute(stmt, update_data)  # N次 IO：多次更新
-            log.info("批量更新操作完成")
-
-        if inserts:
-            log.info("开始执行批量插入操作")
-            # 批量插入
-            stmt = insert(Reservation).returning(Reservation.id)
-
-            # 准备插入数据
-            insert_data = [{
-                'schedule_id': r.schedule_id,
-                'dtstart': r.dtstart,
-                'dtend': r.dtend,
-                'my_user_id': r.my_user_id,
-                'my_status': r.my_status,
-                'user_id': r.user_id,
-                'status': r.status,
-                'my_role': r.my_role,
-                'messages': r.messages,
-                'previous_reserve': r.previous_reserve,
-            } for r in inserts]
-
-            log.info(f"插入数据: {insert_data}")
-
-            result = await db.execute(stmt, insert_data)  # 1次 IO：批量插入
-            log.info("插入操作执行完成")
-
-            # 更新新插入記錄的 id
-            new_ids = result.scalars().all()
-            log.info(f"新插入记录的ID: {new_ids}")
-            for r, new_id in zip(inserts, new_ids):
-                r.id = new_id
-                log.info(f"更新 reservation 对象 ID: {r.my_role} -> {new_id}")
-
-        log.info("开始提交事务")
-        await db.commit()  # 1次 IO：提交事務
-        log.info("事务提交完成")
-
+            written.append(self.__bulk_update_stmt(updates, new_messages).cte('updated'))
+        inserted = self.__bulk_insert_stmt(inserts).cte('inserted') if inserts else None
+        if inserted is not None:
+            written.append(inserted)
+        notified = _notify_changes_cte(written)
+
+        if inserted is not None:
+            # notified 一定有一列 (aggregate)，放在 LEFT JOIN 左邊，沒有新增時也會執行
+            stmt = select(
+                inserted.c.id,
+                inserted.c.my_user_id,
+                inserted.c.schedule_id,
+                inserted.c.dtstart,
+                inserted.c.dtend,
+                inserted.c.user_id,
+            ).select_from(notified.outerjoin(inserted, true()))
+            result = await db.execute(stmt)
+
+            # 更新新插入記錄的 id；RETURNING 不保證順序，以 active unique key 對回
+            new_ids = {
+                (row.my_user_id, row.schedule_id, row.dtstart, row.dtend, row.user_id): row.id
+                for row in result.all()
+            }
+            for r in inserts:
+                r.id = new_ids.get((r.my_user_id, r.schedule_id, r.dtstart, r.dtend, r.user_id))
+        else:
+            await db.execute(select(notified.c.notified))
+
+        await db.commit()  # 1次 IO：提交事務；change feed 的 NOTIFY 在 commit 後才送出
+
+    @staticmethod
+    def __bulk_update_stmt(updates: List[Reservation], new_messages: Optional[List[Dict]]):
+        rows = func.unnest(
+            bindparam('u_id', [r.id for r in updates], type_=ARRAY(Integer)),
+            bindparam('u_my_user_id', [r.my_user_id for r in updates], type_=ARRAY(BigInteger)),
+            bindparam('u_my_status', [_str_of(r.my_status) for r in updates], type_=ARRAY(String)),
+            bindparam('u_status', [_str_of(r.status) for r in updates], type_=ARRAY(String)),
+        ).table_valued(
+            'id', 'my_user_id', 'my_status', 'status',
+        ).render_derived(name='u')
+        values = {
+            'my_status': rows.c.my_status,
+            'status': rows.c.status,
+        }
+        if new_messages:
+            values['messages'] = _prepend_messages(new_messages)
+        return update(Reservation).where(
+            and_(
+                Reservation.id == rows.c.id,
+                Reservation.my_user_id == rows.c.my_user_id,
+            )
+        ).values(values).returning(*_CHANGE_COLUMNS)
+
+    @staticmethod
+    def __bulk_insert_stmt(inserts: List[Reservation]):
+        rows = func.unnest(
+            bindparam('i_schedule_id', [r.schedule_id for r in inserts], type_=ARRAY(Integer)),
+            bindparam('i_dtstart', [r.dtstart for r in inserts], type_=ARRAY(BigInteger)),
+            bindparam('i_dtend', [r.dtend for r in inserts], type_=ARRAY(BigInteger)),
+            bindparam('i_my_user_id', [r.my_user_id for r in inserts], type_=ARRAY(BigInteger)),
+            bindparam('i_my_status', [_str_of(r.my_status) for r in inserts], type_=ARRAY(String)),
+            bindparam('i_user_id', [r.user_id for r in inserts], type_=ARRAY(BigInteger)),
+            bindparam('i_status', [_str_of(r.status) for r in inserts], type_=ARRAY(String)),
+            bindparam('i_my_role', [_str_of(r.my_role) for r in inserts], type_=ARRAY(String)),
+            bindparam('i_messages', [_json_of(r.messages) for r in inserts], type_=ARRAY(Text)),
+            bindparam('i_previous_reserve', [_json_of(r.previous_reserve) for r in inserts], type_=ARRAY(Text)),
+        ).table_valued(
+            'schedule_id', 'dtstart', 'dtend', 'my_user_id', 'my_status',
+            'user_id', 'status', 'my_role', 'messages', 'previous_reserve',
+        ).render_derived(name='i')
+        return insert(Reservation).from_select(
+            [
+                Reservation.schedule_id,
+                Reservation.dtstart,
+                Reservation.dtend,
+                Reservation.my_user_id,
+                Reservation.my_status,
+                Reservation.user_id,
+                Reservation.status,
+                Reservation.my_role,
+                Reservation.messages,
+                Reservation.previous_reserve,
+            ],
+            select(
+                rows.c.schedule_id,
+                rows.c.dtstart,
+                rows.c.dtend,
+                rows.c.my_user_id,
+                rows.c.my_status,
+                rows.c.user_id,
+                rows.c.status,
+                rows.c.my_role,
+                cast(rows.c.messages, JSONB),
+                cast(rows.c.previous_reserve, JSONB),
+            ),
+        ).returning(*_CHANGE_COLUMNS)
 
     async def save(self, db: AsyncSession, reservation: Reservation):
-        log.info(f"=== save 开始执行 ===")
-        log.info(f"Reservation: id={reservation.id}, my_role={reservation.my_role}, my_user_id={reservation.my_user_id}")
-
         if reservation.id:
-            log.info("执行更新操作")
             # 構建更新語句
             stmt = update(Reservation).where(
                 (Reservation.id == reservation.id) &
@@ -244,10 +298,8 @@ class ReservationRepository:
                 messages=reservation.messages,
             ).execution_options(synchronize_session="fetch")
             await db.execute(stmt)  # 1次 IO：更新操作
-            log.info("更新操作完成")
 
         else:
-            log.info("执行插入操作")
             # 構建插入語句
             stmt = insert(Reservation).values(
                 schedule_id=reservation.schedule_id,
@@ -262,121 +314,312 @@ class ReservationRepository:
                 previous_reserve=reservation.previous_reserve,
             ).returning(Reservation.id)
 
-            log.info(f"插入数据: schedule_id={reservation.schedule_id}, my_role={reservation.my_role}")
-
             result = await db.execute(stmt)  # 1次 IO：插入操作
             new_id = result.scalar_one()  # 從返回結果中獲取 id
             reservation.id = new_id  # 更新對象的 id
-            log.info(f"插入成功，新ID: {new_id}")
 
-        log.info("开始执行 flush 操作")
+        log_sampled.debug('save', extra={
+            'reservation_id': reservation.id,
+            'my_user_id': reservation.my_user_id,
+            'my_role': reservation.my_role,
+        })
         await db.flush()  # 將更改發送到數據庫，但不提交事務
-        log.info("flush 操作完成")
 
 
     async def get_user_reservations(self, db: AsyncSession,
                                     user_id: int,
-                                    query: ReservationQueryDTO) -> Optional[List[ReservationDTO]]:
-        stmt = select(
-            Reservation.id,
-            Reservation.schedule_id,
-            Reservation.dtstart,
-            Reservation.dtend,
-            Reservation.my_user_id,
-            Reservation.my_status,
-            Reservation.user_id,
-            Reservation.status,
-            Reservation.my_role,
-            Reservation.messages,
-            Reservation.previous_reserve,
-            Profile.name,
-            Profile.avatar,
-            Profile.job_title,
-            Profile.years_of_experience,
-        ).select_from(
-            join(
-                Reservation,
-                Profile,
-                Reservation.user_id == Profile.user_id,
-                isouter=True,
-            )
-        )
+                                    query: ReservationQueryDTO,
+                                    join_profile: bool = True) -> Optional[List[ReservationDTO]]:
         # for key, value in query.items():
         #     stmt = stmt.where(getattr(Reservation, key) == value)
-        stmt = stmt.where(Reservation.my_user_id == user_id)
-
-        if query.state == ReservationListState.MENTOR_UPCOMING.value:
-            stmt = stmt.where(
-                (Reservation.my_status == BookingStatus.ACCEPT) &
-                (Reservation.status == BookingStatus.ACCEPT) &
-                (Reservation.my_role == RoleType.MENTOR) &
-                (Reservation.dtend >= current_seconds())
-            )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend >= query.next_dtend)
-
-        if query.state == ReservationListState.MENTEE_UPCOMING.value:
-            stmt = stmt.where(
-                (Reservation.my_status == BookingStatus.ACCEPT) &
-                (Reservation.status == BookingStatus.ACCEPT) &
-                (Reservation.my_role == RoleType.MENTEE) &
-                (Reservation.dtend >= current_seconds())
+        cursor = query.cursor()
+        stmt = _keyset_page(
+            select(*_RESERVATION_INFO_COLUMNS).where(Reservation.my_user_id == user_id),
+            Reservation, _state_condition(query.state, current_seconds()), cursor, query.batch)
+
+        # HISTORY also reads reservations_archive; each side is already
+        # ordered and limited by its own (my_user_id, my_role, dtend, id) index
+        archived_condition = _archived_condition(query.state)
+        if archived_condition is not None:
+            archived = _keyset_page(
+                select(*_ARCHIVE_INFO_COLUMNS).where(ReservationArchive.my_user_id == user_id),
+                ReservationArchive, archived_condition, cursor, query.batch)
+            rows = union_all(stmt, archived).subquery()
+        else:
+            rows = stmt.subquery()
+
+        # join_profile=False: the counterparty's profile lives on another shard
+        if join_profile:
+            stmt = select(
+                rows,
+                *_PROFILE_INFO_COLUMNS,
+            ).select_from(
+                join(
+                    rows,
+                    Profile,
+                    rows.c.user_id == Profile.user_id,
+                    isouter=True,
+                )
             )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend >= query.next_dtend)
-
-        elif query.state == ReservationListState.MENTOR_PENDING.value:
-            # Either side rejecting ends the reservation, so PENDING must exclude
-            # rows where my_status or status is REJECT — otherwise a self-cancel
-            # before the counterparty responds keeps the row in PENDING because
-            # the other side's status is still PENDING (mirrors HISTORY filter).
-            stmt = stmt.where(
-                (Reservation.my_status != BookingStatus.REJECT) &
-                (Reservation.status != BookingStatus.REJECT) &
-                ((Reservation.my_status == BookingStatus.PENDING) |
-                (Reservation.status == BookingStatus.PENDING)) &
-                (Reservation.my_role == RoleType.MENTOR) &
-                (Reservation.dtend >= current_seconds())
+        else:
+            stmt = select(rows)
+        stmt = stmt.order_by(rows.c.dtend.desc(), rows.c.id.desc()).limit(query.batch)
+        result = await db.execute(stmt)
+        reservations = result.fetchall()
+
+        reservation_dtos: List[ReservationInfoVO] = [ReservationInfoVO.from_sender_model(reservation) for reservation in reservations]
+        return reservation_dtos
+
+    async def get_user_reservation_summary(self, db: AsyncSession,
+                                           user_id: int,
+                                           batch: int,
+                                           join_profile: bool = True) -> ReservationSummaryVO:
+        '''
+        所有 ReservationListState 的筆數與第一頁，一次查詢完成:
+        - 每筆預約依 _state_condition 歸到一個 state (各 state 互斥)；
+          reservations_archive 的預約都已結束，依 my_role 歸到 HISTORY
+        - window function 在同一次 scan 算出各 state 的 total 與排序 (dtend DESC, id DESC)，
+          只帶 (id, dtend, state)，不讓 messages 等欄位進 window 的 sort
+        - 每個 state 的前 batch + 1 筆才 join 回原表取完整欄位與 profiles
+        '''
+        now = current_seconds()
+        state = case(
+            *[(_state_condition(s.value, now), s.value) for s in ReservationListState],
+            else_=None,
+        ).label('state')
+        archived_state = case(
+            (ReservationArchive.my_role == RoleType.MENTOR, ReservationListState.MENTOR_HISTORY.value),
+            (ReservationArchive.my_role == RoleType.MENTEE, ReservationListState.MENTEE_HISTORY.value),
+            else_=None,
+        ).label('state')
+        ranked = union_all(
+            select(
+                Reservation.id,
+                Reservation.dtend,
+                state,
+                literal(False).label('archived'),
             )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend >= query.next_dtend)
-
-        elif query.state == ReservationListState.MENTEE_PENDING.value:
-            stmt = stmt.where(
-                (Reservation.my_status != BookingStatus.REJECT) &
-                (Reservation.status != BookingStatus.REJECT) &
-                ((Reservation.my_status == BookingStatus.PENDING) |
-                (Reservation.status == BookingStatus.PENDING)) &
-                (Reservation.my_role == RoleType.MENTEE) &
-                (Reservation.dtend >= current_seconds())
+            .where(Reservation.my_user_id == user_id),
+            select(
+                ReservationArchive.id,
+                ReservationArchive.dtend,
+                archived_state,
+                literal(True).label('archived'),
             )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend >= query.next_dtend)
-
-        elif query.state == ReservationListState.MENTOR_HISTORY.value:
-            stmt = stmt.where(
-                (Reservation.my_role == RoleType.MENTOR) &
-                ((Reservation.my_status == BookingStatus.REJECT) |
-                 (Reservation.status == BookingStatus.REJECT) |
-                 (Reservation.dtend < current_seconds()))
+            .where(ReservationArchive.my_user_id == user_id),
+        ).subquery()
+        windowed = select(
+            ranked,
+            func.count().over(partition_by=ranked.c.state).label('total'),
+            func.row_number().over(
+                partition_by=ranked.c.state,
+                order_by=(ranked.c.dtend.desc(), ranked.c.id.desc()),
+            ).label('rn'),
+        ).where(ranked.c.state.is_not(None)).subquery()
+        top = select(windowed).where(windowed.c.rn <= batch + 1).subquery()
+        rows = union_all(
+            select(*_RESERVATION_INFO_COLUMNS, top.c.state, top.c.total, top.c.rn)
+            .join(top, and_(top.c.id == Reservation.id, top.c.archived.is_(False))),
+            select(*_ARCHIVE_INFO_COLUMNS, top.c.state, top.c.total, top.c.rn)
+            .join(top, and_(top.c.id == ReservationArchive.id, top.c.archived.is_(True))),
+        ).subquery()
+        if join_profile:
+            stmt = (
+                select(
+                    rows,
+                    *_PROFILE_INFO_COLUMNS,
+                )
+                .select_from(
+                    join(
+                        rows,
+                        Profile,
+                        rows.c.user_id == Profile.user_id,
+                        isouter=True,
+                    )
+                )
             )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend <= query.next_dtend)
-
-        elif query.state == ReservationListState.MENTEE_HISTORY.value:
-            stmt = stmt.where(
-                (Reservation.my_role == RoleType.MENTEE) &
-                ((Reservation.my_status == BookingStatus.REJECT) |
-                 (Reservation.status == BookingStatus.REJECT) |
-                 (Reservation.dtend < current_seconds()))
+        else:
+            stmt = select(rows)
+        stmt = stmt.order_by(rows.c.state, rows.c.rn)
+        result = await db.execute(stmt)
+
+        totals: Dict[str, int] = {}
+        pages: Dict[str, List[ReservationInfoVO]] = {}
+        for row in result.fetchall():
+            totals[row.state] = row.total
+            pages.setdefault(row.state, []).append(ReservationInfoVO.from_sender_model(row))
+
+        summary = ReservationSummaryVO()
+        for s in ReservationListState:
+            page = ReservationInfoListVO.page(pages.get(s.value, []), batch)
+            summary.states[s.value] = ReservationStateSummaryVO(
+                total=totals.get(s.value, 0),
+                reservations=page.reservations,
+                next_cursor=page.next_cursor,
+                next_dtend=page.next_dtend,
             )
-            if query.next_dtend:
-                stmt = stmt.where(Reservation.dtend <= query.next_dtend)
+        return summary
+
+
+_RESERVATION_INFO_COLUMNS = (
+    Reservation.id,
+    Reservation.schedule_id,
+    Reservation.dtstart,
+    Reservation.dtend,
+    Reservation.my_user_id,
+    Reservation.my_status,
+    Reservation.user_id,
+    Reservation.status,
+    Reservation.my_role,
+    Reservation.messages,
+    Reservation.previous_reserve,
+)
 
+_ARCHIVE_INFO_COLUMNS = (
+    ReservationArchive.id,
+    ReservationArchive.schedule_id,
+    ReservationArchive.dtstart,
+    ReservationArchive.dtend,
+    ReservationArchive.my_user_id,
+    ReservationArchive.my_status,
+    ReservationArchive.user_id,
+    ReservationArchive.status,
+    ReservationArchive.my_role,
+    ReservationArchive.messages,
+    ReservationArchive.previous_reserve,
+)
 
-        stmt = stmt.order_by(Reservation.dtend.desc()).limit(query.batch)
-        result = await db.execute(stmt)
-        reservations = result.fetchall()
+_PROFILE_INFO_COLUMNS = (
+    Profile.name,
+    Profile.avatar,
+    Profile.job_title,
+    Profile.years_of_experience,
+)
 
-        reservation_dtos: List[ReservationInfoVO] = [ReservationInfoVO.from_sender_model(reservation) for reservation in reservations]
-        return reservation_dtos
+
+def _state_condition(state: Optional[str], now: int):
+    # the ReservationListState filters; a reservation matches at most one state
+    if state == ReservationListState.MENTOR_UPCOMING.value:
+        return _upcoming(RoleType.MENTOR, now)
+    if state == ReservationListState.MENTEE_UPCOMING.value:
+        return _upcoming(RoleType.MENTEE, now)
+    if state == ReservationListState.MENTOR_PENDING.value:
+        return _pending(RoleType.MENTOR, now)
+    if state == ReservationListState.MENTEE_PENDING.value:
+        return _pending(RoleType.MENTEE, now)
+    if state == ReservationListState.MENTOR_HISTORY.value:
+        return _history(RoleType.MENTOR, now)
+    if state == ReservationListState.MENTEE_HISTORY.value:
+        return _history(RoleType.MENTEE, now)
+    return None
+
+
+def _archived_condition(state: Optional[str]):
+    # archived rows all ended before the archive cutoff, so only HISTORY
+    # (and the unfiltered list) reads them; None: skip the archive
+    if state is None:
+        return true()
+    if state == ReservationListState.MENTOR_HISTORY.value:
+        return ReservationArchive.my_role == RoleType.MENTOR
+    if state == ReservationListState.MENTEE_HISTORY.value:
+        return ReservationArchive.my_role == RoleType.MENTEE
+    return None
+
+
+def _keyset_page(stmt: Select, table, condition, cursor, batch: int) -> Select:
+    # keyset pagination on (dtend, id): id breaks ties between rows with
+    # the same dtend, so no row is skipped or repeated across pages
+    if condition is not None:
+        stmt = stmt.where(condition)
+    if cursor:
+        stmt = stmt.where(tuple_(table.dtend, table.id) < tuple_(*cursor))
+    return stmt.order_by(table.dtend.desc(), table.id.desc()).limit(batch)
+
+
+def _upcoming(role: RoleType, now: int):
+    return (
+        (Reservation.my_status == BookingStatus.ACCEPT) &
+        (Reservation.status == BookingStatus.ACCEPT) &
+        (Reservation.my_role == role) &
+        (Reservation.dtend >= now)
+    )
+
+
+def _pending(role: RoleType, now: int):
+    # Either side rejecting ends the reservation, so PENDING must exclude
+    # rows where my_status or status is REJECT — otherwise a self-cancel
+    # before the counterparty responds keeps the row in PENDING because
+    # the other side's status is still PENDING (mirrors HISTORY filter).
+    return (
+        (Reservation.my_status != BookingStatus.REJECT) &
+        (Reservation.status != BookingStatus.REJECT) &
+        ((Reservation.my_status == BookingStatus.PENDING) |
+         (Reservation.status == BookingStatus.PENDING)) &
+        (Reservation.my_role == role) &
+        (Reservation.dtend >= now)
+    )
+
+
+def _history(role: RoleType, now: int):
+    return (
+        (Reservation.my_role == role) &
+        ((Reservation.my_status == BookingStatus.REJECT) |
+         (Reservation.status == BookingStatus.REJECT) |
+         (Reservation.dtend < now))
+    )
+
+
+def _prepend_messages(new_messages: List[Dict]):
+    # new || messages, newest first; only the new messages are sent
+    # bound as text and cast, as in the unnest arrays; a str bound to JSONB
+    # directly would be stored as a JSON string
+    messages = func.coalesce(Reservation.messages, cast(literal('[]', Text), JSONB))
+    prepended = cast(literal(_json_of(new_messages), Text), JSONB).op('||', return_type=JSONB)(messages)
+    if RESERVATION_MESSAGES_MAX <= 0:
+        return prepended
+    # lax jsonpath: the range is clipped to the array, keeps the newest N
+    return func.jsonb_path_query_array(
+        prepended, cast(f'$[0 to {RESERVATION_MESSAGES_MAX - 1}]', JSONPATH))
+
+
+# compact delta for the change feed, RETURNING-ed by the writes in save_all;
+# pg NOTIFY payloads are capped at 8000 bytes
+_CHANGE_COLUMNS = (
+    Reservation.id,
+    Reservation.my_user_id,
+    Reservation.my_status,
+    Reservation.my_role,
+    Reservation.user_id,
+    Reservation.status,
+    Reservation.schedule_id,
+    Reservation.dtstart,
+    Reservation.dtend,
+)
+
+
+def _notify_changes_cte(written: List):
+    # pg_notify of the rows written by the update/insert CTEs (a JSON list of
+    # _CHANGE_COLUMNS objects); sent on commit, never for a rolled back write
+    changed = union_all(*[
+        select(*[cte.c[c.name] for c in _CHANGE_COLUMNS]) for cte in written
+    ]).cte('changed') if len(written) > 1 else written[0]
+    payload = func.json_agg(func.json_build_object(
+        *[arg for c in _CHANGE_COLUMNS for arg in (literal(c.name), changed.c[c.name])]
+    ))
+    return select(
+        func.pg_notify(
+            RESERVATION_CHANGE_CHANNEL,
+            func.coalesce(cast(payload, Text), '[]'),
+        ).label('notified')
+    ).select_from(changed).cte('notified')
+
+
+def _str_of(value) -> Optional[str]:
+    # str enums (BookingStatus, RoleType) bind as their plain value inside arrays
+    return getattr(value, 'value', value)
+
+
+def _json_of(value) -> str:
+    # jsonb columns go through text[] and are cast back; None stays JSON null,
+    # the same as binding None to the JSONB column directly
+    return json.dumps(value)
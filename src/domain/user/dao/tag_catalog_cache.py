@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import TAG_CATALOG_TTL
+from src.domain.user.dao.tag_repository import TagRepository
+from src.domain.user.model.tag_model import TagVO
+from src.infra.cache.local_cache import LocalCache
+from src.infra.databse import SessionLocal
+from src.infra.template.cache import ICache
+from src.infra.util.time_util import current_seconds
+
+log = logging.getLogger(__name__)
+
+TAG_CATALOG_CACHE_KEY = 'tag_catalog:snapshot'
+
+# Max rendered bodies kept per snapshot; keys include the user-supplied
+# language, so this must stay bounded.
+RENDERED_MAX_ENTRIES = 32
+
+
+class TagCatalogSnapshot:
+    """In-memory copy of the whole tags table, indexed for TagService.
+
+    The indexed rows are never mutated after construction; a reload builds a
+    new snapshot and swaps it in, so readers holding the old one stay
+    consistent. Rendered response bodies are memoized per snapshot and go
+    away with it.
+    """
+
+    def __init__(self, tags: List[TagVO], loaded_at: int):
+        self.tags: List[TagVO] = tags
+        self.loaded_at: int = loaded_at
+        self.version: str = _version_of(tags)
+
+        # Rows arrive ordered by id, so setdefault keeps the lowest id per
+        # key — the same "first by id wins" rule as TagRepository.find_tag.
+        self.__by_key: Dict[Tuple[str, str, str], TagVO] = {}
+        self.__leaves_by_subject_group: Dict[Tuple[str, str], List[TagVO]] = {}
+        self.__by_kind: Dict[Tuple[str, str], List[TagVO]] = {}
+        for tag in tags:
+            self.__by_key.setdefault((tag.kind, tag.subject_group, tag.language), tag)
+            if tag.parent_subject_group is not None:
+                self.__leaves_by_subject_group \
+                    .setdefault((tag.subject_group, tag.language), []).append(tag)
+            self.__by_kind.setdefault((tag.kind, tag.language), []).append(tag)
+
+        # Catalog order: groups first, then leaves by
+        # (parent_subject_group, subject_group).
+        for rows in self.__by_kind.values():
+            rows.sort(key=lambda t: (
+                t.parent_subject_group is not None,
+                t.parent_subject_group or '',
+                t.subject_group or '',
+            ))
+
+        self.__rendered: Dict[Hashable, Tuple[bytes, str]] = {}
+
+    def rendered(
+        self, key: Hashable, render: Callable[[], bytes],
+    ) -> Tuple[bytes, str]:
+        """Return (body, etag) for key, rendering at most once per snapshot."""
+        hit = self.__rendered.get(key)
+        if hit is not None:
+            return hit
+        body = render()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        if len(self.__rendered) >= RENDERED_MAX_ENTRIES:
+            # drop the oldest entry (dicts keep insertion order)
+            self.__rendered.pop(next(iter(self.__rendered)))
+        self.__rendered[key] = (body, etag)
+        return body, etag
+
+    def find_tag(self, kind: str, subject_group: str, language: str) -> Optional[TagVO]:
+        return self.__by_key.get((kind, subject_group, language))
+
+    def find_tags(
+        self, keys: Iterable[Tuple[str, str]], language: str,
+    ) -> Dict[Tuple[str, str], TagVO]:
+        # Bulk form of find_tag keyed by (kind, subject_group); misses are
+        # simply absent from the result.
+        found: Dict[Tuple[str, str], TagVO] = {}
+        for kind, sg in keys:
+            tag = self.__by_key.get((kind, sg, language))
+            if tag is not None:
+                found[(kind, sg)] = tag
+        return found
+
+    def find_leaves(self, subject_groups: List[str], language: str) -> List[TagVO]:
+        leaves: List[TagVO] = []
+        for sg in set(subject_groups):
+            leaves.extend(self.__leaves_by_subject_group.get((sg, language), []))
+        leaves.sort(key=lambda t: t.id)
+        return leaves
+
+    def list_catalog(self, kind: str, language: str) -> List[TagVO]:
+        return list(self.__by_kind.get((kind, language), []))
+
+    def list_by_kind(self, kind: str, language: Optional[str] = None) -> List[TagVO]:
+        return [
+            tag for tag in self.tags
+            if tag.kind == kind and (language is None or tag.language == language)
+        ]
+
+
+class TagCatalogCache:
+    """Process-wide holder of the current TagCatalogSnapshot.
+
+    The snapshot lives in its own one-entry LocalCache under
+    TAG_CATALOG_CACHE_KEY, so traffic on the shared LRU can't evict it, and is
+    read through get_or_load: the first caller loads it, concurrent callers
+    wait on that same load, and after TAG_CATALOG_TTL the old snapshot keeps
+    being served for another TTL while one background reload runs.
+    invalidate() drops it explicitly after a reseed
+    (DELETE /internal/tags/catalog).
+
+    Loads use their own session, since a background reload can outlive the
+    request that triggered it.
+    """
+
+    def __init__(
+        self,
+        tag_repository: TagRepository,
+        cache: ICache,
+        session_factory: Callable[[], AsyncSession],
+        ttl: int = TAG_CATALOG_TTL,
+    ):
+        self.__tag_repository: TagRepository = tag_repository
+        self.__cache: ICache = cache
+        self.__session_factory = session_factory
+        self.__ttl: int = ttl
+
+    async def get(self) -> TagCatalogSnapshot:
+        return await self.__cache.get_or_load(
+            TAG_CATALOG_CACHE_KEY, self.__load, ex=self.__ttl, stale_ttl=self.__ttl,
+        )
+
+    async def invalidate(self) -> None:
+        await self.__cache.delete(TAG_CATALOG_CACHE_KEY)
+
+    async def __load(self) -> TagCatalogSnapshot:
+        async with self.__session_factory() as db:
+            rows = await self.__tag_repository.list_all(db)
+        snapshot = TagCatalogSnapshot(
+            [TagVO.model_validate(row) for row in rows],
+            loaded_at=current_seconds(),
+        )
+        log.info('tag catalog loaded: %s rows, version %s',
+                 len(snapshot.tags), snapshot.version)
+        return snapshot
+
+
+def _version_of(tags: List[TagVO]) -> str:
+    # Content hash, so reloading an unchanged table keeps the same version.
+    digest = hashlib.sha1()
+    for tag in tags:
+        digest.update(json.dumps(tag.model_dump(), sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+_tag_catalog_cache = TagCatalogCache(TagRepository(), LocalCache(max_entries=1), SessionLocal)
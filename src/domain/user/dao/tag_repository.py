@@ -3,12 +3,17 @@ from typing import List, Optional, Type
 from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.constant import TagKind
 from src.infra.db.orm.init.user_init import Tag
 from src.infra.util.convert_util import get_all_template, get_first_template
 
 
 class TagRepository:
+    async def list_all(self, db: AsyncSession) -> List[Type[Tag]]:
+        # Whole-table read backing the in-process TagCatalogSnapshot. Ordered
+        # by id so "first by id wins" lookups match find_tag.
+        stmt: Select = select(Tag).order_by(Tag.id)
+        return await get_all_template(db, stmt)
+
     async def get_tag_by_id(
         self, db: AsyncSession, tag_id: int
     ) -> Optional[Type[Tag]]:
@@ -23,32 +28,6 @@ class TagRepository:
         stmt: Select = select(Tag).filter(Tag.id.in_(ids))
         return await get_all_template(db, stmt)
 
-    async def get_tags_by_kind(
-        self,
-        db: AsyncSession,
-        kind: TagKind,
-        language: Optional[str] = None,
-    ) -> List[Type[Tag]]:
-        stmt: Select = select(Tag).filter(Tag.kind == kind.value)
-        if language is not None:
-            stmt = stmt.filter(Tag.language == language)
-        return await get_all_template(db, stmt)
-
-    async def list_catalog(
-        self,
-        db: AsyncSession,
-        kind: TagKind,
-        language: str,
-    ) -> List[Type[Tag]]:
-        # Returns both group and leaf rows; service layer nests them.
-        stmt: Select = (
-            select(Tag)
-            .filter(Tag.kind == kind.value)
-            .filter(Tag.language == language)
-            .order_by(Tag.parent_subject_group.nullsfirst(), Tag.subject_group)
-        )
-        return await get_all_template(db, stmt)
-
     async def find_tag(
         self,
         db: AsyncSession,
@@ -67,24 +46,3 @@ class TagRepository:
             .limit(1)
         )
         return await get_first_template(db, stmt)
-
-    async def find_leaves_by_subject_groups(
-        self,
-        db: AsyncSession,
-        subject_groups: List[str],
-        language: str,
-    ) -> List[Type[Tag]]:
-        # Bulk lookup for hydrating profile.want_tags/have_tags arrays at GET
-        # time. parent_subject_group IS NOT NULL is the leaf marker — group
-        # rows are catalog scaffolding and never appear in user arrays under
-        # the strict-validation invariant.
-        if not subject_groups:
-            return []
-        stmt: Select = (
-            select(Tag)
-            .filter(Tag.subject_group.in_(subject_groups))
-            .filter(Tag.language == language)
-            .filter(Tag.parent_subject_group.is_not(None))
-            .order_by(Tag.id)
-        )
-        return await get_all_template(db, stmt)
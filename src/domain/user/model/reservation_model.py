@@ -1,3 +1,4 @@
+import base64
 import logging
 
 from fastapi.encoders import jsonable_encoder
@@ -14,12 +15,43 @@ from src.infra.db.orm.init.user_init import (
 log = logging.getLogger(__name__)
 
 
+class ReservationSummaryQueryDTO(BaseModel):
+    # first page size of every state
+    batch: int = Field(..., example=BATCH, ge=1, le=BATCH)
+
+
 class ReservationQueryDTO(BaseModel):
     state: str = Field(None, example=ReservationListState.MENTOR_UPCOMING.value,
                        pattern=f'^({ReservationListState.MENTOR_UPCOMING.value}|{ReservationListState.MENTEE_UPCOMING.value}|{ReservationListState.MENTOR_PENDING.value}|{ReservationListState.MENTEE_PENDING.value}|{ReservationListState.MENTOR_HISTORY.value}|{ReservationListState.MENTEE_HISTORY.value})$')
     batch: int = Field(..., example=BATCH, ge=1)
+    # opaque keyset cursor from the previous page's next_cursor
+    next_cursor: Optional[str] = Field(None, example='MTczNTM5ODAwMDo0Mg')
+    # deprecated: dtend-only cursor, rows sharing a dtend may repeat; use next_cursor
     next_dtend: Optional[int] = Field(None, example=1735398000)
 
+    def cursor(self) -> Optional[Tuple[int, int]]:
+        # (dtend, id) of the last row already returned; pages go by
+        # (dtend, id) descending. Legacy next_dtend resumes at that dtend.
+        if self.next_cursor:
+            return decode_reservation_cursor(self.next_cursor)
+        if self.next_dtend:
+            return (self.next_dtend + 1, 0)
+        return None
+
+
+def encode_reservation_cursor(dtend: int, id: int) -> str:
+    raw = f'{dtend}:{id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_reservation_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        dtend, id = raw.split(':')
+        return int(dtend), int(id)
+    except Exception:
+        raise ClientException(msg='invalid cursor')
+
 
 class UpdateReservationDTO(BaseModel):
     my_user_id: int = 0
@@ -33,6 +65,12 @@ class UpdateReservationDTO(BaseModel):
     dtend: int = 0      # timestamp
     messages: Optional[List[Dict[str, Any]]] = []
 
+    def new_messages(self) -> List[Dict[str, Any]]:
+        # a status update carries at most one new message, at messages[0]
+        if len(self.messages or []) and isinstance(self.messages[0], Dict):
+            return [self.messages[0]]
+        return []
+
     def participant_query(self) -> Dict:
         return {
             'my_user_id': self.user_id,
@@ -249,10 +287,11 @@ class ReservationInfoVO(BaseModel):
                 user_id=reservation.user_id,
                 role=participant_role.value,
                 status=reservation.status,
-                name=reservation.name,
-                avatar=reservation.avatar,
-                job_title=reservation.job_title,
-                years_of_experience=reservation.years_of_experience,
+                # None when the row comes without the profiles join
+                name=getattr(reservation, 'name', None),
+                avatar=getattr(reservation, 'avatar', None),
+                job_title=getattr(reservation, 'job_title', None),
+                years_of_experience=getattr(reservation, 'years_of_experience', None),
             ),
             schedule_id=reservation.schedule_id,
             dtstart=reservation.dtstart,
@@ -262,6 +301,58 @@ class ReservationInfoVO(BaseModel):
         )
 
 
+    def with_participant_profile(self, profile: Optional[RUserInfoVO]) -> 'ReservationInfoVO':
+        # fills the fields the profiles join would have, from a profile read elsewhere
+        if profile:
+            self.participant.name = profile.name
+            self.participant.avatar = profile.avatar
+            self.participant.job_title = profile.job_title
+            self.participant.years_of_experience = profile.years_of_experience
+        return self
+
+
 class ReservationInfoListVO(BaseModel):
     reservations: List[ReservationInfoVO] = []
+    # None on the last page
+    next_cursor: Optional[str] = None
+    # deprecated, kept for older clients; use next_cursor
     next_dtend: Optional[int] = 0
+
+    @staticmethod
+    def page(reservations: List[ReservationInfoVO], batch: int) -> 'ReservationInfoListVO':
+        # reservations is fetched with limit batch + 1; the extra row only
+        # tells whether another page exists
+        if len(reservations) <= batch:
+            return ReservationInfoListVO(reservations=reservations)
+        last = reservations[batch - 1]
+        return ReservationInfoListVO(
+            reservations=reservations[:batch],
+            next_cursor=encode_reservation_cursor(last.dtend, last.id),
+            # legacy clients resume from dtend <= next_dtend
+            next_dtend=reservations[batch].dtend,
+        )
+
+
+class ReservationStateSummaryVO(ReservationInfoListVO):
+    # number of reservations in this state, not just on the first page
+    total: int = 0
+
+
+class ReservationSummaryVO(BaseModel):
+    # keyed by ReservationListState; next_cursor continues with
+    # GET /{user_id}/reservations?state=...
+    states: Dict[str, ReservationStateSummaryVO] = {}
+
+
+class ActivityJobVO(BaseModel):
+    id: int
+    mentor_reservation_id: int
+    mentee_reservation_id: int
+    target_status: ActivityStatus
+    # SCHEDULED: start_time, end_time, user_ids for the calendar event
+    payload: Dict[str, Any] = {}
+    revision: int
+    attempts: int
+
+    class Config:
+        from_attributes = True
@@ -5,7 +5,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.conf import AUTH_SERVICE_URL
 from src.config.constant import ActivityStatus, RoleType
+from src.config.exception import NotFoundException
 from src.domain.user.dao.activity_repository import ActivityRepository
+from src.domain.user.dao.activity_job_repository import ActivityJobRepository
+from src.domain.user.model.reservation_model import ActivityJobVO
 from src.infra.template.service_api import IServiceApi
 from src.infra.db.orm.init.user_init import Activity
 
@@ -18,12 +21,18 @@ class ActivityService:
     def __init__(
         self,  
         activity_repository: ActivityRepository, 
+        activity_job_repository: ActivityJobRepository,
         service_api: IServiceApi,
     ):
         self.activity_repo = activity_repository
+        self.activity_job_repo = activity_job_repository
         self.service_api = service_api
 
-    async def create_google_event_and_schedule_activity(
+    '''
+    enqueue_*: 只寫入 activity_jobs (不 commit)，隨預約更新一起提交；
+    Google Calendar 的呼叫由 ActivitySync 在 request 之外執行 (apply_job)
+    '''
+    async def enqueue_schedule(
         self,
         db: AsyncSession,
         mentor_reservation_id: int,
@@ -33,79 +42,104 @@ class ActivityService:
         user_ids: List[int],
         summary: str = 'Appointment with X-Talent',
         description: str = '',
-    ) -> Optional[Activity]:
-        try:
-            exists = await self.activity_repo.find_by_reservation_id_and_role(
-                db,
-                mentor_reservation_id,
-                RoleType.MENTOR,
-            )
-            if exists:
-                return exists
-
-            payload = {
+    ) -> None:
+        await self.activity_job_repo.enqueue(
+            db,
+            mentor_reservation_id=mentor_reservation_id,
+            mentee_reservation_id=mentee_reservation_id,
+            target_status=ActivityStatus.SCHEDULED,
+            payload={
                 'summary': summary,
                 'description': description,
                 'start_time': str(start_time),
                 'end_time': str(end_time),
                 'user_ids': user_ids,
-            }
-            url = f'{AUTH_SERVICE_URL}{CALENDAR_EVENTS_PATH}'
-            data = await self.service_api.simple_post(url=url, json=payload)
-            if not data or not data.get('event_id'):
-                log.error('create google event fail: invalid response data=%s', data)
-                return None
+            },
+        )
+
+    async def enqueue_cancel(
+        self,
+        db: AsyncSession,
+        mentor_reservation_id: int,
+        mentee_reservation_id: int,
+    ) -> None:
+        await self.activity_job_repo.enqueue(
+            db,
+            mentor_reservation_id=mentor_reservation_id,
+            mentee_reservation_id=mentee_reservation_id,
+            target_status=ActivityStatus.CANCELLED,
+        )
 
-            event_id = data.get('event_id')
-            log.info(
-                'create google event success: event_id=%s, mentor_reservation_id=%s, mentee_reservation_id=%s',
-                event_id,
-                mentor_reservation_id,
-                mentee_reservation_id,
-            )
-            await self.activity_repo.create_scheduled(
-                db,
-                event_id=event_id,
-                mentor_reservation_id=mentor_reservation_id,
-                mentee_reservation_id=mentee_reservation_id,
-            )
-            return await self.activity_repo.find_by_reservation_id_and_role(
-                db,
-                mentor_reservation_id,
-                RoleType.MENTOR,
-            )
-        except Exception as e:
-            log.error('create google event and schedule activity fail: %s', str(e))
-            return None
+    async def apply_job(self, db: AsyncSession, job: ActivityJobVO) -> None:
+        # raises on failure so the worker can retry; safe to run more than once
+        if job.target_status == ActivityStatus.SCHEDULED:
+            await self.__create_google_event_and_schedule_activity(db, job)
+        else:
+            await self.__cancel_google_event_and_cancel_activity(db, job)
 
-    async def cancel_google_event_and_cancel_activity(
+    async def __create_google_event_and_schedule_activity(
         self,
         db: AsyncSession,
-        reservation_id: int,
-        role: RoleType,
+        job: ActivityJobVO,
+    ) -> Optional[Activity]:
+        exists = await self.activity_repo.find_by_reservation_id_and_role(
+            db,
+            job.mentor_reservation_id,
+            RoleType.MENTOR,
+        )
+        if exists:
+            return exists
+
+        url = f'{AUTH_SERVICE_URL}{CALENDAR_EVENTS_PATH}'
+        data = await self.service_api.simple_post(url=url, json=job.payload)
+        if not data or not data.get('event_id'):
+            raise ValueError(f'create google event fail: invalid response data={data}')
+
+        event_id = data.get('event_id')
+        log.info(
+            'create google event success: event_id=%s, mentor_reservation_id=%s, mentee_reservation_id=%s',
+            event_id,
+            job.mentor_reservation_id,
+            job.mentee_reservation_id,
+        )
+        await self.activity_repo.create_scheduled(
+            db,
+            event_id=event_id,
+            mentor_reservation_id=job.mentor_reservation_id,
+            mentee_reservation_id=job.mentee_reservation_id,
+        )
+        return await self.activity_repo.find_by_reservation_id_and_role(
+            db,
+            job.mentor_reservation_id,
+            RoleType.MENTOR,
+        )
+
+    async def __cancel_google_event_and_cancel_activity(
+        self,
+        db: AsyncSession,
+        job: ActivityJobVO,
     ) -> bool:
-        try:
-            activity = await self.activity_repo.find_by_reservation_id_and_role(
-                db,
-                reservation_id,
-                role,
-            )
-            if not activity:
-                return False
+        activity = await self.activity_repo.find_by_reservation_id_and_role(
+            db,
+            job.mentor_reservation_id,
+            RoleType.MENTOR,
+        )
+        if not activity:
+            return False
 
-            if activity.status != ActivityStatus.SCHEDULED:
-                return False
+        if activity.status != ActivityStatus.SCHEDULED:
+            return False
 
-            url = f'{AUTH_SERVICE_URL}{CALENDAR_EVENTS_PATH}/{activity.id}'
+        url = f'{AUTH_SERVICE_URL}{CALENDAR_EVENTS_PATH}/{activity.id}'
+        try:
             await self.service_api.simple_delete(url=url)
-            log.info(
-                'cancel google event success: event_id=%s, reservation_id=%s, role=%s',
-                activity.id,
-                reservation_id,
-                role,
-            )
-            await self.activity_repo.update_to_cancelled(db, event_id=activity.id)
-            return True
-        except Exception as e:
-            log.error('cancel google event and cancel activity fail: %s', str(e))
-            return False
+        except NotFoundException:
+            # 已被刪除 (例如上一次 retry 已成功)，視同取消完成
+            log.info('google event already gone: event_id=%s', activity.id)
+        log.info(
+            'cancel google event success: event_id=%s, mentor_reservation_id=%s',
+            activity.id,
+            job.mentor_reservation_id,
+        )
+        await self.activity_repo.update_to_cancelled(db, event_id=activity.id)
+        return True
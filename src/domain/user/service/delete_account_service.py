@@ -1,13 +1,19 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.domain.user.dao.reservation_repository import ReservationRepository
+from src.infra.shard_router import ShardRouter
 
 
 class DeleteAccountService:
-    def __init__(self, reservation_repository: ReservationRepository):
+    def __init__(self, reservation_repository: ReservationRepository, shard_router: ShardRouter):
         self.__reservation_repo = reservation_repository
+        self.__shard_router = shard_router
 
     async def has_active_or_future_reservations(
         self, db: AsyncSession, user_id: int
     ) -> bool:
-        return await self.__reservation_repo.has_active_or_future_reservations(db, user_id)
+        if not self.__shard_router.sharded:
+            return await self.__reservation_repo.has_active_or_future_reservations(db, user_id)
+        # the user's own reservations live on their shard
+        async with self.__shard_router.session(user_id) as shard_db:
+            return await self.__reservation_repo.has_active_or_future_reservations(shard_db, user_id)
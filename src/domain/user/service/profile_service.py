@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -42,18 +42,21 @@ class ProfileService:
                 db, dto, language=language, want_tags=want_tags,
             )
         except Exception as e:
-            log.error(f"get_by_user_id error: %s", str(e))
+            log.error("get_by_user_id error: %s", str(e))
             err_msg = getattr(e, "msg", "get profile response failed")
             raise_http_exception(e, msg=err_msg)
 
-    async def upsert_profile(self, db: AsyncSession, dto: ProfileDTO) -> ProfileVO:
+    async def upsert_profile(self, db: AsyncSession, dto: ProfileDTO) -> Tuple[ProfileVO, bool]:
+        # Returns (vo, changed); changed is False for an identical resubmit,
+        # so callers can skip cache invalidation and search notifications.
         try:
-            res, want_tags, _ = await self.__profile_repository.upsert_profile(
+            res, want_tags, _, changed = await self.__profile_repository.upsert_profile(
                 db, dto
             )
-            return await self.convert_to_profile_vo(db, res, want_tags=want_tags)
+            vo = await self.convert_to_profile_vo(db, res, want_tags=want_tags)
+            return vo, changed
         except Exception as e:
-            log.error(f"upsert_profile error: %s", str(e))
+            log.error("upsert_profile error: %s", str(e))
             err_msg = getattr(e, "msg", "upsert profile response failed")
             raise_http_exception(e, msg=err_msg)
 
@@ -79,40 +82,31 @@ class ProfileService:
             return res
 
         except Exception as e:
-            log.error(f"convert_to_profile_vo error: %s", str(e))
+            log.error("convert_to_profile_vo error: %s", str(e))
             err_msg = getattr(e, "msg", "profile response failed")
             raise_http_exception(e, msg=err_msg)
 
-    async def convert_to_mentor_profile_vo(
-        self,
-        db: AsyncSession,
+    @staticmethod
+    def build_mentor_profile_vo(
         dto: MentorProfileDTO,
-        language: Optional[str] = None,
+        language: str,
         *,
         want_tags: Optional[List[str]] = None,
+        industry: Optional[TagVO] = None,
     ) -> MentorProfileVO:
-        if dto is None:
-            raise NotFoundException(msg="no data found")
-        if language is None:
-            language = dto.language
-
-        try:
-            # Experiences ride on the dto (sourced from profiles.experiences
-            # JSONB[]) — no separate fetch.
-            experiences: List[ExperienceVO] = list(dto.experiences or [])
+        # Pure assembly from an already-resolved industry tag; callers
+        # hydrate all catalog lookups in one go.
+        # Experiences ride on the dto (sourced from profiles.experiences
+        # JSONB[]) — no separate fetch.
+        experiences: List[ExperienceVO] = list(dto.experiences or [])
 
-            res: MentorProfileVO = MentorProfileVO.of(dto)
-            res.industry = await self.__resolve_industry(db, dto.industry, language)
-            res.experiences = experiences
-            res.onboarding = ExperienceService.is_onboarded(want_tags)
-            res.is_mentor = dto.is_mentor
-            res.language = language
-            return res
-
-        except Exception as e:
-            log.error(f"convert_to_mentor_profile_vo error: %s", str(e))
-            err_msg = getattr(e, "msg", "mentor profile response failed")
-            raise_http_exception(e, msg=err_msg)
+        res: MentorProfileVO = MentorProfileVO.of(dto)
+        res.industry = industry
+        res.experiences = experiences
+        res.onboarding = ExperienceService.is_onboarded(want_tags)
+        res.is_mentor = dto.is_mentor
+        res.language = language
+        return res
 
     async def __resolve_industry(
         self,
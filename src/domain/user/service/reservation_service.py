@@ -1,11 +1,23 @@
 from fastapi.encoders import jsonable_encoder
 from typing import List, Tuple, Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.user.model.reservation_model import *
-from src.domain.user.dao.reservation_repository import ReservationRepository
+from src.domain.user.dao.reservation_repository import (
+    ReservationRepository,
+    RESERVATION_PERIOD_CONSTRAINT,
+    RESERVATION_ACTIVE_UNIQUE_INDEX,
+)
 from src.domain.user.service.activity_service import ActivityService
-from src.config.conf import BATCH
+from src.config.conf import BATCH, RESERVATION_ISOLAION_LEVEL, RESERVATION_MESSAGES_MAX
 from src.config.exception import *
+from src.infra.util.db_error_util import (
+    is_retryable,
+    is_violation,
+    EXCLUSION_VIOLATION,
+    UNIQUE_VIOLATION,
+)
+from src.infra.util.transaction_util import async_retry_transactional
 import logging
 
 log = logging.getLogger(__name__)
@@ -24,46 +36,45 @@ class ReservationService:
                                user_id: int,
                                query_dto: ReservationQueryDTO) -> Optional[ReservationInfoListVO]:
         try:
-            res: ReservationInfoListVO = ReservationInfoListVO()
+            batch = query_dto.batch
             query_dto.batch += 1
             reservations: List[ReservationInfoVO] = \
                 await self.reservation_repo.get_user_reservations(db,
                                                                   user_id,
                                                                   query_dto)
-            if len(reservations) < query_dto.batch:
-                res.reservations = reservations
-            else:
-                res.reservations = reservations[:-1]
-                res.next_dtend = reservations[-1].dtend
-            return res
+            return ReservationInfoListVO.page(reservations, batch)
         except Exception as e:
             log.error('get reservations failed: %s', str(e))
             raise_http_exception(e=e, msg='get reservations failed')
 
+    async def get_reservation_summary(self, db: AsyncSession,
+                                      user_id: int,
+                                      query_dto: ReservationSummaryQueryDTO) -> Optional[ReservationSummaryVO]:
+        try:
+            return await self.reservation_repo.get_user_reservation_summary(db,
+                                                                            user_id,
+                                                                            query_dto.batch)
+        except Exception as e:
+            log.error('get reservation summary failed: %s', str(e))
+            raise_http_exception(e=e, msg='get reservation summary failed')
+
     '''
     - reservation_dto 包含兩資訊: sender, participant
     - 對 sender 來說 accept 可能是新建(沒id) 也可以是更新狀態(有id)
-    - 若 sender 為新建(沒id)，則檢查時間衝突；若 sender 為更新狀態(有id)，則不需檢查時間衝突
     - 對 participant 來說 accept 可能是新建(沒id) 也可以是更新狀態(有id)
-    - 若 participant 為新建(沒id)，不需檢查時間衝突，因為預設狀態為 'PENDING'；
-      若 participant 為更新狀態(有id)，也不需檢查時間衝突
-    1. sender 沒id? 檢查時間衝突，若有衝突，則拋出異常
-    2. 新建/更新 sender 狀態
-    3. 新建/更新 participant 狀態
+    - 時間衝突與重複預約由 DB 檢查 (save_reservations):
+        - excl_reservation_accepted_user_period: 同一 user 的 ACCEPT 預約時段不可重疊
+        - uidx_reservation_active_...: 同一時段/對象不可重複預約
+      participant 預設狀態為 'PENDING'，不參與時間衝突檢查
+    1. 新建/更新 sender 狀態
+    2. 新建/更新 participant 狀態
     '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create(self,
                      db: AsyncSession,
                      reservation_dto: ReservationDTO
                      ) -> Optional[ReservationVO]:
         try:
-            # NOTE: check date conflict with sender's reservations;
-            # checking participant's reservations is not necessary,
-            # the default status is 'PENDING'
-            await self.check_my_accepted_bookings(db, reservation_dto)
-
-            # 检查是否已存在相同的预订
-            await self.check_duplicate_reservation(db, reservation_dto)
-
             # sender 這次的新預約
             sender: Reservation = \
                 reservation_dto.sender_model(BookingStatus.ACCEPT)
@@ -74,7 +85,7 @@ class ReservationService:
                 reservation_dto.participant_model(BookingStatus.ACCEPT)
             # participant.id = None
 
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, reservation_dto, [
                 sender,
                 participant,
             ])
@@ -82,6 +93,8 @@ class ReservationService:
             return ReservationVO.from_model(sender)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('create reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'create reservation failed')
             raise_http_exception(e=e, msg=err_msg)
@@ -96,19 +109,14 @@ class ReservationService:
         - 先透過 previous_reserve 找到對應的 sender 上一次的預約
         - 再透過 sender 上一次的預約找到對應的 participant 上一次的預約
     '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create_new_and_reject_previous(self,
                                              db: AsyncSession,
                                              reservation_dto: ReservationDTO
                                              ) -> Optional[ReservationVO]:
         try:
-            # NOTE: check date conflict with sender's reservations;
-            # checking participant's reservations is not necessary,
-            # the default status is 'PENDING'
-            await self.check_my_accepted_bookings(db, reservation_dto)
-
-            # 检查是否已存在相同的预订
-            await self.check_duplicate_reservation(db, reservation_dto)
-
+            # 時間衝突與重複預約由 DB 檢查 (見 create)；上一次預約在同一個
+            # statement 內被設為 REJECT，新時段可與上一次預約重疊
             # sender 這次的新預約
             sender: Reservation = \
                 reservation_dto.sender_model(BookingStatus.ACCEPT)
@@ -138,25 +146,27 @@ class ReservationService:
                 'reserve_id': prev_participant.id,
             }
 
-            await self.reservation_repo.save_all(db, [
+            # 取消上一次預約的 Google event: 只寫入 job，和 save_all 一起 commit
+            mentor_reservation_id, mentee_reservation_id = \
+                self.get_activity_pair_ids(prev_sender, prev_participant)
+            await self.activity_service.enqueue_cancel(
+                db,
+                mentor_reservation_id=mentor_reservation_id,
+                mentee_reservation_id=mentee_reservation_id,
+            )
+
+            await self.save_reservations(db, reservation_dto, [
                 sender,
                 prev_sender,
                 participant,
                 prev_participant,
             ])
 
-            try:
-                await self.activity_service.cancel_google_event_and_cancel_activity(
-                    db,
-                    reservation_id=PREV_SENDER_VO.id,
-                    role=PREV_SENDER_VO.my_role,
-                )
-            except Exception as side_effect_error:
-                log.error('cancel google event for previous reservation fail: %s', str(side_effect_error))
-
             return ReservationVO.from_model(sender)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('create_and_cancel reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'create_and_cancel reservation failed')
             raise_http_exception(e=e, msg=err_msg)
@@ -172,17 +182,15 @@ class ReservationService:
     '''
 
     # FIXME: function 改為 update_reservation_status, 有 id
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def update_reservation_status(self,
                                         db: AsyncSession,
                                         reserve_id: int,
                                         update_dto: UpdateReservationDTO
                                         ) -> Optional[ReservationVO]:
         try:
-            # 當 ACCEPT 時，檢查時間衝突
+            # 當 ACCEPT 時的時間衝突由 DB 檢查 (save_reservations)
             MY_STATUS = update_dto.my_status
-            if MY_STATUS == BookingStatus.ACCEPT:
-                await self.check_my_accepted_bookings(db, update_dto)
-
             SENDER_VO: ReservationVO = \
                 await self.get_sender_vo_by_id(db, reserve_id, update_dto)
             participant_vo: ReservationVO = \
@@ -193,42 +201,41 @@ class ReservationService:
             participant: Reservation = \
                 SENDER_VO.participant_model(MY_STATUS, participant_vo.id)
 
-            # SENDER_VO 已經取得歷史訊息，可以直接 insert 新訊息，更新狀態
+            # Google event 的建立/取消只寫入 activity_jobs，和 save_all 一起 commit；
+            # 實際呼叫由 ActivitySync 在 request 之外執行
+            mentor_reservation_id, mentee_reservation_id = \
+                self.get_activity_pair_ids(sender, participant)
+            if self.needs_google_event(sender):
+                # 雙方皆 ACCEPT 時建立 Google event
+                await self.activity_service.enqueue_schedule(
+                    db,
+                    mentor_reservation_id=mentor_reservation_id,
+                    mentee_reservation_id=mentee_reservation_id,
+                    start_time=sender.dtstart,
+                    end_time=sender.dtend,
+                    user_ids=[sender.my_user_id, sender.user_id],
+                )
+            elif MY_STATUS == BookingStatus.REJECT:
+                # 本次狀態為 REJECT 時，若活動存在且為 SCHEDULED，則取消
+                await self.activity_service.enqueue_cancel(
+                    db,
+                    mentor_reservation_id=mentor_reservation_id,
+                    mentee_reservation_id=mentee_reservation_id,
+                )
+
+            # SENDER_VO 已經取得歷史訊息，新訊息 insert 後作為回傳值；
+            # DB 端只送出新訊息，由 save_all prepend 到雙方的訊息串
             self.append_new_message(update_dto, sender)
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, update_dto, [
                 sender,
                 participant,
-            ])
+            ], new_messages=update_dto.new_messages())
 
-            try:
-                # 雙方皆 ACCEPT 時建立 Google event
-                if sender.my_status == BookingStatus.ACCEPT and sender.status == BookingStatus.ACCEPT:
-                    mentor_reservation_id, mentee_reservation_id = self.get_activity_pair_ids(sender, participant)
-                    await self.activity_service.create_google_event_and_schedule_activity(
-                        db=db,
-                        mentor_reservation_id=mentor_reservation_id,
-                        mentee_reservation_id=mentee_reservation_id,
-                        start_time=sender.dtstart,
-                        end_time=sender.dtend,
-                        user_ids=[sender.my_user_id, sender.user_id],
-                    )
-            except Exception as side_effect_error:
-                log.error('create google event fail: %s', str(side_effect_error))
-
-            try:
-                # 本次狀態為 REJECT 時，若活動存在且為 SCHEDULED，則取消
-                if MY_STATUS == BookingStatus.REJECT:
-                    await self.activity_service.cancel_google_event_and_cancel_activity(
-                        db,
-                        reservation_id=reserve_id,
-                        role=SENDER_VO.my_role,
-                    )
-            except Exception as side_effect_error:
-                log.error('cancel google event fail: %s', str(side_effect_error))
-                
             return ReservationVO.from_model(sender)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('update reservation status failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'update reservation status failed')
             raise_http_exception(e=e, msg=err_msg)
@@ -237,11 +244,17 @@ class ReservationService:
                            update_dto: UpdateReservationDTO,
                            sender: Reservation,
                            ):
-        NEW_MESSAGES = update_dto.messages
+        NEW_MESSAGES = update_dto.new_messages()
         if len(NEW_MESSAGES) and \
-            isinstance(NEW_MESSAGES[0], Dict) and \
             isinstance(sender.messages, List):
-            sender.messages.insert(0, NEW_MESSAGES[0])
+            sender.messages[:0] = NEW_MESSAGES
+            if RESERVATION_MESSAGES_MAX > 0:
+                del sender.messages[RESERVATION_MESSAGES_MAX:]
+
+    @staticmethod
+    def needs_google_event(sender: Reservation) -> bool:
+        return sender.my_status == BookingStatus.ACCEPT and \
+            sender.status == BookingStatus.ACCEPT
 
     def get_activity_pair_ids(self,
                               sender: Reservation,
@@ -251,14 +264,34 @@ class ReservationService:
             return sender.id, participant.id
         return participant.id, sender.id
 
-    '''
-    Check my bookings with a status: "ACCEPT"
-    '''
-
-    async def check_my_accepted_bookings(self, db: AsyncSession, reservation_dto: ReservationDTO):
-        # Skip rows where the counterparty has already cancelled (status=REJECT)
-        # — those reservations are dead and must not block a fresh booking on
-        # the same slot. find_accepted_overlapping enforces this at the DB level.
+    async def save_reservations(self, db: AsyncSession,
+                                reservation_dto: UpdateReservationDTO,
+                                reservations: List[Reservation],
+                                new_messages: Optional[List[Dict]] = None):
+        # One statement + commit; the DB rejects overlapping accepted bookings
+        # (exclusion constraint) and duplicates (partial unique index), and the
+        # violation is turned back into the same ClientException as before.
+        try:
+            await self.reservation_repo.save_all(db, reservations, new_messages)
+        except IntegrityError as e:
+            await db.rollback()
+            if is_violation(e, EXCLUSION_VIOLATION, RESERVATION_PERIOD_CONSTRAINT):
+                await self.raise_reservation_conflict(db, reservation_dto)
+            if is_violation(e, UNIQUE_VIOLATION, RESERVATION_ACTIVE_UNIQUE_INDEX):
+                # a resubmit of an accepted booking hits the unique index
+                # first; report it as a conflict, as the old pre-checks
+                # (conflict before duplicate) did
+                await self.raise_reservation_conflict(db, reservation_dto, only_if_found=True)
+                raise ClientException(msg='Duplicate reservation already exists')
+            raise
+
+    async def raise_reservation_conflict(self, db: AsyncSession,
+                                         reservation_dto: UpdateReservationDTO,
+                                         only_if_found: bool = False):
+        # Only runs after a conflict, to report which bookings are in the way;
+        # only_if_found: return instead of raising when nothing overlaps.
+        # Rows where the counterparty has already cancelled (status=REJECT)
+        # are dead and never block a booking.
         sender_reserve_list: List[ReservationVO] = \
             await self.reservation_repo.find_accepted_overlapping(
                 db,
@@ -266,36 +299,11 @@ class ReservationService:
                 dtstart=reservation_dto.dtstart,
                 dtend=reservation_dto.dtend,
             )
-
-        if len(sender_reserve_list) > 0:
-            sender_reserve_dict = {idx+1: jsonable_encoder(r) for idx, r in enumerate(sender_reserve_list)}
-            raise ClientException(msg='reservation conflict',
-                                  data=sender_reserve_dict)
-
-        # checking participant's reservations is not necessary,
-        # the default status is 'PENDING'
-
-    async def check_duplicate_reservation(self, db: AsyncSession, reservation_dto: ReservationDTO):
-        # 检查是否已存在完全相同的预订记录
-        # 取消後 row 仍保留並標記為 REJECT，需排除掉才能讓使用者重訂同一時段
-        try:
-            existing_reservation = await self.reservation_repo.find_active_duplicate(
-                db,
-                schedule_id=reservation_dto.schedule_id,
-                dtstart=reservation_dto.dtstart,
-                dtend=reservation_dto.dtend,
-                my_user_id=reservation_dto.my_user_id,
-                user_id=reservation_dto.user_id,
-            )
-
-            if existing_reservation:
-                raise ClientException(msg='Duplicate reservation already exists')
-
-        except Exception as e:
-            if isinstance(e, ClientException):
-                raise e
-            log.error('check duplicate reservation failed: %s', str(e))
-            raise ClientException(msg='check duplicate reservation failed')
+        if only_if_found and not sender_reserve_list:
+            return
+        sender_reserve_dict = {idx+1: jsonable_encoder(r) for idx, r in enumerate(sender_reserve_list)}
+        raise ClientException(msg='reservation conflict',
+                              data=sender_reserve_dict)
 
     async def get_sender_vo_by_id(self, db: AsyncSession,
                                   reserve_id: int,
@@ -354,9 +362,5 @@ class ReservationService:
         return prev_participant_vo
 
 
-class ScaleOutReservationService:
-    pass
-
-
 class CrossRegionReservationService:
     pass
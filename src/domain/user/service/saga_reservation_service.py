@@ -1,15 +1,47 @@
+import asyncio
+import random
 from fastapi.encoders import jsonable_encoder
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.user.model.reservation_model import *
-from src.domain.user.dao.reservation_repository import ReservationRepository
-from src.config.conf import BATCH
+from src.domain.user.dao.reservation_repository import (
+    ReservationRepository,
+    RESERVATION_PERIOD_CONSTRAINT,
+    RESERVATION_ACTIVE_UNIQUE_INDEX,
+)
+from src.domain.user.service.activity_service import ActivityService
+from src.domain.user.service.reservation_service import ReservationService
+from src.config.conf import (
+    BATCH,
+    RESERVATION_ISOLAION_LEVEL,
+    RESERVATION_MESSAGES_MAX,
+    TX_RETRY_MAX_ATTEMPTS,
+    TX_RETRY_BACKOFF_BASE,
+    TX_RETRY_BACKOFF_MAX,
+)
 from src.config.exception import *
+from src.infra.shard_router import ShardRouter
+from src.infra.util.db_error_util import (
+    is_retryable,
+    is_violation,
+    EXCLUSION_VIOLATION,
+    UNIQUE_VIOLATION,
+)
+from src.infra.util.transaction_util import async_retry_transactional
 import logging
 
 log = logging.getLogger(__name__)
 
 
+'''
+SagaReservationService: 每個 step 只寫一邊 (sender 或 participant) 的 shard，各自 commit
+- sender 的 step 回傳寫入前的 VO，供 participant 的 step 與補償 (revert_sender) 使用
+- participant 的 shard 上沒有 sender 的預約，participant 的 step 由參數取得 sender 的資料
+- 時間衝突與重複預約由各 shard 的 DB 檢查 (同一 user 的預約都在同一個 shard)
+'''
+
+
 class SagaReservationService:
     def __init__(self, reservation_repository: ReservationRepository):
         self.reservation_repo = reservation_repository
@@ -17,51 +49,59 @@ class SagaReservationService:
 
     async def get_reservations(self, db: AsyncSession,
                                user_id: int,
-                               query_dto: ReservationQueryDTO) -> Optional[ReservationInfoListVO]:
+                               query_dto: ReservationQueryDTO,
+                               join_profile: bool = True) -> Optional[ReservationInfoListVO]:
         try:
-            res: ReservationInfoListVO = ReservationInfoListVO()
+            batch = query_dto.batch
             query_dto.batch += 1
             reservations: List[ReservationInfoVO] = \
                 await self.reservation_repo.get_user_reservations(db,
                                                                   user_id,
-                                                                  query_dto)
-            if len(reservations) < query_dto.batch:
-                res.reservations = reservations
-            else:
-                res.reservations = reservations[:-1]
-                res.next_dtend = reservations[-1].dtend
-            return res
+                                                                  query_dto,
+                                                                  join_profile)
+            return ReservationInfoListVO.page(reservations, batch)
         except Exception as e:
             log.error('get reservations failed: %s', str(e))
             raise_http_exception(e=e, msg='get reservations failed')
 
+    async def get_reservation_summary(self, db: AsyncSession,
+                                      user_id: int,
+                                      query_dto: ReservationSummaryQueryDTO,
+                                      join_profile: bool = True) -> Optional[ReservationSummaryVO]:
+        try:
+            return await self.reservation_repo.get_user_reservation_summary(db,
+                                                                            user_id,
+                                                                            query_dto.batch,
+                                                                            join_profile)
+        except Exception as e:
+            log.error('get reservation summary failed: %s', str(e))
+            raise_http_exception(e=e, msg='get reservation summary failed')
 
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create_sender(self,
                      db: AsyncSession,
                      reservation_dto: ReservationDTO
                      ) -> Optional[ReservationVO]:
         try:
-            # NOTE: check date conflict with sender's reservations;
-            # checking participant's reservations is not necessary,
-            # the default status is 'PENDING'
-            await self.check_my_accepted_bookings(db, reservation_dto)
-
             # sender 這次的新預約
             sender: Reservation = \
                 reservation_dto.sender_model(BookingStatus.ACCEPT)
             # sender.id = None
 
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, reservation_dto, [
                 sender,
             ])
             return ReservationVO.from_model(sender)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[sender] create_reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'sender create_sreservation failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create_participant(self,
                      db: AsyncSession,
                      reservation_dto: ReservationDTO
@@ -72,28 +112,28 @@ class SagaReservationService:
                 reservation_dto.participant_model(BookingStatus.ACCEPT)
             # participant.id = None
 
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, reservation_dto, [
                 participant,
             ])
             return ReservationVO.from_model(participant)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[participant] create_reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'participant create_reservation failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
-
+    '''
+    回傳 (sender 這次的新預約, sender 上一次的預約 [REJECT 之前])
+    '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create_sender_new_and_reject_previous(self,
                                              db: AsyncSession,
                                              reservation_dto: ReservationDTO
-                                             ) -> Optional[ReservationVO]:
+                                             ) -> Tuple[ReservationVO, ReservationVO]:
         try:
-            # NOTE: check date conflict with sender's reservations;
-            # checking participant's reservations is not necessary,
-            # the default status is 'PENDING'
-            await self.check_my_accepted_bookings(db, reservation_dto)
-
             # sender 這次的新預約
             sender: Reservation = \
                 reservation_dto.sender_model(BookingStatus.ACCEPT)
@@ -105,21 +145,28 @@ class SagaReservationService:
             prev_sender: Reservation = \
                 PREV_SENDER_VO.sender_model(BookingStatus.REJECT,
                                              PREV_SENDER_VO.id)
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, reservation_dto, [
                 sender,
                 prev_sender,
             ])
-            return ReservationVO.from_model(sender)
+            return ReservationVO.from_model(sender), PREV_SENDER_VO
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[sender] create_sender_new_and_reject_previous reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'sender create_and_cancel reservation failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
+    '''
+    PREV_SENDER_VO: create_sender_new_and_reject_previous 回傳的 sender 上一次的預約
+    '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def create_participant_new_and_reject_previous(self,
                                              db: AsyncSession,
-                                             reservation_dto: ReservationDTO
+                                             reservation_dto: ReservationDTO,
+                                             PREV_SENDER_VO: ReservationVO,
                                              ) -> Optional[ReservationVO]:
         try:
             # participant 這次的新預約
@@ -127,10 +174,6 @@ class SagaReservationService:
                 reservation_dto.participant_model(BookingStatus.ACCEPT)
             # participant.id = None
 
-            # sender 的上一次預約
-            PREV_SENDER_VO: ReservationVO = \
-                await self.get_prev_sender_vo(db, reservation_dto)
-
             # participant 的上一次預約
             prev_participant_vo: ReservationVO = \
                 await self.get_prev_participant_vo(db, PREV_SENDER_VO)
@@ -143,7 +186,7 @@ class SagaReservationService:
                 'reserve_id': prev_participant.id,
             }
 
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, reservation_dto, [
                 participant,
                 prev_participant,
             ])
@@ -151,103 +194,149 @@ class SagaReservationService:
             return ReservationVO.from_model(participant)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[participant] create_participant_new_and_reject_previous reservation failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'participant create_and_cancel reservation failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
+    '''
+    回傳 (sender 更新後, sender 更新前)
+    '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def update_sender_reservation_status(self,
                                         db: AsyncSession,
                                         reserve_id: int,
                                         update_dto: UpdateReservationDTO
-                                        ) -> Optional[ReservationVO]:
+                                        ) -> Tuple[ReservationVO, ReservationVO]:
         try:
-            # 當 ACCEPT 時，檢查時間衝突
+            # 當 ACCEPT 時的時間衝突由 DB 檢查 (save_reservations)
             MY_STATUS = update_dto.my_status
-            if MY_STATUS == BookingStatus.ACCEPT:
-                await self.check_my_accepted_bookings(db, update_dto)
-
             SENDER_VO: ReservationVO = \
                 await self.get_sender_vo_by_id(db, reserve_id, update_dto)
+            BEFORE: ReservationVO = SENDER_VO.model_copy(deep=True)
             sender: Reservation = \
                 SENDER_VO.sender_model(MY_STATUS, SENDER_VO.id)
 
-            # SENDER_VO 已經取得歷史訊息，可以直接 insert 新訊息，更新狀態
+            # SENDER_VO 已經取得歷史訊息，新訊息 insert 後作為回傳值；
+            # DB 端只送出新訊息，由 save_all prepend
             self.append_new_message(update_dto, sender)
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, update_dto, [
                 sender,
-            ])
-            return ReservationVO.from_model(sender)
+            ], new_messages=update_dto.new_messages())
+            return ReservationVO.from_model(sender), BEFORE
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[sender] updates reservation status failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'sender updates reservation status failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
+    '''
+    SENDER_VO: update_sender_reservation_status 回傳的 sender 更新前
+    '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
     async def update_participant_reservation_status(self,
                                         db: AsyncSession,
-                                        reserve_id: int,
+                                        SENDER_VO: ReservationVO,
                                         update_dto: UpdateReservationDTO
                                         ) -> Optional[ReservationVO]:
         try:
             MY_STATUS = update_dto.my_status
-            SENDER_VO: ReservationVO = \
-                await self.get_sender_vo_by_id(db, reserve_id, update_dto)
             participant_vo: ReservationVO = \
                 await self.get_participant_vo(db, update_dto)
             participant: Reservation = \
                 SENDER_VO.participant_model(MY_STATUS, participant_vo.id)
+            # 回傳 participant 自己的訊息串
+            participant.messages = list(participant_vo.messages or [])
 
-            # SENDER_VO 已經取得歷史訊息，可以直接 insert 新訊息，更新狀態
             self.append_new_message(update_dto, participant)
-            await self.reservation_repo.save_all(db, [
+            await self.save_reservations(db, update_dto, [
                 participant,
-            ])
+            ], new_messages=update_dto.new_messages())
 
             return ReservationVO.from_model(participant)
 
         except Exception as e:
+            if is_retryable(e):
+                raise   # async_retry_transactional runs it again
             log.error('[participant] updates reservation status failed: %s', str(e))
             err_msg = getattr(e, 'msg', 'participant updates reservation status failed')
             raise_http_exception(e=e, msg=err_msg)
 
 
+    '''
+    補償: participant 那邊失敗時，把 sender 的 shard 改回去
+    - created: sender 這次新建的預約 => REJECT
+    - previous: sender 寫入前的預約 => 還原 my_status/status
+    新訊息不會移除，留在 sender 的訊息串
+    '''
+    @async_retry_transactional(isolation_level=RESERVATION_ISOLAION_LEVEL)
+    async def revert_sender(self,
+                            db: AsyncSession,
+                            created: Optional[ReservationVO] = None,
+                            previous: Optional[ReservationVO] = None,
+                            ):
+        reservations: List[Reservation] = []
+        if created and created.id:
+            reservations.append(created.sender_model(BookingStatus.REJECT, created.id))
+        if previous and previous.id:
+            reservations.append(previous.sender_model(previous.my_status, previous.id))
+        if reservations:
+            await self.reservation_repo.save_all(db, reservations)
+
+
     def append_new_message(self,
                            update_dto: UpdateReservationDTO,
                            reservation: Reservation,
                            ):
-        NEW_MESSAGES = update_dto.messages
+        NEW_MESSAGES = update_dto.new_messages()
         if len(NEW_MESSAGES) and \
-            isinstance(NEW_MESSAGES[0], Dict) and \
             isinstance(reservation.messages, List):
-            reservation.messages.insert(0, NEW_MESSAGES[0])
-
-
+            reservation.messages[:0] = NEW_MESSAGES
+            if RESERVATION_MESSAGES_MAX > 0:
+                del reservation.messages[RESERVATION_MESSAGES_MAX:]
 
 
-    '''
-    Check my bookings with a status: "ACCEPT"
-    '''
-    async def check_my_accepted_bookings(self, db: AsyncSession, reservation_dto: ReservationDTO):
-        dtstart = reservation_dto.dtstart
-        dtend = reservation_dto.dtend
-        query: Dict = {
-            'my_user_id': reservation_dto.my_user_id,
-            'my_status': BookingStatus.ACCEPT,
-        }
-
-        # check sender's reservations
-        sender_reserve_list: Optional[List[ReservationDTO]] = \
-            await self.reservation_repo.find_all(db, query, dtstart, dtend)
-
-        if len(sender_reserve_list) > 0:
-            sender_reserve_dict = {idx+1: jsonable_encoder(r) for idx, r in enumerate(sender_reserve_list)}
-            raise ClientException(msg='reservation conflict',
-                                  data=sender_reserve_dict)
-
-        # checking participant's reservations is not necessary,
-        # the default status is 'PENDING'
+    async def save_reservations(self, db: AsyncSession,
+                                reservation_dto: UpdateReservationDTO,
+                                reservations: List[Reservation],
+                                new_messages: Optional[List[Dict]] = None):
+        # same DB checks and error mapping as ReservationService.save_reservations
+        try:
+            await self.reservation_repo.save_all(db, reservations, new_messages)
+        except IntegrityError as e:
+            await db.rollback()
+            if is_violation(e, EXCLUSION_VIOLATION, RESERVATION_PERIOD_CONSTRAINT):
+                await self.raise_reservation_conflict(db, reservation_dto)
+            if is_violation(e, UNIQUE_VIOLATION, RESERVATION_ACTIVE_UNIQUE_INDEX):
+                # a resubmit of an accepted booking hits the unique index
+                # first; report it as a conflict, as the old pre-checks
+                # (conflict before duplicate) did
+                await self.raise_reservation_conflict(db, reservation_dto, only_if_found=True)
+                raise ClientException(msg='Duplicate reservation already exists')
+            raise
+
+
+    async def raise_reservation_conflict(self, db: AsyncSession,
+                                         reservation_dto: UpdateReservationDTO,
+                                         only_if_found: bool = False):
+        # only_if_found: return instead of raising when nothing overlaps
+        sender_reserve_list: List[ReservationVO] = \
+            await self.reservation_repo.find_accepted_overlapping(
+                db,
+                my_user_id=reservation_dto.my_user_id,
+                dtstart=reservation_dto.dtstart,
+                dtend=reservation_dto.dtend,
+            )
+        if only_if_found and not sender_reserve_list:
+            return
+        sender_reserve_dict = {idx+1: jsonable_encoder(r) for idx, r in enumerate(sender_reserve_list)}
+        raise ClientException(msg='reservation conflict',
+                              data=sender_reserve_dict)
 
 
     async def get_sender_vo_by_id(self, db: AsyncSession,
@@ -266,8 +355,9 @@ class SagaReservationService:
     async def get_participant_vo(self, db: AsyncSession,
                                  update_dto: UpdateReservationDTO) -> Optional[ReservationVO]:
         query = update_dto.participant_query()
+        # exclude REJECT rows, as in ReservationService.get_participant_vo
         participant_vo: ReservationVO = \
-            await self.reservation_repo.find_one(db, query)
+            await self.reservation_repo.find_active_one(db, query)
         if not participant_vo:
             log.error('participant reservation not found, query: %s', query)
             raise ClientException(msg='participant reservation not found')
@@ -294,7 +384,7 @@ class SagaReservationService:
                                       prev_sender_vo: ReservationVO) -> Optional[ReservationVO]:
         p_query = prev_sender_vo.participant_query()
         prev_participant_vo: ReservationVO = \
-            await self.reservation_repo.find_one(db, p_query)
+            await self.reservation_repo.find_active_one(db, p_query)
 
         if not prev_participant_vo:
             log.error('previous participant reservation not found, \
@@ -304,8 +394,141 @@ class SagaReservationService:
         return prev_participant_vo
 
 
+'''
+ScaleOutReservationService: 預約依 my_user_id 分散在多個 DB (ShardRouter)
+- 讀取: ScaleOutReservationList (src/app/reservation/list.py)
+- 寫入 (SAGA): 先寫 sender 的 shard，再寫 participant 的 shard；
+  participant 失敗時以 revert_sender 補償 sender，補償也失敗則記 log 待人工修復
+- Google event 的 job 寫入 primary DB 的 activity_jobs，由 ActivitySync 處理
+'''
+
+
 class ScaleOutReservationService:
-    pass
+    def __init__(self,
+                 saga_reservation_service: SagaReservationService,
+                 activity_service: ActivityService,
+                 shard_router: ShardRouter,
+                 primary_session_factory: Callable[[], AsyncSession],
+                 ):
+        self.saga_service = saga_reservation_service
+        self.activity_service = activity_service
+        self.shard_router = shard_router
+        self.primary_session_factory = primary_session_factory
+
+    async def create(self, reservation_dto: ReservationDTO) -> Optional[ReservationVO]:
+        async with self.shard_router.session(reservation_dto.my_user_id) as db:
+            sender_vo = await self.saga_service.create_sender(db, reservation_dto)
+
+        try:
+            async with self.shard_router.session(reservation_dto.user_id) as db:
+                await self.saga_service.create_participant(db, reservation_dto)
+        except Exception:
+            await self.__revert_sender(reservation_dto, created=sender_vo)
+            raise
+
+        return sender_vo
+
+    async def create_new_and_reject_previous(self, reservation_dto: ReservationDTO) -> Optional[ReservationVO]:
+        async with self.shard_router.session(reservation_dto.my_user_id) as db:
+            sender_vo, prev_sender_vo = \
+                await self.saga_service.create_sender_new_and_reject_previous(db, reservation_dto)
+
+        try:
+            async with self.shard_router.session(reservation_dto.user_id) as db:
+                participant_vo = \
+                    await self.saga_service.create_participant_new_and_reject_previous(
+                        db, reservation_dto, prev_sender_vo)
+        except Exception:
+            await self.__revert_sender(reservation_dto, created=sender_vo, previous=prev_sender_vo)
+            raise
+
+        # 取消上一次預約的 Google event
+        await self.__enqueue_activity(prev_sender_vo,
+                                      participant_vo.previous_reserve['reserve_id'],
+                                      schedule=False)
+        return sender_vo
+
+    async def update_reservation_status(self,
+                                        reserve_id: int,
+                                        update_dto: UpdateReservationDTO,
+                                        ) -> Optional[ReservationVO]:
+        async with self.shard_router.session(update_dto.my_user_id) as db:
+            sender_vo, before_vo = \
+                await self.saga_service.update_sender_reservation_status(db, reserve_id, update_dto)
+
+        try:
+            async with self.shard_router.session(update_dto.user_id) as db:
+                participant_vo = \
+                    await self.saga_service.update_participant_reservation_status(db, before_vo, update_dto)
+        except Exception:
+            await self.__revert_sender(update_dto, previous=before_vo)
+            raise
+
+        # 雙方皆 ACCEPT 時建立 Google event；本次為 REJECT 時取消
+        if ReservationService.needs_google_event(sender_vo):
+            await self.__enqueue_activity(sender_vo, participant_vo.id, schedule=True)
+        elif update_dto.my_status == BookingStatus.REJECT:
+            await self.__enqueue_activity(sender_vo, participant_vo.id, schedule=False)
+        return sender_vo
+
+    async def __revert_sender(self,
+                              reservation_dto: UpdateReservationDTO,
+                              created: Optional[ReservationVO] = None,
+                              previous: Optional[ReservationVO] = None,
+                              ):
+        try:
+            async with self.shard_router.session(reservation_dto.my_user_id) as db:
+                await self.saga_service.revert_sender(db, created=created, previous=previous)
+        except Exception as e:
+            # sender 與 participant 兩邊不一致，需要人工修復
+            log.error('revert sender failed, created: %s, previous: %s, err: %s',
+                      created and created.id, previous and previous.id, str(e))
+
+    async def __enqueue_activity(self,
+                                 sender_vo: ReservationVO,
+                                 participant_id: int,
+                                 schedule: bool,
+                                 ):
+        if sender_vo.my_role == RoleType.MENTOR:
+            mentor_reservation_id, mentee_reservation_id = sender_vo.id, participant_id
+        else:
+            mentor_reservation_id, mentee_reservation_id = participant_id, sender_vo.id
+
+        # 兩邊的預約都已 commit；job 寫入失敗不影響預約結果，重試幾次後
+        # 記 ACTIVITY_JOB_LOST 的 log (告警用)，需要人工補 job
+        for attempt in range(1, TX_RETRY_MAX_ATTEMPTS + 1):
+            try:
+                async with self.primary_session_factory() as db:
+                    if schedule:
+                        await self.activity_service.enqueue_schedule(
+                            db,
+                            mentor_reservation_id=mentor_reservation_id,
+                            mentee_reservation_id=mentee_reservation_id,
+                            start_time=sender_vo.dtstart,
+                            end_time=sender_vo.dtend,
+                            user_ids=[sender_vo.my_user_id, sender_vo.user_id],
+                        )
+                    else:
+                        await self.activity_service.enqueue_cancel(
+                            db,
+                            mentor_reservation_id=mentor_reservation_id,
+                            mentee_reservation_id=mentee_reservation_id,
+                        )
+                    await db.commit()
+                return
+            except Exception as e:
+                error = e
+            if attempt < TX_RETRY_MAX_ATTEMPTS:
+                log.warning('enqueue activity job retry (attempt %s/%s), mentor: %s, mentee: %s, err: %s',
+                            attempt, TX_RETRY_MAX_ATTEMPTS,
+                            mentor_reservation_id, mentee_reservation_id, str(error))
+                ceiling = min(TX_RETRY_BACKOFF_MAX, TX_RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, ceiling))
+
+        log.error('[ACTIVITY_JOB_LOST] enqueue activity job failed after %s attempts, '
+                  'needs manual repair, mentor: %s, mentee: %s, schedule: %s, err: %s',
+                  TX_RETRY_MAX_ATTEMPTS, mentor_reservation_id, mentee_reservation_id,
+                  schedule, str(error))
 
 
 class CrossRegionReservationService:
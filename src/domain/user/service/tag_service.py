@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,7 +8,7 @@ from src.config.exception import (
     ClientException,
     raise_http_exception,
 )
-from src.domain.user.dao.tag_repository import TagRepository
+from src.domain.user.dao.tag_catalog_cache import TagCatalogCache, TagCatalogSnapshot
 from src.domain.user.model.tag_model import (
     TagCatalogGroupVO,
     TagCatalogLeafVO,
@@ -48,8 +48,11 @@ _BUCKET_TO_KIND: Dict[str, TagKind] = {
 
 
 class TagService:
-    def __init__(self, tag_repository: TagRepository):
-        self.__tag_repository: TagRepository = tag_repository
+    def __init__(self, tag_catalog: TagCatalogCache):
+        # All reads go through the process-wide catalog snapshot, which
+        # loads with its own session; `db` stays on the method signatures
+        # so callers don't change when a lookup goes back to the DB.
+        self.__tag_catalog: TagCatalogCache = tag_catalog
 
     # ------------------------------------------------------------------
     # Catalog
@@ -60,46 +63,9 @@ class TagService:
         kind: TagKind,
         language: str,
     ) -> TagCatalogVO:
-        # Strict invariant: parent_subject_group IS NULL ⇔ group row;
-        # NOT NULL ⇔ leaf. _validate_leaves rejects writes that would
-        # break this, so orphan leaves can't accumulate.
         try:
-            rows = await self.__tag_repository.list_catalog(db, kind, language)
-
-            groups_by_key: dict = {}
-            ordered_keys: List[str] = []
-
-            for tag in rows:
-                if tag.parent_subject_group is None:
-                    if tag.subject_group not in groups_by_key:
-                        groups_by_key[tag.subject_group] = TagCatalogGroupVO(
-                            subject_group=tag.subject_group,
-                            subject=tag.subject or '',
-                            language=tag.language,
-                            desc=tag.desc,
-                            leaves=[],
-                        )
-                        ordered_keys.append(tag.subject_group)
-                else:
-                    leaf = TagCatalogLeafVO(
-                        tag_id=tag.id,
-                        subject_group=tag.subject_group,
-                        subject=tag.subject or '',
-                        language=tag.language,
-                        desc=tag.desc,
-                    )
-                    parent = groups_by_key.get(tag.parent_subject_group)
-                    if parent is not None:
-                        parent.leaves.append(leaf)
-                    # Leaf whose parent isn't in this language gets dropped —
-                    # the catalog is mis-seeded and pretending otherwise hides
-                    # the bug.
-
-            return TagCatalogVO(
-                kind=kind.value,
-                language=language,
-                groups=[groups_by_key[k] for k in ordered_keys],
-            )
+            snapshot = await self.__tag_catalog.get()
+            return self._build_catalog(snapshot, kind, language)
         except Exception as e:
             log.error("get_catalog error: %s", str(e))
             raise_http_exception(e, msg="Internal Server Error")
@@ -110,15 +76,93 @@ class TagService:
         kinds: Optional[List[TagKind]],
         language: str,
     ) -> TagCatalogsVO:
-        # Sequential — AsyncSession isn't safe for concurrent ops on the
-        # same session, so gather() would race.
-        target_kinds = list(kinds) if kinds else list(TagKind)
+        # All kinds come from one snapshot (one query at most, on reload).
+        try:
+            snapshot = await self.__tag_catalog.get()
+            return self._build_catalogs(snapshot, kinds, language)
+        except Exception as e:
+            log.error("get_catalogs error: %s", str(e))
+            raise_http_exception(e, msg="Internal Server Error")
+
+    async def get_catalogs_rendered(
+        self,
+        db: AsyncSession,
+        kinds: Optional[List[TagKind]],
+        language: str,
+        render: Callable[[TagCatalogsVO], bytes],
+    ) -> Tuple[bytes, str]:
+        # Returns (body, etag). The body is rendered once per
+        # (language, kinds) and snapshot; repeat calls return stored bytes.
+        try:
+            snapshot = await self.__tag_catalog.get()
+            target_kinds = _canonical_kinds(kinds)
+            return snapshot.rendered(
+                ('catalogs', language, tuple(k.value for k in target_kinds)),
+                lambda: render(self._build_catalogs(snapshot, target_kinds, language)),
+            )
+        except Exception as e:
+            log.error("get_catalogs_rendered error: %s", str(e))
+            raise_http_exception(e, msg="Internal Server Error")
+
+    @classmethod
+    def _build_catalogs(
+        cls,
+        snapshot: TagCatalogSnapshot,
+        kinds: Optional[List[TagKind]],
+        language: str,
+    ) -> TagCatalogsVO:
         catalogs: dict = {}
-        for k in target_kinds:
-            vo = await self.get_catalog(db, k, language)
+        for k in _canonical_kinds(kinds):
+            vo = cls._build_catalog(snapshot, k, language)
             catalogs[vo.kind] = vo
         return TagCatalogsVO(language=language, catalogs=catalogs)
 
+    @staticmethod
+    def _build_catalog(
+        snapshot: TagCatalogSnapshot,
+        kind: TagKind,
+        language: str,
+    ) -> TagCatalogVO:
+        # Strict invariant: parent_subject_group IS NULL ⇔ group row;
+        # NOT NULL ⇔ leaf. _validate_buckets rejects writes that would
+        # break this, so orphan leaves can't accumulate.
+        rows = snapshot.list_catalog(kind.value, language)
+
+        groups_by_key: dict = {}
+        ordered_keys: List[str] = []
+
+        for tag in rows:
+            if tag.parent_subject_group is None:
+                if tag.subject_group not in groups_by_key:
+                    groups_by_key[tag.subject_group] = TagCatalogGroupVO(
+                        subject_group=tag.subject_group,
+                        subject=tag.subject or '',
+                        language=tag.language,
+                        desc=tag.desc,
+                        leaves=[],
+                    )
+                    ordered_keys.append(tag.subject_group)
+            else:
+                leaf = TagCatalogLeafVO(
+                    tag_id=tag.id,
+                    subject_group=tag.subject_group,
+                    subject=tag.subject or '',
+                    language=tag.language,
+                    desc=tag.desc,
+                )
+                parent = groups_by_key.get(tag.parent_subject_group)
+                if parent is not None:
+                    parent.leaves.append(leaf)
+                # Leaf whose parent isn't in this language gets dropped —
+                # the catalog is mis-seeded and pretending otherwise hides
+                # the bug.
+
+        return TagCatalogVO(
+            kind=kind.value,
+            language=language,
+            groups=[groups_by_key[k] for k in ordered_keys],
+        )
+
     # ------------------------------------------------------------------
     # Flat-kind reads (industry-style — no leaf/group hierarchy)
     # ------------------------------------------------------------------
@@ -135,12 +179,8 @@ class TagService:
         if not subject_group:
             return None
         try:
-            row = await self.__tag_repository.find_tag(
-                db, kind.value, subject_group, language,
-            )
-            if row is None:
-                return None
-            return TagVO.model_validate(row)
+            snapshot = await self.__tag_catalog.get()
+            return snapshot.find_tag(kind.value, subject_group, language)
         except Exception as e:
             log.error("hydrate_flat_tag error: %s", str(e))
             raise_http_exception(e, msg="Internal Server Error")
@@ -154,10 +194,8 @@ class TagService:
         # Catalog listing for flat-kinds (industry). Hierarchical kinds
         # should use get_catalog so leaves nest under groups.
         try:
-            rows = await self.__tag_repository.get_tags_by_kind(
-                db, kind, language,
-            )
-            return [TagVO.model_validate(r) for r in rows]
+            snapshot = await self.__tag_catalog.get()
+            return snapshot.list_by_kind(kind.value, language)
         except Exception as e:
             log.error("list_tags_by_kind error: %s", str(e))
             raise_http_exception(e, msg="Internal Server Error")
@@ -192,8 +230,9 @@ class TagService:
             }
             replaced_buckets = {b for b, v in inputs.items() if v is not None}
 
-            existing_kind_by_sg = await self._lookup_kinds(
-                db, list(set(current_want_tags) | set(current_have_tags)), language
+            snapshot = await self.__tag_catalog.get()
+            existing_kind_by_sg = self._lookup_kinds(
+                snapshot, list(set(current_want_tags) | set(current_have_tags)), language
             )
 
             new_want = self._preserve_unreplaced(
@@ -205,19 +244,15 @@ class TagService:
                 bucket_by_kind=_HAVE_BUCKET_BY_KIND, replaced=replaced_buckets,
             )
 
+            # Every submitted leaf across all buckets is resolved in one
+            # pass, so nothing is merged unless the whole request is valid.
+            leaves_by_bucket = self._validate_buckets(snapshot, inputs, language)
             for bucket in _WANT_BUCKETS:
-                if inputs[bucket] is not None:
-                    leaves = await self._validate_leaves(
-                        db, _BUCKET_TO_KIND[bucket], inputs[bucket], language,
-                    )
-                    new_want.extend(leaf.subject_group for leaf in leaves)
-
+                if bucket in leaves_by_bucket:
+                    new_want.extend(leaf.subject_group for leaf in leaves_by_bucket[bucket])
             for bucket in _HAVE_BUCKETS:
-                if inputs[bucket] is not None:
-                    leaves = await self._validate_leaves(
-                        db, _BUCKET_TO_KIND[bucket], inputs[bucket], language,
-                    )
-                    new_have.extend(leaf.subject_group for leaf in leaves)
+                if bucket in leaves_by_bucket:
+                    new_have.extend(leaf.subject_group for leaf in leaves_by_bucket[bucket])
 
             return _dedup(new_want), _dedup(new_have)
         except ClientException:
@@ -233,87 +268,129 @@ class TagService:
         have_tags: List[str],
         language: str,
     ) -> Dict[str, List[str]]:
-        # Single bulk JOIN of all tagged subject_groups, then bucketed by
+        # Single snapshot lookup of all tagged subject_groups, then bucketed by
         # (which-array, kind=catalog row). Items not found in the catalog
         # drop out — they don't belong to any bucket. Returns subject_group
         # keys only; frontend resolves display metadata on its side.
-        result: Dict[str, List[str]] = {
-            'want_position': [], 'want_skill': [], 'want_topic': [],
-            'have_skill': [], 'have_topic': [],
-        }
-        all_sgs = list(set(want_tags) | set(have_tags))
-        if not all_sgs:
-            return result
+        if not want_tags and not have_tags:
+            return _empty_buckets()
 
         try:
-            rows = await self.__tag_repository.find_leaves_by_subject_groups(
-                db, all_sgs, language,
-            )
-            tag_by_sg: Dict[str, object] = {row.subject_group: row for row in rows}
-
-            for source, bucket_by_kind in (
-                (want_tags, _WANT_BUCKET_BY_KIND),
-                (have_tags, _HAVE_BUCKET_BY_KIND),
-            ):
-                for sg in source:
-                    tag = tag_by_sg.get(sg)
-                    if tag is None:
-                        continue
-                    bucket = bucket_by_kind.get(tag.kind)
-                    if bucket is None:
-                        # e.g. position written into have_tags somehow —
-                        # not a valid combination; skip rather than crash.
-                        continue
-                    result[bucket].append(sg)
-            return result
+            snapshot = await self.__tag_catalog.get()
+            return self._bucketize(snapshot, want_tags, have_tags, language)
         except Exception as e:
             log.error("hydrate_buckets error: %s", str(e))
             raise_http_exception(e, msg="Internal Server Error")
 
+    async def hydrate_profile_tags(
+        self,
+        db: AsyncSession,
+        industry: Optional[str],
+        want_tags: List[str],
+        have_tags: List[str],
+        language: str,
+    ) -> Tuple[Optional[TagVO], Dict[str, List[str]]]:
+        # Everything a (mentor) profile view needs from the catalog —
+        # industry tag plus the five buckets — resolved against one
+        # snapshot, so both halves always come from the same catalog version.
+        try:
+            snapshot = await self.__tag_catalog.get()
+            industry_tag = None
+            if industry:
+                industry_tag = snapshot.find_tag(TagKind.INDUSTRY.value, industry, language)
+            return industry_tag, self._bucketize(snapshot, want_tags, have_tags, language)
+        except Exception as e:
+            log.error("hydrate_profile_tags error: %s", str(e))
+            raise_http_exception(e, msg="Internal Server Error")
+
     # ------------------------------------------------------------------
     # Internals
     # ------------------------------------------------------------------
-    async def _validate_leaves(
-        self,
-        db: AsyncSession,
-        kind: TagKind,
-        subject_groups: List[str],
+    @staticmethod
+    def _bucketize(
+        snapshot: TagCatalogSnapshot,
+        want_tags: List[str],
+        have_tags: List[str],
+        language: str,
+    ) -> Dict[str, List[str]]:
+        result = _empty_buckets()
+        all_sgs = list(set(want_tags) | set(have_tags))
+        if not all_sgs:
+            return result
+
+        rows = snapshot.find_leaves(all_sgs, language)
+        tag_by_sg: Dict[str, TagVO] = {row.subject_group: row for row in rows}
+
+        for source, bucket_by_kind in (
+            (want_tags, _WANT_BUCKET_BY_KIND),
+            (have_tags, _HAVE_BUCKET_BY_KIND),
+        ):
+            for sg in source:
+                tag = tag_by_sg.get(sg)
+                if tag is None:
+                    continue
+                bucket = bucket_by_kind.get(tag.kind)
+                if bucket is None:
+                    # e.g. position written into have_tags somehow —
+                    # not a valid combination; skip rather than crash.
+                    continue
+                result[bucket].append(sg)
+        return result
+
+    @staticmethod
+    def _validate_buckets(
+        snapshot: TagCatalogSnapshot,
+        inputs: Dict[str, Optional[List[str]]],
         language: str,
-    ) -> List[object]:
+    ) -> Dict[str, List[TagVO]]:
         # Strict: subject_groups must already exist as leaves in the catalog
         # (parent_subject_group is set). Unknown rows or top-level groups
         # are rejected so user writes can't drift the catalog.
-        leaves: List[object] = []
-        for sg in subject_groups:
-            tag = await self.__tag_repository.find_tag(db, kind.value, sg, language)
-            if tag is None:
-                raise ClientException(
-                    msg=(
-                        f"unknown subject_group '{sg}' for kind={kind.value}; "
-                        f"seed the catalog first."
+        # Buckets are checked in want -> have order, items in submitted
+        # order, so the first offending item is the same one the old
+        # per-item lookup reported.
+        submitted = [
+            (bucket, _BUCKET_TO_KIND[bucket], inputs[bucket])
+            for bucket in _WANT_BUCKETS + _HAVE_BUCKETS
+            if inputs.get(bucket) is not None
+        ]
+        found = snapshot.find_tags(
+            {(kind.value, sg) for _, kind, sgs in submitted for sg in sgs},
+            language,
+        )
+
+        leaves_by_bucket: Dict[str, List[TagVO]] = {}
+        for bucket, kind, sgs in submitted:
+            leaves: List[TagVO] = []
+            for sg in sgs:
+                tag = found.get((kind.value, sg))
+                if tag is None:
+                    raise ClientException(
+                        msg=(
+                            f"unknown subject_group '{sg}' for kind={kind.value}; "
+                            f"seed the catalog first."
+                        )
                     )
-                )
-            if tag.parent_subject_group is None:
-                raise ClientException(
-                    msg=(
-                        f"subject_group '{sg}' is a top-level group; "
-                        f"user selections must reference leaf tags."
+                if tag.parent_subject_group is None:
+                    raise ClientException(
+                        msg=(
+                            f"subject_group '{sg}' is a top-level group; "
+                            f"user selections must reference leaf tags."
+                        )
                     )
-                )
-            leaves.append(tag)
-        return leaves
+                leaves.append(tag)
+            leaves_by_bucket[bucket] = leaves
+        return leaves_by_bucket
 
-    async def _lookup_kinds(
-        self,
-        db: AsyncSession,
+    @staticmethod
+    def _lookup_kinds(
+        snapshot: TagCatalogSnapshot,
         subject_groups: List[str],
         language: str,
     ) -> Dict[str, str]:
         if not subject_groups:
             return {}
-        rows = await self.__tag_repository.find_leaves_by_subject_groups(
-            db, subject_groups, language,
-        )
+        rows = snapshot.find_leaves(subject_groups, language)
         return {row.subject_group: row.kind for row in rows}
 
     @staticmethod
@@ -334,6 +411,22 @@ class TagService:
         return kept
 
 
+def _empty_buckets() -> Dict[str, List[str]]:
+    return {
+        'want_position': [], 'want_skill': [], 'want_topic': [],
+        'have_skill': [], 'have_topic': [],
+    }
+
+
+def _canonical_kinds(kinds: Optional[List[TagKind]]) -> List[TagKind]:
+    # Declaration order, duplicates dropped — `?kind=topic&kind=skill` and
+    # `?kind=skill&kind=topic` share one rendered body.
+    if not kinds:
+        return list(TagKind)
+    wanted = set(kinds)
+    return [k for k in TagKind if k in wanted]
+
+
 def _dedup(items: List[str]) -> List[str]:
     # dict.fromkeys preserves first-seen order, which matters for the SQS
     # payload + GET response staying stable across writes.
@@ -1,55 +1,364 @@
-from typing import Any, Set, Dict, List, Optional
+import asyncio
+import heapq
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Set, Dict, List, Optional, Tuple
 from ..template.cache import ICache
 from ..util.time_util import current_seconds
+from ...config.conf import LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_SWEEP_BATCH
 import logging
 
 log = logging.getLogger(__name__)
 
 
 class LocalCache(ICache):
-    def __init__(self):
-        self.cache: Dict[str, Any] = {}
+    '''
+    In-process cache bounded by entry count.
+
+    - LRU: every read/write moves the key to the tail; when full, the head
+      (least recently used) is evicted.
+    - TTL: expire times are also kept in a min-heap; each write sweeps up to
+      `sweep_batch` expired keys, so keys nobody reads still go away.
+    - Set values (sadd/smembers/...) are stored as python sets and follow
+      Redis semantics: an empty set is removed.
+    - get_or_load: concurrent misses on a key await one shared loader task
+      (single-flight); with stale_ttl, expired-but-stale values are served
+      while one background task refreshes them. get_or_load_many shares the
+      same in-flight bookkeeping, one entry per key.
+    '''
+
+    def __init__(self,
+                 max_entries: int = LOCAL_CACHE_MAX_ENTRIES,
+                 sweep_batch: int = LOCAL_CACHE_SWEEP_BATCH):
+        self.max_entries = max(1, max_entries)
+        self.sweep_batch = sweep_batch
+        self.cache: 'OrderedDict[str, Any]' = OrderedDict()
         self.ttl: Dict[str, int] = {}
+        # (expire_at, key); entries go stale when a key is re-set or
+        # deleted and are skipped by comparing against self.ttl
+        self.__expiry_heap: List[Tuple[int, str]] = []
+        # get_or_load bookkeeping: in-flight loader per key, and when a value
+        # loaded with stale_ttl stops being fresh
+        self.__inflight: Dict[str, asyncio.Future] = {}
+        self.__fresh_until: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.stale_hits = 0
 
     # default with_ttl is True, make 'TTL' works
     async def get(self, key: str, with_ttl: bool = True):
-        if with_ttl and key in self.cache:
-            now = current_seconds()
-            if key in self.ttl and self.ttl[key] < now:
-                await self.delete(key)
-                return None
-            else:
-                return self.cache[key]
+        if key not in self.cache:
+            self.misses += 1
+            return None
 
-        if key in self.cache:
-            return self.cache[key]
-        return None
+        if with_ttl and self.__is_expired(key, current_seconds()):
+            self.__remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return self.cache[key]
 
     async def set(self, key: str, val: Any, ex: int = None):
         if key is None:
             log.error('local cache key is None key: %s, val: %s, ex: %s', key, val, ex)
             return
 
-        self.cache[key] = val
-        if ex is not None:
-            now = current_seconds()
-            self.ttl[key] = now + ex
+        self.__put(key, val, ex)
+        # an in-flight load started before this must not overwrite it
+        self.__inflight.pop(key, None)
 
     async def delete(self, key: str):
+        self.evict(key)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ex: int = None,
+        stale_ttl: int = None,
+    ) -> Any:
+        now = current_seconds()
         if key in self.cache:
-            del self.cache[key]
-            del self.ttl[key]
+            if not self.__is_expired(key, now):
+                self.cache.move_to_end(key)
+                self.hits += 1
+                fresh_until = self.__fresh_until.get(key)
+                if fresh_until is not None and fresh_until < now:
+                    # stale: serve it, refresh once in the background
+                    self.stale_hits += 1
+                    if key not in self.__inflight:
+                        self.__start_load(key, loader, ex, stale_ttl, background=True)
+                return self.cache[key]
+            self.__remove(key)
+            self.expirations += 1
+
+        self.misses += 1
+        task = self.__inflight.get(key)
+        if task is None:
+            task = self.__start_load(key, loader, ex, stale_ttl)
+        else:
+            self.coalesced += 1
+        # shield: a cancelled caller must not cancel the load other callers
+        # are waiting on
+        return await asyncio.shield(task)
+
+    async def get_or_load_many(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ex: int = None,
+    ) -> Dict[str, Any]:
+        now = current_seconds()
+        found: Dict[str, Any] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        to_load: List[str] = []
+        for key in dict.fromkeys(keys):
+            if key in self.cache:
+                if not self.__is_expired(key, now):
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    found[key] = self.cache[key]
+                    continue
+                self.__remove(key)
+                self.expirations += 1
+            self.misses += 1
+            if key in self.__inflight:
+                # someone is loading it already; wait for theirs
+                self.coalesced += 1
+                waiting[key] = self.__inflight[key]
+            else:
+                to_load.append(key)
+
+        if to_load:
+            found.update(await self.__load_many(to_load, loader, ex))
+        for key, future in waiting.items():
+            val = await asyncio.shield(future)
+            if val is not None:
+                found[key] = val
+        return found
 
     async def smembers(self, key: str) -> (Optional[Set[Any]]):
-        return
+        members = self.__get_set(key)
+        if members is None:
+            return None
+        # copy, so callers can't mutate the cached set
+        return set(members)
 
     async def sismember(self, key: str, value: Any) -> (bool):
-        return False
+        members = self.__get_set(key)
+        return members is not None and value in members
 
     async def sadd(self, key: str, values: List[Any], ex: int = None) -> (int):
-        return 0
+        if key is None:
+            log.error('local cache key is None key: %s, values: %s, ex: %s', key, values, ex)
+            return 0
+
+        members = self.__get_set(key)
+        if members is None:
+            members = set()
+        before = len(members)
+        members.update(values)
+        if ex is None and key in self.ttl:
+            # like Redis SADD, adding members keeps the existing expire time
+            ex = max(0, self.ttl[key] - current_seconds())
+        self.__put(key, members, ex)
+        return len(members) - before
 
     async def srem(self, key: str, value: Any) -> (int):
-        return 0
+        members = self.__get_set(key)
+        if members is None or value not in members:
+            return 0
+        members.discard(value)
+        if not members:
+            self.__remove(key)
+        return 1
+
+    def evict(self, key: str):
+        # sync form of delete(), for callbacks outside a coroutine.
+        # An in-flight load started before this must not write its (possibly
+        # outdated) result back; the next reader starts a new one.
+        self.__remove(key)
+        self.__inflight.pop(key, None)
+
+    def clear(self):
+        self.cache.clear()
+        self.ttl.clear()
+        self.__fresh_until.clear()
+        self.__expiry_heap = []
+        self.__inflight.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self.cache),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'coalesced': self.coalesced,
+            'stale_hits': self.stale_hits,
+            'inflight': len(self.__inflight),
+        }
+
+    def __start_load(self,
+                     key: str,
+                     loader: Callable[[], Awaitable[Any]],
+                     ex: Optional[int],
+                     stale_ttl: Optional[int],
+                     background: bool = False) -> asyncio.Task:
+        task = asyncio.ensure_future(self.__load(key, loader, ex, stale_ttl))
+        self.__inflight[key] = task
+
+        def _done(t: asyncio.Task):
+            if self.__inflight.get(key) is t:
+                del self.__inflight[key]
+            # always retrieve the exception, so an unawaited failure
+            # doesn't surface as "exception was never retrieved"
+            if t.cancelled():
+                return
+            err = t.exception()
+            if err is not None and background:
+                log.error('local cache background refresh failed, key: %s, err: %s', key, str(err))
+
+        task.add_done_callback(_done)
+        return task
+
+    async def __load(self,
+                     key: str,
+                     loader: Callable[[], Awaitable[Any]],
+                     ex: Optional[int],
+                     stale_ttl: Optional[int]) -> Any:
+        val = await loader()
+        if val is None or self.__inflight.get(key) is not asyncio.current_task():
+            # None isn't cached (indistinguishable from a miss); a delete
+            # during the load superseded this result
+            return val
+
+        if ex is not None and stale_ttl:
+            self.__put(key, val, ex + stale_ttl)
+            self.__fresh_until[key] = current_seconds() + ex
+        else:
+            self.__put(key, val, ex)
+        return val
+
+    async def __load_many(self,
+                          keys: List[str],
+                          loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+                          ex: Optional[int]) -> Dict[str, Any]:
+        # one future per key in __inflight: single-key get_or_load calls
+        # coalesce on it, and evict()/set() during the load supersede it
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        self.__inflight.update(futures)
+        task = asyncio.ensure_future(self.__resolve_many(futures, loader, ex))
+        # retrieve the exception even if the caller was cancelled meanwhile
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        # shield: a cancelled caller must not cancel the load others await
+        return await asyncio.shield(task)
+
+    async def __resolve_many(self,
+                             futures: Dict[str, asyncio.Future],
+                             loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+                             ex: Optional[int]) -> Dict[str, Any]:
+        try:
+            try:
+                loaded = await loader(list(futures)) or {}
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()
+                raise
+
+            found: Dict[str, Any] = {}
+            for key, future in futures.items():
+                val = loaded.get(key)
+                if self.__inflight.get(key) is future:
+                    del self.__inflight[key]
+                    if val is not None:
+                        self.__put(key, val, ex)
+                if val is not None:
+                    found[key] = val
+                future.set_result(val)
+            return found
+        finally:
+            # also on CancelledError (e.g. loop shutdown): never leave a
+            # future in __inflight that nobody will resolve, its waiters
+            # and every later get_or_load of the key would hang on it
+            for key, future in futures.items():
+                if self.__inflight.get(key) is future:
+                    del self.__inflight[key]
+                if not future.done():
+                    future.cancel()
+
+    def __get_set(self, key: str) -> Optional[Set[Any]]:
+        if key not in self.cache:
+            self.misses += 1
+            return None
+        if self.__is_expired(key, current_seconds()):
+            self.__remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        val = self.cache[key]
+        if not isinstance(val, set):
+            log.error('local cache key holds a non-set value, key: %s', key)
+            return None
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return val
+
+    def __put(self, key: str, val: Any, ex: Optional[int]):
+        now = current_seconds()
+        self.__sweep(now)
+
+        self.cache[key] = val
+        self.cache.move_to_end(key)
+        if ex is not None:
+            expire_at = now + ex
+            self.ttl[key] = expire_at
+            heapq.heappush(self.__expiry_heap, (expire_at, key))
+        else:
+            self.ttl.pop(key, None)
+        self.__fresh_until.pop(key, None)
+
+        while len(self.cache) > self.max_entries:
+            lru_key, _ = self.cache.popitem(last=False)
+            self.ttl.pop(lru_key, None)
+            self.__fresh_until.pop(lru_key, None)
+            self.evictions += 1
+
+        # the heap only holds keys with a ttl; rebuild it once stale entries
+        # (re-set / deleted / evicted keys) clearly outnumber live ones
+        if len(self.__expiry_heap) > 2 * len(self.ttl) + self.sweep_batch:
+            self.__expiry_heap = [(at, k) for k, at in self.ttl.items()]
+            heapq.heapify(self.__expiry_heap)
+
+    def __sweep(self, now: int):
+        heap = self.__expiry_heap
+        swept = 0
+        while heap and heap[0][0] < now and swept < self.sweep_batch:
+            expire_at, key = heapq.heappop(heap)
+            swept += 1
+            if self.ttl.get(key) != expire_at:
+                # stale heap entry: key was re-set or removed since
+                continue
+            self.__remove(key)
+            self.expirations += 1
+
+    def __is_expired(self, key: str, now: int) -> bool:
+        return key in self.ttl and self.ttl[key] < now
+
+    def __remove(self, key: str):
+        self.cache.pop(key, None)
+        self.ttl.pop(key, None)
+        self.__fresh_until.pop(key, None)
+
 
 _local_cache = LocalCache()
@@ -0,0 +1,214 @@
+import pickle
+from typing import Any, Awaitable, Callable, Dict, Set, List, Optional
+from redis.exceptions import WatchError
+from ..template.cache import ICache
+from ..resource.handler import RedisResourceHandler
+from ...config.conf import REDIS_KEY_PREFIX
+import logging
+
+log = logging.getLogger(__name__)
+
+# per-key write counter used by get_or_load; only has to outlive a load
+GENERATION_EX = 3600
+
+
+class RedisCache(ICache):
+    '''
+    Shared cache on a Redis-protocol server, used as the L2 of TieredCache.
+
+    Values are pickled (VOs round-trip as-is). Redis errors are logged and
+    treated as misses / no-ops: the cache must never fail a request that the
+    DB could still serve.
+
+    set/delete also bump the key's generation (`<key>#gen`); get_or_load
+    writes a loaded value back only if no set/delete happened since its
+    miss, so a slow load can't overwrite a newer value with an older one.
+    '''
+
+    def __init__(self, redis_rsc: RedisResourceHandler, prefix: str = REDIS_KEY_PREFIX):
+        self.redis_rsc = redis_rsc
+        self.prefix = prefix
+
+    async def get(self, key: str, with_ttl: bool = False):
+        # Redis expires keys itself; with_ttl is irrelevant here
+        try:
+            client = await self.redis_rsc.access()
+            raw = await client.get(self.__key(key))
+            return None if raw is None else pickle.loads(raw)
+        except Exception as e:
+            log.error('redis cache get error, key: %s, err: %s', key, e.__str__())
+            return None
+
+    async def set(self, key: str, val: Any, ex: int = None):
+        if key is None:
+            log.error('redis cache key is None key: %s, val: %s, ex: %s', key, val, ex)
+            return
+        try:
+            client = await self.redis_rsc.access()
+            async with client.pipeline(transaction=True) as pipe:
+                if ex is not None and ex <= 0:
+                    # already expired; Redis rejects a non-positive EX
+                    pipe.delete(self.__key(key))
+                else:
+                    pipe.set(self.__key(key), pickle.dumps(val), ex=ex)
+                self.__bump_generation(pipe, key)
+                await pipe.execute()
+        except Exception as e:
+            log.error('redis cache set error, key: %s, err: %s', key, e.__str__())
+
+    async def delete(self, key: str):
+        try:
+            client = await self.redis_rsc.access()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(self.__key(key))
+                self.__bump_generation(pipe, key)
+                await pipe.execute()
+        except Exception as e:
+            log.error('redis cache delete error, key: %s, err: %s', key, e.__str__())
+
+    async def smembers(self, key: str) -> (Optional[Set[Any]]):
+        try:
+            client = await self.redis_rsc.access()
+            members = await client.smembers(self.__key(key))
+            if not members:
+                return None
+            return {pickle.loads(m) for m in members}
+        except Exception as e:
+            log.error('redis cache smembers error, key: %s, err: %s', key, e.__str__())
+            return None
+
+    async def sismember(self, key: str, value: Any) -> (bool):
+        try:
+            client = await self.redis_rsc.access()
+            return bool(await client.sismember(self.__key(key), pickle.dumps(value)))
+        except Exception as e:
+            log.error('redis cache sismember error, key: %s, err: %s', key, e.__str__())
+            return False
+
+    async def sadd(self, key: str, values: List[Any], ex: int = None) -> (int):
+        if key is None or not values:
+            return 0
+        try:
+            client = await self.redis_rsc.access()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.sadd(self.__key(key), *[pickle.dumps(v) for v in values])
+                if ex is not None:
+                    pipe.expire(self.__key(key), max(1, ex))
+                added, *_ = await pipe.execute()
+            return added
+        except Exception as e:
+            log.error('redis cache sadd error, key: %s, err: %s', key, e.__str__())
+            return 0
+
+    async def srem(self, key: str, value: Any) -> (int):
+        try:
+            client = await self.redis_rsc.access()
+            return await client.srem(self.__key(key), pickle.dumps(value))
+        except Exception as e:
+            log.error('redis cache srem error, key: %s, err: %s', key, e.__str__())
+            return 0
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ex: int = None,
+        stale_ttl: int = None,
+    ) -> Any:
+        # No cross-process single-flight here; TieredCache coalesces per
+        # process in L1 before it reaches this.
+        found, generations = await self.__get_with_generations([key])
+        val = found.get(key)
+        if val is None:
+            val = await loader()
+            if val is not None and generations is not None:
+                await self.__set_if_generations({key: val}, generations, ex)
+        return val
+
+    async def get_or_load_many(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ex: int = None,
+    ) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found, generations = await self.__get_with_generations(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            loaded = {key: val for key, val in (await loader(missing) or {}).items()
+                      if val is not None}
+            found.update(loaded)
+            if loaded and generations is not None:
+                await self.__set_if_generations(loaded, generations, ex)
+        return found
+
+    async def publish(self, channel: str, message: str) -> None:
+        try:
+            client = await self.redis_rsc.access()
+            await client.publish(channel, message)
+        except Exception as e:
+            log.error('redis publish error, channel: %s, err: %s', channel, e.__str__())
+
+    async def __get_with_generations(self, keys: List[str]):
+        '''
+        ({key: value} of the hits, {key: generation}) in one MGET;
+        generations is None on error, so nothing gets written back
+        '''
+        try:
+            client = await self.redis_rsc.access()
+            raws = await client.mget(
+                [self.__key(key) for key in keys] +
+                [self.__generation_key(key) for key in keys])
+            found = {key: pickle.loads(raw)
+                     for key, raw in zip(keys, raws[:len(keys)]) if raw is not None}
+            generations = {key: generation or b'0'
+                           for key, generation in zip(keys, raws[len(keys):])}
+            return found, generations
+        except Exception as e:
+            log.error('redis cache mget error, keys: %s, err: %s', keys, e.__str__())
+            return {}, None
+
+    async def __set_if_generations(self,
+                                   values: Dict[str, Any],
+                                   generations: Dict[str, bytes],
+                                   ex: Optional[int]):
+        '''
+        WATCH the generations: keys set/deleted since the miss are dropped,
+        and one changing before EXEC aborts the write (a later read reloads).
+        '''
+        if ex is not None and ex <= 0:
+            return
+        keys = list(values)
+        generation_keys = [self.__generation_key(key) for key in keys]
+        try:
+            client = await self.redis_rsc.access()
+            async with client.pipeline(transaction=True) as pipe:
+                await pipe.watch(*generation_keys)
+                current = await pipe.mget(generation_keys)
+                unchanged = [key for key, generation in zip(keys, current)
+                             if (generation or b'0') == generations.get(key)]
+                if len(unchanged) < len(keys):
+                    log.debug('redis cache load superseded, keys: %s',
+                              [key for key in keys if key not in unchanged])
+                if not unchanged:
+                    return
+                pipe.multi()
+                for key in unchanged:
+                    pipe.set(self.__key(key), pickle.dumps(values[key]), ex=ex)
+                await pipe.execute()
+        except WatchError:
+            log.debug('redis cache load superseded, keys: %s', keys)
+        except Exception as e:
+            log.error('redis cache set error, keys: %s, err: %s', keys, e.__str__())
+
+    def __bump_generation(self, pipe, key: str):
+        pipe.incr(self.__generation_key(key))
+        pipe.expire(self.__generation_key(key), GENERATION_EX)
+
+    def __key(self, key: str) -> str:
+        return f'{self.prefix}{key}'
+
+    def __generation_key(self, key: str) -> str:
+        return f'{self.prefix}{key}#gen'
@@ -0,0 +1,25 @@
+from ..template.cache import ICache
+from ..resource.manager import resource_manager
+from .local_cache import LocalCache, _local_cache
+from .redis_cache import RedisCache
+from .tiered_cache import TieredCache
+from ...config.conf import REDIS_URL
+
+# Cache for data that other processes can change (profiles, mentor
+# profiles). With REDIS_URL it is L1 + Redis L2 with pub/sub invalidation;
+# without it, the plain per-process local cache.
+if REDIS_URL:
+    redis_rsc = resource_manager.get('redis_rsc')
+    _shared_cache: ICache = TieredCache(
+        l1=LocalCache(),
+        l2=RedisCache(redis_rsc),
+        redis_rsc=redis_rsc,
+    )
+else:
+    _shared_cache: ICache = _local_cache
+
+
+async def listen_cache_invalidations():
+    # no-op without a shared L2
+    if isinstance(_shared_cache, TieredCache):
+        await _shared_cache.listen_invalidations()
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Set, List, Optional
+from ..template.cache import ICache
+from ..resource.handler import RedisResourceHandler
+from .local_cache import LocalCache
+from .redis_cache import RedisCache
+from ...config.conf import L1_CACHE_TTL, CACHE_INVALIDATION_CHANNEL
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class TieredCache(ICache):
+    '''
+    L1 = in-process LocalCache with a short ttl, L2 = shared RedisCache.
+
+    Reads go L1 -> L2 -> loader; writes and deletes go to L2 and then
+    broadcast the key on CACHE_INVALIDATION_CHANNEL, so every other process
+    drops its L1 copy. Messages carry the sender's node id and are ignored
+    by the sender itself. A missed message (subscriber reconnecting, a
+    frozen Lambda) is bounded by L1_CACHE_TTL; on resubscribe L1 is cleared.
+
+    Set values live in L2 only, since they're mutated in place.
+    '''
+
+    def __init__(self,
+                 l1: LocalCache,
+                 l2: RedisCache,
+                 redis_rsc: RedisResourceHandler,
+                 channel: str = CACHE_INVALIDATION_CHANNEL,
+                 l1_ttl: int = L1_CACHE_TTL):
+        self.l1 = l1
+        self.l2 = l2
+        self.redis_rsc = redis_rsc
+        self.channel = channel
+        self.l1_ttl = l1_ttl
+        self.node_id = uuid.uuid4().hex
+        self.invalidations_received = 0
+
+    async def get(self, key: str, with_ttl: bool = True):
+        val = await self.l1.get(key)
+        if val is not None:
+            return val
+        val = await self.l2.get(key)
+        if val is not None:
+            await self.l1.set(key, val, self.l1_ttl)
+        return val
+
+    async def set(self, key: str, val: Any, ex: int = None):
+        await self.l2.set(key, val, ex)
+        await self.l1.set(key, val, self.__l1_ex(ex))
+        await self.__broadcast(key)
+
+    async def delete(self, key: str):
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+        await self.__broadcast(key)
+
+    async def smembers(self, key: str) -> (Optional[Set[Any]]):
+        return await self.l2.smembers(key)
+
+    async def sismember(self, key: str, value: Any) -> (bool):
+        return await self.l2.sismember(key, value)
+
+    async def sadd(self, key: str, values: List[Any], ex: int = None) -> (int):
+        return await self.l2.sadd(key, values, ex)
+
+    async def srem(self, key: str, value: Any) -> (int):
+        return await self.l2.srem(key, value)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ex: int = None,
+        stale_ttl: int = None,
+    ) -> Any:
+        # L1 single-flight wraps the L2 lookup, so one process sends at most
+        # one L2 read (and at most one loader call) per key at a time. The L2
+        # write-back is skipped if any process set/deleted the key meanwhile
+        # (RedisCache generation check), and it doesn't broadcast: it
+        # only fills a miss.
+        async def _load_through_l2():
+            return await self.l2.get_or_load(key, loader, ex=ex)
+
+        return await self.l1.get_or_load(
+            key, _load_through_l2, ex=self.__l1_ex(ex), stale_ttl=stale_ttl,
+        )
+
+    async def get_or_load_many(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ex: int = None,
+    ) -> Dict[str, Any]:
+        # same layering as get_or_load: L1 misses go to L2 in one MGET, L2
+        # misses to one loader call; fills are guarded and not broadcast
+        async def _load_through_l2(missing: List[str]) -> Dict[str, Any]:
+            return await self.l2.get_or_load_many(missing, loader, ex=ex)
+
+        return await self.l1.get_or_load_many(
+            keys, _load_through_l2, ex=self.__l1_ex(ex),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'l1': self.l1.stats(),
+            'invalidations_received': self.invalidations_received,
+        }
+
+    async def listen_invalidations(self, retry_secs: float = 1.0, max_retry_secs: float = 30.0):
+        '''Long-running subscriber; start once per process.'''
+        delay = retry_secs
+        while True:
+            pubsub = None
+            try:
+                client = await self.redis_rsc.access()
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                # anything published while we weren't subscribed is lost
+                self.l1.clear()
+                delay = retry_secs
+                log.info('cache invalidation subscribed, channel: %s, node: %s',
+                         self.channel, self.node_id)
+                async for message in pubsub.listen():
+                    self.__on_message(message.get('data'))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error('cache invalidation subscriber error: %s', e.__str__())
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_retry_secs)
+
+    def __on_message(self, data: Any):
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            log.error('cache invalidation bad message: %s', data)
+            return
+        if payload.get('origin') == self.node_id:
+            return
+        key = payload.get('key')
+        if key is None:
+            return
+        self.invalidations_received += 1
+        self.l1.evict(key)
+
+    async def __broadcast(self, key: str):
+        await self.l2.publish(
+            self.channel, json.dumps({'origin': self.node_id, 'key': key}))
+
+    def __l1_ex(self, ex: Optional[int]) -> int:
+        return self.l1_ttl if ex is None else min(ex, self.l1_ttl)
@@ -1,19 +1,44 @@
+import asyncio
 import functools
+import random
+import time
 from fastapi import status
 from typing import Dict, Optional
 import httpx
 from ..template.service_response import ServiceApiResponse
 from ..template.service_api import IServiceApi
+from ..resource.handler import HttpClientResourceHandler
+from ..resource.manager import resource_manager
+from .circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, _circuit_breakers
+from ...config.conf import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    HTTP_REQUEST_DEADLINE,
+    HTTP_RETRY_MAX_ATTEMPTS,
+    HTTP_RETRY_BACKOFF_BASE,
+    HTTP_RETRY_BACKOFF_MAX,
+)
 from ...config.exception import *
 import logging
 
 
-logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 
 SUCCESS_CODE = "0"
 
+IDEMPOTENT_METHODS = {'GET', 'PUT', 'DELETE'}
+# gateway-style failures worth another attempt on an idempotent call
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+# the request never reached the server, so even a POST is safe to resend
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(Exception):
+    pass
+
 
 def check_response_code(method: str, expected_code: int = 200):
     def decorator_check_response_code(func):
@@ -48,7 +73,7 @@ def check_response_code(method: str, expected_code: int = 200):
                 data = res_body.get('detail', [])
 
             log.error(
-                f'service request fail,\n [%s]: %s;\n BODY: %s;\n PARAMS: %s;\n HEADERS: %s;\n \
+                'service request fail,\n [%s]: %s;\n BODY: %s;\n PARAMS: %s;\n HEADERS: %s;\n \
                 STATUS_CODE: %s;\n RESP_BODY: %s;\n ERR_MSG: %s;\n  DATA/422_DETAIL: %s\n',
                 method, url, body, params, headers, 
                 status_code, res_body, msg, data)
@@ -60,6 +85,62 @@ def check_response_code(method: str, expected_code: int = 200):
 
 
 class AsyncServiceApiAdapter(IServiceApi):
+    def __init__(self,
+                 http_rsc: HttpClientResourceHandler,
+                 circuit_breakers: CircuitBreakerRegistry = _circuit_breakers):
+        # pooled client owned by ResourceManager ('http_rsc'); closed on shutdown
+        self.http_rsc = http_rsc
+        self.circuit_breakers = circuit_breakers
+
+    async def __send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        '''
+        One logical call: circuit breaker check, then up to
+        HTTP_RETRY_MAX_ATTEMPTS attempts with full-jitter backoff, all bounded
+        by HTTP_REQUEST_DEADLINE. Connection errors, other exceptions and 5xx
+        count as breaker failures; 4xx are the caller's problem and count as
+        success. Every allowed attempt ends in a verdict or a release, so a
+        half-open trial can't stay in flight.
+        '''
+        breaker: CircuitBreaker = self.circuit_breakers.for_url(url)
+        client: httpx.AsyncClient = await self.http_rsc.access()
+        deadline = time.monotonic() + HTTP_REQUEST_DEADLINE
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise CircuitOpenError(f'circuit open: {breaker.name}')
+
+            remaining = deadline - time.monotonic()
+            try:
+                response = await client.request(
+                    method, url, timeout=_bounded_timeout(remaining), **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, NOT_SENT_ERRORS)
+                if not retryable or not await _backoff(attempt, deadline):
+                    raise
+                log.warning('retry %s %s (attempt %s): %s', method, url, attempt, e.__str__())
+                continue
+            except Exception:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                # cancelled (client gone, deadline of the caller): no verdict
+                # on the downstream, but the half-open trial slot must be freed
+                breaker.release()
+                raise
+
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            if method in IDEMPOTENT_METHODS and \
+                    response.status_code in RETRYABLE_STATUS_CODES and \
+                    await _backoff(attempt, deadline):
+                log.warning('retry %s %s (attempt %s): status %s', method, url, attempt, response.status_code)
+                continue
+            return response
 
     """
     return response body only
@@ -75,12 +156,11 @@ class AsyncServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, headers=headers)
-                result = ServiceApiResponse.parse(response)
+            response = await self.__send('GET', url, params=params, headers=headers)
+            result = ServiceApiResponse.parse(response)
 
         except Exception as e:
-            log.error(f"simple_get request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
+            log.error("simple_get request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
                       url, params, headers, response, e.__str__())
             raise ServerException(msg='get_connection_error')
 
@@ -100,12 +180,11 @@ class AsyncServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=json, headers=headers)
-                result = ServiceApiResponse.parse(response)
+            response = await self.__send('POST', url, json=json, headers=headers)
+            result = ServiceApiResponse.parse(response)
 
         except Exception as e:
-            log.error(f"simple_post request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
+            log.error("simple_post request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
                       url, json, headers, response, e.__str__())
             raise ServerException(msg='post_connection_error')
 
@@ -125,12 +204,11 @@ class AsyncServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.put(url, json=json, headers=headers)
-                result = ServiceApiResponse.parse(response)
+            response = await self.__send('PUT', url, json=json, headers=headers)
+            result = ServiceApiResponse.parse(response)
 
         except Exception as e:
-            log.error(f"simple_put request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
+            log.error("simple_put request error, url:%s, json:%s, headers:%s, resp:%s, err:%s",
                       url, json, headers, response, e.__str__())
             raise ServerException(msg='put_connection_error')
 
@@ -150,15 +228,36 @@ class AsyncServiceApiAdapter(IServiceApi):
         result = None
         response = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(url, params=params, headers=headers)
-                result = ServiceApiResponse.parse(response)
+            response = await self.__send('DELETE', url, params=params, headers=headers)
+            result = ServiceApiResponse.parse(response)
 
         except Exception as e:
-            log.error(f"simple_delete request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
+            log.error("simple_delete request error, url:%s, params:%s, headers:%s, resp:%s, err:%s",
                       url, params, headers, response, e.__str__())
             raise ServerException(msg='delete_connection_error')
 
         return result
 
-_async_service_api_adapter = AsyncServiceApiAdapter()
+def _bounded_timeout(remaining: float) -> httpx.Timeout:
+    # every phase of an attempt is capped by what's left of the deadline
+    remaining = max(remaining, 0.001)
+    return httpx.Timeout(
+        connect=min(HTTP_CONNECT_TIMEOUT, remaining),
+        read=min(HTTP_READ_TIMEOUT, remaining),
+        write=min(HTTP_WRITE_TIMEOUT, remaining),
+        pool=min(HTTP_POOL_TIMEOUT, remaining),
+    )
+
+
+async def _backoff(attempt: int, deadline: float) -> bool:
+    # Returns False when the retry budget (attempts or deadline) is spent.
+    if attempt >= HTTP_RETRY_MAX_ATTEMPTS:
+        return False
+    delay = random.uniform(0, min(HTTP_RETRY_BACKOFF_MAX, HTTP_RETRY_BACKOFF_BASE * (2 ** attempt)))
+    if time.monotonic() + delay >= deadline:
+        return False
+    await asyncio.sleep(delay)
+    return True
+
+
+_async_service_api_adapter = AsyncServiceApiAdapter(resource_manager.get('http_rsc'))
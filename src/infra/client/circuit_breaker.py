@@ -0,0 +1,126 @@
+import time
+from enum import Enum
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+from ...config.conf import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_SECS,
+)
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    '''
+    closed    -> calls pass; `failure_threshold` consecutive failures open it
+    open      -> calls fail fast until `recovery_secs` have passed
+    half_open -> a single trial call passes; success closes, failure re-opens
+
+    Not thread-safe; meant for one event loop.
+    '''
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_secs: float = CIRCUIT_RECOVERY_SECS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_secs = recovery_secs
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened_count = 0
+
+    def allow(self) -> bool:
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_secs:
+                self.rejected += 1
+                return False
+            self.__transit(CircuitState.HALF_OPEN)
+
+        # half-open: exactly one trial call at a time
+        if self.trial_in_flight:
+            self.rejected += 1
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        if self.state != CircuitState.CLOSED:
+            self.__transit(CircuitState.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or \
+                self.consecutive_failures >= self.failure_threshold:
+            self.__open()
+
+    def release(self):
+        '''
+        The allowed call ended without an outcome (e.g. cancelled); frees the
+        half-open trial slot so the next call can try again.
+        '''
+        self.trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'state': self.state.value,
+            'consecutive_failures': self.consecutive_failures,
+            'successes': self.successes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'opened_count': self.opened_count,
+        }
+
+    def __open(self):
+        self.opened_at = time.monotonic()
+        self.opened_count += 1
+        self.__transit(CircuitState.OPEN)
+
+    def __transit(self, state: CircuitState):
+        if self.state != state:
+            log.warning('circuit breaker [%s]: %s -> %s', self.name, self.state.value, state.value)
+        self.state = state
+
+
+class CircuitBreakerRegistry:
+    '''One breaker per downstream base url (scheme://host[:port]).'''
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        name = f'{parts.scheme}://{parts.netloc}'
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [breaker.snapshot() for breaker in self.breakers.values()]
+
+
+_circuit_breakers = CircuitBreakerRegistry()
@@ -65,6 +65,9 @@ def do_run_migrations(connection: Connection) -> None:
     connection.exec_driver_sql(
         f'SET search_path TO "{schema}", public'
     )
+    # session-level setting; commit it so alembic owns the migration
+    # transactions (autocommit_block needs that for CREATE INDEX CONCURRENTLY)
+    connection.commit()
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
@@ -73,6 +76,9 @@ def do_run_migrations(connection: Connection) -> None:
         version_table_schema=schema,
         compare_type=True,
         compare_server_default=True,
+        # one transaction per revision: an autocommit block only commits
+        # the revisions before it, not the whole run
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -93,7 +99,7 @@ async def run_async_migrations() -> None:
         ),
     )
 
-    async with connectable.begin() as connection:
+    async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
 
     await connectable.dispose()
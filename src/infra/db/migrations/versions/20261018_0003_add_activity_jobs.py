@@ -0,0 +1,66 @@
+"""Add the activity_jobs outbox for google calendar side effects.
+
+Revision ID: 20261018_0003
+Revises: 20260620_0002
+Create Date: 2026-10-18
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import text
+
+
+revision: str = '20261018_0003'
+down_revision: Union[str, None] = '20260620_0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _schema() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    return x_args.get('schema') or os.getenv('DB_SCHEMA', 'public').strip()
+
+
+def _quoted_schema(bind) -> str:
+    return bind.dialect.identifier_preparer.quote_schema(_schema())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    schema = _quoted_schema(bind)
+    bind.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {schema}.activity_jobs ('
+        '"id" BIGSERIAL PRIMARY KEY, '
+        'mentor_reservation_id INT NOT NULL, '
+        'mentee_reservation_id INT NOT NULL, '
+        'target_status VARCHAR(20) NOT NULL, '
+        "payload JSONB NOT NULL DEFAULT '{}'::jsonb, "
+        "\"status\" VARCHAR(20) NOT NULL DEFAULT 'PENDING', "
+        'revision INT NOT NULL DEFAULT 1, '
+        'attempts INT NOT NULL DEFAULT 0, '
+        'next_run_at BIGINT NOT NULL, '
+        'last_error TEXT, '
+        'created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, '
+        'updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, '
+        'CONSTRAINT uq_activity_jobs_reservation_pair '
+        'UNIQUE (mentor_reservation_id, mentee_reservation_id), '
+        'CONSTRAINT ck_activity_jobs_target_status '
+        "CHECK (target_status IN ('SCHEDULED', 'CANCELLED')), "
+        'CONSTRAINT ck_activity_jobs_status '
+        "CHECK (\"status\" IN ('PENDING', 'DONE', 'FAILED'))"
+        ')'
+    ))
+    bind.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_activity_jobs_pending_next_run_at '
+        f'ON {schema}.activity_jobs (next_run_at) '
+        "WHERE \"status\" = 'PENDING'"
+    ))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    schema = _quoted_schema(bind)
+    bind.execute(text(
+        f'DROP TABLE IF EXISTS {schema}.activity_jobs'
+    ))
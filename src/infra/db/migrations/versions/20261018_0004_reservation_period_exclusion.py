@@ -0,0 +1,110 @@
+"""Enforce non-overlapping accepted reservations per user in the database.
+
+A user's live accepted reservations (my_status = 'ACCEPT' and the
+counterparty has not cancelled) may not overlap in [dtstart, dtend).
+
+Rows written before this check may already overlap, and the constraint
+can't be added until they are resolved. upgrade() looks for them first and
+stops with the offending pairs; to list them all beforehand:
+
+    SELECT a.my_user_id, a.id, b.id, a.dtstart, a.dtend, b.dtstart, b.dtend
+    FROM reservations a
+    JOIN reservations b ON b.my_user_id = a.my_user_id AND b.id > a.id
+     AND a.dtstart < b.dtend AND b.dtstart < a.dtend
+    WHERE a.my_status = 'ACCEPT' AND a.status <> 'REJECT'
+      AND b.my_status = 'ACCEPT' AND b.status <> 'REJECT';
+
+Cancel (REJECT) one booking of each pair through the API, so both sides
+and the calendar event are updated, then re-run the migration.
+
+Revision ID: 20261018_0004
+Revises: 20261018_0003
+Create Date: 2026-10-18
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import inspect, text
+
+
+revision: str = '20261018_0004'
+down_revision: Union[str, None] = '20261018_0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CONSTRAINT_NAME = 'excl_reservation_accepted_user_period'
+# pairs shown when upgrade() stops on existing overlaps
+OVERLAPS_SHOWN = 20
+
+
+def _schema() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    return x_args.get('schema') or os.getenv('DB_SCHEMA', 'public').strip()
+
+
+def _quoted_schema(bind) -> str:
+    return bind.dialect.identifier_preparer.quote_schema(_schema())
+
+
+def _constraint_exists(bind) -> bool:
+    return bind.execute(text(
+        'SELECT 1 FROM pg_constraint c '
+        'JOIN pg_namespace n ON n.oid = c.connamespace '
+        'WHERE c.conname = :name AND n.nspname = :schema'
+    ), {'name': CONSTRAINT_NAME, 'schema': _schema()}).first() is not None
+
+
+def _overlapping_pairs(bind, schema: str):
+    return bind.execute(text(
+        'SELECT a.my_user_id, a.id, b.id '
+        f'FROM {schema}.reservations a '
+        f'JOIN {schema}.reservations b ON b.my_user_id = a.my_user_id AND b.id > a.id '
+        'AND a.dtstart < b.dtend AND b.dtstart < a.dtend '
+        "WHERE a.my_status = 'ACCEPT' AND a.status <> 'REJECT' "
+        "AND b.my_status = 'ACCEPT' AND b.status <> 'REJECT' "
+        'ORDER BY a.my_user_id, a.id, b.id '
+        f'LIMIT {OVERLAPS_SHOWN}'
+    )).all()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    if _constraint_exists(bind):
+        return
+    schema = _quoted_schema(bind)
+    overlaps = _overlapping_pairs(bind, schema)
+    if overlaps:
+        raise RuntimeError(
+            f'{_schema()}.reservations has overlapping accepted reservations; '
+            'resolve them before adding the constraint (see this revision\'s '
+            'docstring). (my_user_id, id, id): '
+            + ', '.join(str(tuple(row)) for row in overlaps))
+    # btree_gist provides the gist "=" operator class for my_user_id
+    bind.execute(text('CREATE EXTENSION IF NOT EXISTS btree_gist'))
+    # DEFERRABLE INITIALLY IMMEDIATE: checked at the end of each statement,
+    # so save_all can reject the previous slot and insert the new one in a
+    # single statement without depending on row order.
+    bind.execute(text(
+        f'ALTER TABLE {schema}.reservations '
+        f'ADD CONSTRAINT {CONSTRAINT_NAME} '
+        'EXCLUDE USING gist ('
+        'my_user_id WITH =, '
+        'int8range(dtstart, dtend) WITH &&'
+        ") WHERE (my_status = 'ACCEPT' AND status <> 'REJECT') "
+        'DEFERRABLE INITIALLY IMMEDIATE'
+    ))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    schema = _quoted_schema(bind)
+    bind.execute(text(
+        f'ALTER TABLE {schema}.reservations '
+        f'DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}'
+    ))
@@ -0,0 +1,53 @@
+"""Index the reservation list keyset order.
+
+The list endpoint pages by (dtend, id) descending within one user and role;
+this index serves both the filter and the order without a sort. Built
+CONCURRENTLY so the reservations table stays writable during the upgrade.
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import inspect, text
+
+
+revision: str = '20261018_0005'
+down_revision: Union[str, None] = '20261018_0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = 'idx_reservation_user_role_dtend_id'
+
+
+def _schema() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    return x_args.get('schema') or os.getenv('DB_SCHEMA', 'public').strip()
+
+
+def _quoted_schema(bind) -> str:
+    return bind.dialect.identifier_preparer.quote_schema(_schema())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    schema = _quoted_schema(bind)
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        bind.execute(text(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} '
+            f'ON {schema}.reservations (my_user_id, my_role, dtend, id)'
+        ))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    schema = _quoted_schema(bind)
+    with op.get_context().autocommit_block():
+        bind.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {schema}.{INDEX_NAME}'))
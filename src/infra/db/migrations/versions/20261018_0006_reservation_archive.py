@@ -0,0 +1,102 @@
+"""Add the monthly-partitioned reservations archive.
+
+reservations only grows (cancellations stay as REJECT rows, deleted accounts
+are anonymized). Rows that ended before the archive cutoff are moved by the
+archiver into reservations_archive, RANGE partitioned on dtend by month, so
+the live table and its unique/exclusion checks stay small; HISTORY reads
+both tables.
+
+The live table itself is not partitioned: the id primary key, the partial
+unique index and excl_reservation_accepted_user_period cannot be enforced
+across dtend partitions.
+
+No rows are moved here; the archiver drains the backlog in batches. Monthly
+partitions are created by the archiver as well.
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import inspect, text
+
+
+revision: str = '20261018_0006'
+down_revision: Union[str, None] = '20261018_0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE_NAME = 'reservations_archive'
+DTEND_INDEX_NAME = 'idx_reservation_dtend'
+
+COLUMNS = (
+    'id, schedule_id, dtstart, dtend, my_user_id, my_status, my_role, '
+    'user_id, status, messages, previous_reserve, created_at, updated_at'
+)
+
+
+def _schema() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    return x_args.get('schema') or os.getenv('DB_SCHEMA', 'public').strip()
+
+
+def _quoted_schema(bind) -> str:
+    return bind.dialect.identifier_preparer.quote_schema(_schema())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    schema = _quoted_schema(bind)
+    bind.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {schema}.{TABLE_NAME} ('
+        'id INT NOT NULL, '
+        'schedule_id INT NOT NULL, '
+        'dtstart BIGINT NOT NULL, '
+        'dtend BIGINT NOT NULL, '
+        'my_user_id BIGINT NOT NULL, '
+        'my_status VARCHAR(20) NOT NULL, '
+        'my_role VARCHAR(20) NULL, '
+        'user_id BIGINT NOT NULL, '
+        'status VARCHAR(20) NOT NULL, '
+        "messages JSONB DEFAULT '[]'::jsonb, "
+        'previous_reserve JSONB, '
+        'created_at TIMESTAMP, '
+        'updated_at TIMESTAMP, '
+        'archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, '
+        'PRIMARY KEY (id, dtend)'
+        ') PARTITION BY RANGE (dtend)'
+    ))
+    bind.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_reservation_archive_user_role_dtend_id '
+        f'ON {schema}.{TABLE_NAME} (my_user_id, my_role, dtend, id)'
+    ))
+    bind.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_reservation_archive_user_id '
+        f'ON {schema}.{TABLE_NAME} (user_id)'
+    ))
+    # the archiver's scan on the live table; CONCURRENTLY keeps it writable
+    with op.get_context().autocommit_block():
+        bind.execute(text(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {DTEND_INDEX_NAME} '
+            f'ON {schema}.reservations (dtend)'
+        ))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    schema = _quoted_schema(bind)
+    if inspect(bind).has_table(TABLE_NAME, schema=_schema()):
+        # move archived rows back before dropping the archive
+        bind.execute(text(
+            f'INSERT INTO {schema}.reservations ({COLUMNS}) '
+            f'SELECT {COLUMNS} FROM {schema}.{TABLE_NAME}'
+        ))
+        bind.execute(text(f'DROP TABLE {schema}.{TABLE_NAME}'))
+    with op.get_context().autocommit_block():
+        bind.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {schema}.{DTEND_INDEX_NAME}'))
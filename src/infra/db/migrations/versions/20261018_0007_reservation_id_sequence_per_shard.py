@@ -0,0 +1,88 @@
+"""Give each reservation shard a disjoint id sequence.
+
+With DB_SHARDS set, every shard issues reservation ids from its own SERIAL,
+while activity_jobs/activities on the primary key google events by
+(mentor_reservation_id, mentee_reservation_id). Ids must therefore be unique
+across shards: shard K of N issues K (mod N), N apart.
+
+Run once per shard with its position in DB_SHARDS and a common floor at or
+above the highest reservation id on any shard, e.g.
+
+    alembic -x schema=xc -x shard=1 -x shards=2 -x id_floor=120000 upgrade head
+
+Without shards (or shards=1) this is a no-op. ShardRouter checks the result
+at startup.
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import inspect, text
+
+
+revision: str = '20261018_0007'
+down_revision: Union[str, None] = '20261018_0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _schema() -> str:
+    x_args = context.get_x_argument(as_dictionary=True)
+    return x_args.get('schema') or os.getenv('DB_SCHEMA', 'public').strip()
+
+
+def _quoted_schema(bind) -> str:
+    return bind.dialect.identifier_preparer.quote_schema(_schema())
+
+
+def _shard_args():
+    x_args = context.get_x_argument(as_dictionary=True)
+    shards = int(x_args.get('shards') or 1)
+    shard = int(x_args.get('shard') or 0)
+    id_floor = int(x_args.get('id_floor') or 0)
+    if shards > 1 and not 0 <= shard < shards:
+        raise ValueError(f'shard must be in [0, {shards}), got {shard}')
+    return shard, shards, id_floor
+
+
+def _sequence(bind) -> str:
+    sequence = bind.execute(text(
+        "SELECT pg_get_serial_sequence(:table, 'id')"
+    ), {'table': f'{_quoted_schema(bind)}.reservations'}).scalar()
+    if not sequence:
+        raise RuntimeError(f'{_schema()}.reservations.id has no owned sequence')
+    return sequence
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    shard, shards, id_floor = _shard_args()
+    if shards <= 1:
+        return
+    schema = _quoted_schema(bind)
+    max_id = bind.execute(text(
+        f'SELECT GREATEST('
+        f'(SELECT COALESCE(MAX(id), 0) FROM {schema}.reservations), '
+        f'(SELECT COALESCE(MAX(id), 0) FROM {schema}.reservations_archive))'
+    )).scalar()
+    floor = max(max_id, id_floor) + 1
+    # smallest id >= floor with id % shards == shard; START as well as
+    # RESTART, so pg_sequences shows it before the first nextval
+    start = floor + (shard - floor) % shards
+    bind.execute(text(
+        f'ALTER SEQUENCE {_sequence(bind)} '
+        f'INCREMENT BY {shards} START WITH {start} RESTART'
+    ))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not inspect(bind).has_table('reservations', schema=_schema()):
+        return
+    bind.execute(text(f'ALTER SEQUENCE {_sequence(bind)} INCREMENT BY 1'))
@@ -7,7 +7,10 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     CheckConstraint,
+    UniqueConstraint,
+    Index,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.ext.declarative import declarative_base
@@ -135,6 +138,30 @@ class Reservation(Base):
     status = Column(String(20), nullable=False)
     messages = Column(JSONB, default=[])
     previous_reserve = Column(JSONB, nullable=True) # nullable while updating
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now())
+
+
+class ReservationArchive(Base):
+    # reservations that ended before the archive cutoff, moved out of the
+    # live table by ReservationArchiver; RANGE partitioned by dtend (one
+    # partition per month, created by the archiver), read only by HISTORY
+    __tablename__ = 'reservations_archive'
+
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, nullable=False)
+    dtstart = Column(Integer, nullable=False)
+    dtend = Column(Integer, primary_key=True)   # partition key
+    my_user_id = Column(BigInteger, nullable=True)
+    my_status = Column(String(20), nullable=False)
+    my_role = Column(String(20))
+    user_id = Column(BigInteger, nullable=True)
+    status = Column(String(20), nullable=False)
+    messages = Column(JSONB, default=[])
+    previous_reserve = Column(JSONB, nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, server_default=func.now())
 
 
 class Activity(Base):
@@ -166,6 +193,46 @@ class Activity(Base):
             status={self.status})>'
 
 
+class ActivityJob(Base):
+    # outbox for google calendar side effects, one row per reservation pair:
+    # written in the same transaction as the reservation update, applied
+    # later by ActivitySync. target_status is the desired calendar state, so
+    # a newer write for the same pair simply overrides an older pending one.
+    __tablename__ = 'activity_jobs'
+    __table_args__ = (
+        UniqueConstraint(
+            'mentor_reservation_id', 'mentee_reservation_id',
+            name='uq_activity_jobs_reservation_pair',
+        ),
+        CheckConstraint(
+            "target_status IN ('SCHEDULED', 'CANCELLED')",
+            name='ck_activity_jobs_target_status',
+        ),
+        CheckConstraint(
+            "status IN ('PENDING', 'DONE', 'FAILED')",
+            name='ck_activity_jobs_status',
+        ),
+        Index(
+            'idx_activity_jobs_pending_next_run_at', 'next_run_at',
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    mentor_reservation_id = Column(Integer, nullable=False)
+    mentee_reservation_id = Column(Integer, nullable=False)
+    target_status = Column(String(20), nullable=False)
+    payload = Column(JSONB, nullable=False, default={})
+    status = Column(String(20), nullable=False, default='PENDING')
+    # bumped on every enqueue; a worker only settles the revision it claimed
+    revision = Column(Integer, nullable=False, default=1)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_run_at = Column(BigInteger, nullable=False)    # epoch seconds
+    last_error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
 class Tag(Base):
     __tablename__ = 'tags'
     id = Column(BigInteger, primary_key=True)
@@ -175,6 +242,6 @@ class Tag(Base):
     subject = Column(Text, nullable=False, default='')
     desc = Column(JSONB)
     # parent_subject_group IS NULL ⇔ group row (catalog scaffolding);
-    # NOT NULL ⇔ leaf. _validate_leaves enforces this as a write-time
+    # NOT NULL ⇔ leaf. _validate_buckets enforces this as a write-time
     # invariant so orphan leaves can't accumulate.
     parent_subject_group = Column(String(40), nullable=True, index=True)
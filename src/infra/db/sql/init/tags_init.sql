@@ -12,7 +12,7 @@ CREATE TABLE IF NOT EXISTS tags (
     "subject" TEXT NOT NULL DEFAULT '',
     "desc" JSONB,
     -- NULL ⇔ group row (catalog scaffolding); NOT NULL ⇔ leaf row.
-    -- Strict invariant — _validate_leaves rejects writes that would
+    -- Strict invariant — _validate_buckets rejects writes that would
     -- create orphan leaves (no parent), so this single column is enough
     -- to tell groups and leaves apart.
     parent_subject_group VARCHAR(40),
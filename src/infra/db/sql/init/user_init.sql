@@ -70,6 +70,9 @@ CREATE TABLE IF NOT EXISTS canned_messages (
     --,CONSTRAINT fk_profiles_user_id FOREIGN KEY (user_id) REFERENCES profiles(user_id)
 );
 
+-- gist "=" operator class for my_user_id in excl_reservation_accepted_user_period
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 CREATE TABLE IF NOT EXISTS reservations (
     "id" SERIAL PRIMARY KEY,
     schedule_id INT NOT NULL,
@@ -92,7 +95,15 @@ CREATE TABLE IF NOT EXISTS reservations (
     ),
     CONSTRAINT ck_reservations_status CHECK (
         "status" IN ('ACCEPT', 'PENDING', 'REJECT')
-    )
+    ),
+    -- A user's live accepted reservations may not overlap in [dtstart, dtend).
+    -- Checked at the end of each statement, so save_all can reject the
+    -- previous slot and insert the new one together.
+    CONSTRAINT excl_reservation_accepted_user_period EXCLUDE USING gist (
+        my_user_id WITH =,
+        int8range(dtstart, dtend) WITH &&
+    ) WHERE (my_status = 'ACCEPT' AND "status" <> 'REJECT')
+        DEFERRABLE INITIALLY IMMEDIATE
 );
 
 -- Partial unique: only enforce uniqueness for non-cancelled reservations.
@@ -106,6 +117,41 @@ CREATE INDEX IF NOT EXISTS idx_reservation_user_my_status_status_dtend
     ON reservations(my_user_id, my_status, "status", dtend);
 CREATE INDEX IF NOT EXISTS idx_reservation_user_my_status_dtstart_dtend
     ON reservations(my_user_id, my_status, dtstart, dtend);
+-- reservation list keyset pagination: ORDER BY dtend DESC, id DESC per role
+CREATE INDEX IF NOT EXISTS idx_reservation_user_role_dtend_id
+    ON reservations(my_user_id, my_role, dtend, id);
+-- archiver scan: rows that ended before the archive cutoff
+CREATE INDEX IF NOT EXISTS idx_reservation_dtend
+    ON reservations(dtend);
+
+-- Reservations that ended before the archive cutoff, moved out of
+-- reservations by the archiver so the live table (and its unique/exclusion
+-- checks) only holds recent and upcoming rows. Monthly RANGE partitions on
+-- dtend (reservations_archive_pYYYYMM) are created by the archiver.
+CREATE TABLE IF NOT EXISTS reservations_archive (
+    "id" INT NOT NULL,
+    schedule_id INT NOT NULL,
+    dtstart BIGINT NOT NULL,
+    dtend BIGINT NOT NULL,
+    my_user_id BIGINT NOT NULL,
+    my_status VARCHAR(20) NOT NULL,
+    my_role VARCHAR(20) NULL,
+    user_id BIGINT NOT NULL,
+    "status" VARCHAR(20) NOT NULL,
+    "messages" JSONB DEFAULT '[]'::jsonb,
+    previous_reserve JSONB,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY ("id", dtend)
+) PARTITION BY RANGE (dtend);
+
+-- HISTORY list keyset pagination, same order as idx_reservation_user_role_dtend_id
+CREATE INDEX IF NOT EXISTS idx_reservation_archive_user_role_dtend_id
+    ON reservations_archive(my_user_id, my_role, dtend, id);
+-- account deletion anonymizes the counterparty side too
+CREATE INDEX IF NOT EXISTS idx_reservation_archive_user_id
+    ON reservations_archive(user_id);
 
 
 CREATE TABLE IF NOT EXISTS interests (
@@ -140,3 +186,33 @@ CREATE INDEX IF NOT EXISTS idx_activities_mentor_reservation_id
     ON activities(mentor_reservation_id);
 CREATE INDEX IF NOT EXISTS idx_activities_mentee_reservation_id
     ON activities(mentee_reservation_id);
+
+-- Outbox for google calendar side effects (one row per reservation pair).
+-- Enqueued in the reservation transaction, applied by the activity worker.
+CREATE TABLE IF NOT EXISTS activity_jobs (
+    "id" BIGSERIAL PRIMARY KEY,
+    mentor_reservation_id INT NOT NULL,
+    mentee_reservation_id INT NOT NULL,
+    target_status VARCHAR(20) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    revision INT NOT NULL DEFAULT 1,
+    attempts INT NOT NULL DEFAULT 0,
+    next_run_at BIGINT NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_activity_jobs_reservation_pair UNIQUE (
+        mentor_reservation_id, mentee_reservation_id
+    ),
+    CONSTRAINT ck_activity_jobs_target_status CHECK (
+        target_status IN ('SCHEDULED', 'CANCELLED')
+    ),
+    CONSTRAINT ck_activity_jobs_status CHECK (
+        "status" IN ('PENDING', 'DONE', 'FAILED')
+    )
+);
+
+CREATE INDEX IF NOT EXISTS idx_activity_jobs_pending_next_run_at
+    ON activity_jobs(next_run_at)
+    WHERE "status" = 'PENDING';
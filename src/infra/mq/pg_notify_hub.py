@@ -0,0 +1,143 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    '''
+    One listener's buffered events. `None` means events were lost (queue
+    overflow or a LISTEN reconnect) and the listener should reload.
+    '''
+
+    def __init__(self, key: Any, maxsize: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        return await self.queue.get()
+
+    def put(self, item: Optional[Dict[str, Any]]):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # a slow reader gets one resync instead of a partial history
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class PgNotifyHub:
+    '''
+    In-process fan-out of a Postgres NOTIFY channel.
+
+    Writers pg_notify inside their transaction (delivered only on commit,
+    never for a rolled back or retried one).
+    One LISTEN connection per process and database (NOTIFY only reaches
+    listeners of the database it was sent on, so with sharded writes every
+    shard is listened to); each NOTIFY payload is a JSON list of items, and
+    every item goes to the subscribers of `key_of(item)`.
+    NOTIFY is fire-and-forget: whatever is sent while a connection is
+    down is lost, so on every (re)connect subscribers get a resync.
+    '''
+
+    def __init__(self,
+                 engines: List[AsyncEngine],
+                 channel: str,
+                 key_of: Callable[[Dict[str, Any]], Any],
+                 queue_size: int = 100):
+        self.engines = engines
+        self.channel = channel
+        self.key_of = key_of
+        self.queue_size = queue_size
+        self.subscribers: Dict[Any, Set[Subscription]] = {}
+        self.notifications_received = 0
+
+    @asynccontextmanager
+    async def subscribe(self, key: Any) -> AsyncIterator[Subscription]:
+        sub = Subscription(key, self.queue_size)
+        self.subscribers.setdefault(key, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self.subscribers.get(key)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    self.subscribers.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'channel': self.channel,
+            'databases': len({engine.url.render_as_string() for engine in self.engines}),
+            'keys': len(self.subscribers),
+            'subscriptions': sum(len(subs) for subs in self.subscribers.values()),
+            'notifications_received': self.notifications_received,
+        }
+
+    async def listen(self,
+                     probe_secs: float = 30.0,
+                     retry_secs: float = 1.0,
+                     max_retry_secs: float = 30.0):
+        '''Long-running LISTEN loops, one per database; start once per process.'''
+        # shards in different schemas of one database share its notifications
+        databases = {engine.url.render_as_string(): engine for engine in self.engines}
+        await asyncio.gather(*[
+            self.__listen(engine, probe_secs, retry_secs, max_retry_secs)
+            for engine in databases.values()
+        ])
+
+    async def __listen(self,
+                       engine: AsyncEngine,
+                       probe_secs: float,
+                       retry_secs: float,
+                       max_retry_secs: float):
+        delay = retry_secs
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(self.channel, self.__on_notify)
+                    self.__resync_all()
+                    delay = retry_secs
+                    log.info('pg notify subscribed, channel: %s, db: %s',
+                             self.channel, engine.url.render_as_string(hide_password=True))
+                    try:
+                        # a dropped socket doesn't always surface on its own
+                        while True:
+                            await asyncio.sleep(probe_secs)
+                            await driver.execute('SELECT 1')
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(self.channel, self.__on_notify)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error('pg notify listener error, db: %s, err: %s',
+                          engine.url.render_as_string(hide_password=True), e.__str__())
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_retry_secs)
+
+    def __on_notify(self, connection, pid, channel, payload: str):
+        try:
+            items = json.loads(payload)
+        except (TypeError, ValueError):
+            log.error('pg notify bad payload: %s', payload)
+            return
+        self.notifications_received += 1
+        for item in items:
+            for sub in self.subscribers.get(self.key_of(item), ()):
+                sub.put(item)
+
+    def __resync_all(self):
+        for subs in self.subscribers.values():
+            for sub in subs:
+                sub.put(None)
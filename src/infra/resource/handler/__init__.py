@@ -2,3 +2,9 @@ from ._resource_handler import ResourceHandler
 from .mq_resource_handler import (
     SQSResourceHandler, 
 )
+from .http_resource_handler import (
+    HttpClientResourceHandler,
+)
+from .redis_resource_handler import (
+    RedisResourceHandler,
+)
@@ -0,0 +1,117 @@
+import asyncio
+import importlib.util
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+from src.config.conf import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_PER_HOST_MAX_CONNECTIONS,
+    HTTP2_ENABLED,
+)
+from ._resource_handler import ResourceHandler
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class HttpClientResourceHandler(ResourceHandler):
+    '''
+    One long-lived httpx.AsyncClient per process, so calls to the same
+    downstream reuse pooled keep-alive connections instead of paying
+    DNS/TCP/TLS setup on every request.
+
+    `hosts`: downstream base urls that get their own transport (and pool)
+    capped at HTTP_PER_HOST_MAX_CONNECTIONS, so one slow service can't
+    take every connection.
+    '''
+
+    def __init__(self, label: str, hosts: Optional[List[str]] = None):
+        super().__init__()
+        self.max_timeout = HTTP_CONNECT_TIMEOUT
+
+        self.lock = asyncio.Lock()
+        self.label = label
+        self.hosts = hosts or []
+        self.http2 = HTTP2_ENABLED and self.__h2_available()
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def timeout(self) -> bool:
+        return False
+
+    async def initial(self):
+        async with self.lock:
+            if self.client is None or self.client.is_closed:
+                self.client = self.__new_client()
+                log.info('HttpClient[%s] initialized, http2: %s, per-host pools: %s',
+                         self.label, self.http2, list(self.__mounts().keys()))
+
+    async def accessing(self, **kwargs):
+        if self.client is None or self.client.is_closed:
+            await self.initial()
+        return self.client
+
+    # Regular activation to maintain connections and connection pools
+    async def probe(self):
+        # pooled connections are kept alive/expired by httpx itself; only
+        # make sure the client is still usable
+        if self.client is None or self.client.is_closed:
+            await self.initial()
+
+    async def close(self):
+        try:
+            async with self.lock:
+                if self.client is None:
+                    return
+                await self.client.aclose()
+                self.client = None
+
+        except Exception as e:
+            log.error(e.__str__())
+
+    def __new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT,
+                write=HTTP_WRITE_TIMEOUT,
+                pool=HTTP_POOL_TIMEOUT,
+            ),
+            limits=self.__limits(HTTP_MAX_CONNECTIONS),
+            http2=self.http2,
+            mounts=self.__mounts(),
+        )
+
+    def __mounts(self) -> Dict[str, httpx.AsyncHTTPTransport]:
+        if HTTP_PER_HOST_MAX_CONNECTIONS <= 0:
+            return {}
+        mounts: Dict[str, httpx.AsyncHTTPTransport] = {}
+        for url in self.hosts:
+            parts = urlsplit(url)
+            if not parts.scheme or not parts.netloc:
+                continue
+            mounts[f'{parts.scheme}://{parts.netloc}'] = httpx.AsyncHTTPTransport(
+                limits=self.__limits(HTTP_PER_HOST_MAX_CONNECTIONS),
+                http2=self.http2,
+            )
+        return mounts
+
+    @staticmethod
+    def __limits(max_connections: int) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(HTTP_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    @staticmethod
+    def __h2_available() -> bool:
+        if importlib.util.find_spec('h2') is not None:
+            return True
+        log.warning('HTTP2_ENABLED is set but the `h2` package is missing; using HTTP/1.1')
+        return False
@@ -0,0 +1,66 @@
+import asyncio
+from src.config.conf import REDIS_CONNECT_TIMEOUT
+from ._resource_handler import ResourceHandler
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class RedisResourceHandler(ResourceHandler):
+
+    def __init__(self, url: str, label: str):
+        super().__init__()
+        self.max_timeout = REDIS_CONNECT_TIMEOUT
+
+        self.lock = asyncio.Lock()
+        self.url = url
+        self.label = label
+        self.redis_client = None
+
+    def timeout(self) -> bool:
+        return False
+
+    async def initial(self):
+        try:
+            async with self.lock:
+                if self.redis_client is None:
+                    # imported lazily: redis is only needed when REDIS_URL is set
+                    from redis import asyncio as aioredis
+                    self.redis_client = aioredis.from_url(
+                        self.url,
+                        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                        socket_timeout=REDIS_CONNECT_TIMEOUT,
+                        health_check_interval=30,
+                    )
+                    await self.redis_client.ping()
+                    log.info('Redis[%s] Connection OK', self.label)
+
+        except Exception as e:
+            # keep the client: redis-py reconnects on the next command
+            log.error('Redis[%s] Connection Error: %s', self.label, e.__str__())
+
+    async def accessing(self, **kwargs):
+        if self.redis_client is None:
+            await self.initial()
+        return self.redis_client
+
+    # Regular activation to maintain connections and connection pools
+    async def probe(self):
+        try:
+            if self.redis_client is None:
+                await self.initial()
+                return
+            await self.redis_client.ping()
+        except Exception as e:
+            log.error('Redis[%s] Connection Error: %s', self.label, e.__str__())
+
+    async def close(self):
+        try:
+            async with self.lock:
+                if self.redis_client is None:
+                    return
+                await self.redis_client.aclose()
+                self.redis_client = None
+
+        except Exception as e:
+            log.error(e.__str__())
@@ -5,6 +5,9 @@ from .handler import *
 from src.config.conf import (
     PROBE_CYCLE_SECS,
     SQS_QUEUE_URL,
+    REDIS_URL,
+    AUTH_SERVICE_URL,
+    SEARCH_SERVICE_URL,
 )
 import logging
 
@@ -29,7 +32,7 @@ class ResourceManager:
         for resource in self.resources.values():
             try:
                 if not resource.timeout():
-                    log.info(f' ==> probing {resource.__class__.__name__}')
+                    log.debug(' ==> probing %s', resource.__class__.__name__)
                     await resource.probe()
                 else:
                     await resource.close()
@@ -50,6 +53,11 @@ class ResourceManager:
 
 
 session = aioboto3.Session()
-resource_manager = ResourceManager({
+resources: Dict[str, ResourceHandler] = {
     'sqs_rsc': SQSResourceHandler(session=session, label='publish mentor update to search service', queue_url=SQS_QUEUE_URL),
-})
+    'http_rsc': HttpClientResourceHandler(label='downstream services', hosts=[AUTH_SERVICE_URL, SEARCH_SERVICE_URL]),
+}
+# shared L2 cache + invalidation channel, only when configured
+if REDIS_URL:
+    resources['redis_rsc'] = RedisResourceHandler(url=REDIS_URL, label='shared cache')
+resource_manager = ResourceManager(resources)
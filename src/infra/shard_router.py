@@ -0,0 +1,94 @@
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.config.conf import DB_SCHEMA, DB_SHARDS
+from src.infra.databse import SessionLocal, build_engine, engine
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ShardRouter:
+    '''
+    Maps a user_id to the Postgres shard holding that user's reservations
+    (rows are sharded by my_user_id, so a booking touches the sender's and
+    the participant's shard).
+
+    - shard = user_id % number of shards; changing the number of shards
+      moves users, so it needs a data migration
+    - every shard runs the same schema (alembic per shard); migration
+      20261018_0007 gives shard K of N the ids K (mod N), so reservation ids
+      (activity_jobs/activities keys on the primary) stay unique across
+      shards; check_id_sequences refuses to start otherwise
+    - one shard (DB_SHARDS empty) is the primary DB itself
+    '''
+
+    def __init__(self, shards: List[Tuple[AsyncEngine, sessionmaker]]):
+        if not shards:
+            raise ValueError('at least one shard is required')
+        self.engines = [shard_engine for shard_engine, _ in shards]
+        self.session_factories = [factory for _, factory in shards]
+
+    @property
+    def count(self) -> int:
+        return len(self.session_factories)
+
+    @property
+    def sharded(self) -> bool:
+        return self.count > 1
+
+    def shard_of(self, user_id: int) -> int:
+        return user_id % self.count
+
+    def session(self, user_id: int) -> AsyncSession:
+        return self.session_factories[self.shard_of(user_id)]()
+
+    async def check_id_sequences(self):
+        if not self.sharded:
+            return
+        for shard, shard_engine in enumerate(self.engines):
+            async with shard_engine.connect() as conn:
+                row = (await conn.execute(text(
+                    'SELECT s.increment_by, COALESCE(s.last_value, s.start_value) AS last_value '
+                    'FROM pg_sequences s '
+                    "WHERE (quote_ident(s.schemaname) || '.' || quote_ident(s.sequencename))::regclass "
+                    "= pg_get_serial_sequence('reservations', 'id')::regclass"
+                ))).first()
+            if row is None or row.increment_by != self.count or row.last_value % self.count != shard:
+                raise RuntimeError(
+                    f'reservation id sequence of shard {shard} must issue {shard} (mod {self.count}), '
+                    f'got {row and (row.increment_by, row.last_value)}; run migration 20261018_0007 '
+                    f'with -x shard={shard} -x shards={self.count}')
+
+    async def close(self):
+        for shard_engine in self.engines:
+            if shard_engine is not engine:
+                await shard_engine.dispose()
+
+
+def _parse_shards(spec: str) -> List[Tuple[str, str]]:
+    # 'postgresql+asyncpg://u:p@host1/db#xc,postgresql+asyncpg://u:p@host2/db'
+    shards: List[Tuple[str, str]] = []
+    for item in spec.split(','):
+        url, _, schema = item.strip().partition('#')
+        if url:
+            shards.append((url, schema.strip() or DB_SCHEMA))
+    return shards
+
+
+def _build_shard_router(spec: str) -> ShardRouter:
+    if not spec:
+        return ShardRouter([(engine, SessionLocal)])
+    shards = []
+    for url, schema in _parse_shards(spec):
+        shard_engine = build_engine(url, schema)
+        shards.append((shard_engine, sessionmaker(
+            autocommit=False, autoflush=False, bind=shard_engine, class_=AsyncSession)))
+    log.info('reservation shards: %s', len(shards))
+    return ShardRouter(shards)
+
+
+shard_router = _build_shard_router(DB_SHARDS)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Set, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Set, Optional
 
 
 class ICache(ABC):
@@ -31,3 +31,36 @@ class ICache(ABC):
     @abstractmethod
     async def srem(self, key: str, value: Any) -> (int):
         pass
+
+    @abstractmethod
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ex: int = None,
+        stale_ttl: int = None,
+    ) -> Any:
+        '''
+        Read-through get: on a miss, await loader() and cache its result for
+        `ex` seconds. Concurrent misses for the same key share one loader
+        call. With `stale_ttl`, a value up to `stale_ttl` seconds past `ex`
+        is still returned while a single refresh runs in the background.
+        A None result is returned but not cached.
+        '''
+        pass
+
+    @abstractmethod
+    async def get_or_load_many(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ex: int = None,
+    ) -> Dict[str, Any]:
+        '''
+        Bulk read-through: one read for every key, then one
+        loader(missing_keys) call returning {key: value} for the misses.
+        Loaded values are cached like get_or_load does (a delete or set
+        during the load wins; no invalidation broadcast). Keys without a
+        value are left out of the result.
+        '''
+        pass
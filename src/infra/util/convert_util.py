@@ -1,11 +1,11 @@
 from types import coroutine
-from typing import Any, Optional, Dict, Type, TypeVar, List
+from typing import Any, Optional, Dict, Tuple, Type, TypeVar, List
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Select
+from sqlalchemy import Select, exists, false, literal, or_, select, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import DeclarativeMeta
+from sqlalchemy.orm import DeclarativeMeta, aliased
 from sqlalchemy.dialects.postgresql import insert as pg_insert  # PostgreSQL 專用
 from src.config.conf import DATETIME_FORMAT
 
@@ -63,6 +63,70 @@ async def bulk_insert(
     return objects
 
 
+async def upsert_returning(
+    db: AsyncSession,
+    model_class: Type[T],
+    insert_values: Dict[str, Any],
+    update_columns: List[str],
+    index_elements: List[str],
+) -> T:
+    # INSERT ... ON CONFLICT (index_elements) DO UPDATE SET <update_columns>
+    # RETURNING *，一次 round-trip 完成 load-or-create + refresh
+    # 只有 update_columns 會在衝突時被覆寫，其餘欄位維持原值
+    stmt = pg_insert(model_class).values(**insert_values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: stmt.excluded[col] for col in update_columns},
+    ).returning(model_class)
+    # populate_existing: 若 identity map 已有此 row，以 DB 回傳值覆蓋
+    result = await db.execute(stmt, execution_options={'populate_existing': True})
+    return result.scalars().one()
+
+
+async def upsert_if_changed(
+    db: AsyncSession,
+    model_class: Type[T],
+    insert_values: Dict[str, Any],
+    update_columns: List[str],
+    index_elements: List[str],
+) -> Tuple[Optional[T], bool]:
+    # 同 upsert_returning，但 ON CONFLICT DO UPDATE 加上
+    # WHERE <任一欄位> IS DISTINCT FROM excluded: 值都相同時不寫入
+    # (不產生 dead tuple / WAL)。仍是一次 round-trip，回傳 (row, changed):
+    #   WITH upserted AS (INSERT ... RETURNING *)
+    #   SELECT *, true FROM upserted
+    #   UNION ALL
+    #   SELECT *, false FROM <table> WHERE <index_elements> AND NOT EXISTS (upserted)
+    # 第二段用 statement 開始時的 snapshot；同時有別的交易剛寫入/刪除
+    # 這個 row 時可能看不到，此時回傳 (None, False)，由呼叫端重新查詢
+    table = model_class.__table__
+    stmt = pg_insert(model_class).values(**insert_values)
+    where = None
+    if update_columns:
+        where = or_(*[
+            table.c[col].is_distinct_from(stmt.excluded[col]) for col in update_columns
+        ])
+    upserted = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: stmt.excluded[col] for col in update_columns},
+        where=where,
+    ).returning(*table.c).cte('upserted')
+    rows = union_all(
+        select(*upserted.c, true().label('changed')),
+        select(*table.c, false().label('changed')).where(
+            *[table.c[col] == insert_values[col] for col in index_elements],
+            ~exists(select(literal(1)).select_from(upserted)),
+        ),
+    ).subquery('rows')
+    query = select(aliased(model_class, rows), rows.c.changed)
+    # populate_existing: 若 identity map 已有此 row，以 DB 回傳值覆蓋
+    result = await db.execute(query, execution_options={'populate_existing': True})
+    first = result.first()
+    if first is None:
+        return None, False
+    return first[0], first[1]
+
+
 '''
 只能轉換至多第2層的欄位，如果有複雜的欄位結構，請自行處理
 '''
@@ -0,0 +1,40 @@
+from typing import Optional
+
+from sqlalchemy.exc import DBAPIError
+
+
+# PostgreSQL SQLSTATE codes
+UNIQUE_VIOLATION = '23505'
+EXCLUSION_VIOLATION = '23P01'
+SERIALIZATION_FAILURE = '40001'
+DEADLOCK_DETECTED = '40P01'
+
+# the whole transaction was aborted and can simply be run again
+RETRYABLE_SQLSTATES = (SERIALIZATION_FAILURE, DEADLOCK_DETECTED)
+
+
+def sqlstate_of(e: BaseException) -> Optional[str]:
+    if not isinstance(e, DBAPIError):
+        return None
+    return getattr(e.orig, 'sqlstate', None) or getattr(e.orig, 'pgcode', None)
+
+
+def constraint_of(e: BaseException) -> Optional[str]:
+    # asyncpg keeps the violated constraint/index name on the original error,
+    # which the SQLAlchemy adapter chains as __cause__
+    orig = getattr(e, 'orig', None)
+    for err in (orig, getattr(orig, '__cause__', None)):
+        name = getattr(err, 'constraint_name', None)
+        if name:
+            return name
+    return None
+
+
+def is_violation(e: BaseException, sqlstate: str, constraint: Optional[str] = None) -> bool:
+    if sqlstate_of(e) != sqlstate:
+        return False
+    return constraint is None or constraint_of(e) == constraint
+
+
+def is_retryable(e: BaseException) -> bool:
+    return sqlstate_of(e) in RETRYABLE_SQLSTATES
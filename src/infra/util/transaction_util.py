@@ -1,9 +1,23 @@
-from typing import Callable, Any, Awaitable, TypeVar
+import asyncio
+import inspect
+import logging
+import random
+from typing import Callable, Any, Awaitable, Dict, Optional, TypeVar
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from functools import wraps
 
+from src.config.conf import (
+    TX_RETRY_MAX_ATTEMPTS,
+    TX_RETRY_BACKOFF_BASE,
+    TX_RETRY_BACKOFF_MAX,
+)
+from src.config.exception import ServerException
+from src.infra.util.db_error_util import is_retryable, sqlstate_of
+
+log = logging.getLogger(__name__)
+
 T = TypeVar('T', bound=Callable[..., Any])
 
 
@@ -27,6 +41,92 @@ def async_transactional(session_factory: Callable[[], AsyncSession]) -> Callable
     return decorator
 
 
+class TransactionRetryStats:
+    # per-process counters, keyed by the decorated function's name
+    def __init__(self):
+        self.__stats: Dict[str, Dict[str, Any]] = {}
+
+    def __entry(self, name: str) -> Dict[str, Any]:
+        return self.__stats.setdefault(name, {
+            'calls': 0,
+            'retries': 0,
+            'exhausted': 0,
+            'sqlstates': {},
+        })
+
+    def record_retry(self, name: str, sqlstate: str):
+        entry = self.__entry(name)
+        entry['retries'] += 1
+        entry['sqlstates'][sqlstate] = entry['sqlstates'].get(sqlstate, 0) + 1
+
+    def record_done(self, name: str, exhausted: bool = False):
+        entry = self.__entry(name)
+        entry['calls'] += 1
+        if exhausted:
+            entry['exhausted'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {**entry, 'sqlstates': dict(entry['sqlstates'])}
+            for name, entry in self.__stats.items()
+        }
+
+
+_transaction_retry_stats = TransactionRetryStats()
+
+
+def async_retry_transactional(
+    isolation_level: Optional[str] = None,
+    max_attempts: int = TX_RETRY_MAX_ATTEMPTS,
+    stats: TransactionRetryStats = _transaction_retry_stats,
+) -> Callable[[T], T]:
+    '''
+    Like async_transactional, but for a method that already receives its
+    session as `db` and commits its own work: each attempt starts a fresh
+    transaction at isolation_level, and the whole call is run again when
+    PostgreSQL aborts it with a serialization failure (40001) or deadlock
+    (40P01), with full-jitter backoff between attempts.
+
+    The decorated function must be safe to re-run from the top, i.e. it
+    rebuilds everything it writes from its arguments.
+    '''
+    def decorator(func: T) -> T:
+        name = func.__qualname__
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            db: AsyncSession = signature.bind(*args, **kwargs).arguments['db']
+            attempt = 0
+            while True:
+                attempt += 1
+                # isolation level can only be chosen before the transaction begins
+                if isolation_level and not db.in_transaction():
+                    await db.connection(execution_options={'isolation_level': isolation_level})
+                try:
+                    result = await func(*args, **kwargs)
+                    stats.record_done(name)
+                    return result
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    await db.rollback()
+                    if attempt >= max_attempts:
+                        stats.record_done(name, exhausted=True)
+                        log.error('%s: gave up after %s attempts: %s', name, attempt, str(e))
+                        raise ServerException(msg='concurrent update conflict, please retry')
+
+                    stats.record_retry(name, sqlstate_of(e))
+                    ceiling = min(TX_RETRY_BACKOFF_MAX, TX_RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+                    log.warning('%s: retry (attempt %s/%s), sqlstate: %s',
+                                name, attempt, max_attempts, sqlstate_of(e))
+                    await asyncio.sleep(random.uniform(0, ceiling))
+
+        return wrapper
+
+    return decorator
+
+
 # Type hint for sync session
 def transactional(session_factory: Callable[[], Session]) -> Callable[[T], T]:
     def decorator(func: T) -> T:
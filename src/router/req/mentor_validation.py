@@ -4,8 +4,9 @@ from src.config.exception import ClientException
 from src.config.conf import (
     BATCH,
     MAX_PERIOD_SECS,
+    MENTOR_PROFILE_BATCH_MAX,
 )
-from src.domain.mentor.model.mentor_model import MentorScheduleDTO
+from src.domain.mentor.model.mentor_model import MentorScheduleDTO, MentorProfileBatchDTO
 
 UTC = 'UTC'
 
@@ -46,3 +47,20 @@ def upsert_mentor_schedule_check(
         MentorScheduleDTO.opverlapping_interval_check(timeslots, schedule_dto.until)
 
     return schedule_dto
+
+
+def mentor_profile_batch_check(
+    batch_dto: MentorProfileBatchDTO = Body(...),
+) -> (List[int]):
+    # 去除重複 id，保留請求順序
+    user_ids = list(dict.fromkeys(batch_dto.user_ids))
+
+    # CHECK: 資料筆數不可為空
+    if not user_ids:
+        raise ClientException(msg='Prepare your data')
+
+    # CHECK: 每次查詢筆數不可大於 MENTOR_PROFILE_BATCH_MAX
+    if len(user_ids) > MENTOR_PROFILE_BATCH_MAX:
+        raise ClientException(msg=f'The number of user_ids shouldn\'t over {MENTOR_PROFILE_BATCH_MAX}')
+
+    return user_ids
@@ -1,4 +1,6 @@
-from fastapi.responses import JSONResponse
+import json
+
+from fastapi.responses import JSONResponse, Response
 from typing import Optional, Any, Dict
 from pydantic import create_model, BaseModel
 
@@ -30,6 +32,39 @@ def res_success(data=None, msg='ok', code='0'):
     })
 
 
+def render_success(data=None, msg='ok', code='0') -> bytes:
+    # Same bytes JSONResponse would produce for res_success, for bodies that
+    # are rendered once and served many times.
+    return json.dumps(
+        {'code': code, 'msg': msg, 'data': data},
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def res_success_bytes(body: bytes, headers: Optional[Dict[str, str]] = None):
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def res_not_modified(headers: Optional[Dict[str, str]] = None):
+    return Response(status_code=304, headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match may carry a list of (possibly weak) tags, or '*'.
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+
 def res_err_format(data=None, msg='error', code='1'):
     return {
         'code': code,
@@ -67,6 +67,21 @@ async def get_mentor_profile(
     return res_success(data=jsonable_encoder(mentor_profile))
 
 
+@router.post('/{language}/mentor_profiles/batch',
+             responses=idempotent_response('get_mentor_profiles_batch', mentor.MentorProfileListVO))
+async def get_mentor_profiles_batch(
+        db: AsyncSession = Depends(get_db),
+        language: Language = Path(...),
+        user_ids: List[int] = Depends(mentor_profile_batch_check),
+        mentor_service: MentorService = Depends(get_mentor_service)
+):
+    # POST only because the id list can exceed a sane query string; the
+    # call has no side effects.
+    res: mentor.MentorProfileListVO = \
+        await mentor_service.get_mentor_profiles_by_ids(db, user_ids, language.value)
+    return res_success(data=jsonable_encoder(res))
+
+
 @router.get(
     '/{user_id}/schedule/y/{dt_year}/m/{dt_month}',
     responses=idempotent_response('get_mentor_schedule_list', mentor.MentorScheduleQueryVO),
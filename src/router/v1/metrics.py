@@ -0,0 +1,28 @@
+import logging
+
+from fastapi import APIRouter
+
+from ..res.response import res_success
+from ...infra.cache.shared_cache import _shared_cache
+from ...infra.cache.local_cache import _local_cache
+from ...infra.client.circuit_breaker import _circuit_breakers
+from ...infra.util.transaction_util import _transaction_retry_stats
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix='/internal/metrics',
+    tags=['Internal - Metrics'],
+    responses={404: {'description': 'Not found'}},
+)
+
+
+@router.get('')
+async def get_metrics():
+    # Per-process view: each worker / Lambda instance reports its own state.
+    return res_success(data={
+        'circuit_breakers': _circuit_breakers.snapshot(),
+        'local_cache': _local_cache.stats(),
+        'shared_cache': _shared_cache.stats() if hasattr(_shared_cache, 'stats') else None,
+        'transaction_retries': _transaction_retry_stats.snapshot(),
+    })
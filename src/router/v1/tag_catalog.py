@@ -0,0 +1,26 @@
+import logging
+
+from fastapi import APIRouter, Depends, Response
+
+from ...app._di.injection import get_tag_catalog
+from ...domain.user.dao.tag_catalog_cache import TagCatalogCache
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix='/internal/tags',
+    tags=['Internal - Tags'],
+    responses={404: {'description': 'Not found'}},
+)
+
+
+@router.delete('/catalog', status_code=204)
+async def invalidate_tag_catalog(
+    tag_catalog: TagCatalogCache = Depends(get_tag_catalog),
+):
+    # Call after reseeding the tags table. The snapshot is per process, so
+    # this drops the copy of the worker / Lambda instance that serves the
+    # request; the others reload within TAG_CATALOG_TTL.
+    await tag_catalog.invalidate()
+    log.info('tag catalog invalidated')
+    return Response(status_code=204)
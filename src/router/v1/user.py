@@ -4,19 +4,22 @@ from typing import List, Optional
 from fastapi import (
     APIRouter,
     Depends,
-    Path, Query, Body, BackgroundTasks
+    Path, Query, Body, BackgroundTasks, Header, Request
 )
+from fastapi.responses import StreamingResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..res.response import *
 from ...config.constant import *
+from ...config.conf import RESERVATION_CHANGE_FEED_ENABLED
 from ...domain.user.model import (
     user_model as user,
     reservation_model as reservation,
     tag_model as tag,
 )
 from ...app.reservation.booking import Booking
+from ...app.reservation.change_feed import ReservationChangeFeed
 from ...domain.user.service.profile_service import ProfileService
 from ...domain.user.service.tag_service import TagService
 from ...infra.databse import get_db, db_session
@@ -25,6 +28,7 @@ from ...app._di.injection import (
     get_profile_service,
     get_reservation_service,
     get_booking_service,
+    get_reservation_change_feed,
     get_mentor_profile_app,
     get_tag_service,
 )
@@ -80,6 +84,40 @@ async def reservation_list(
     return res_success(data=jsonable_encoder(res))
 
 
+# 預約異動推播 (SSE): 收到 reservation / resync 事件時再重新載入列表，取代輪詢
+# 只在 uvicorn 部署註冊 (RESERVATION_CHANGE_FEED_ENABLED)；Lambda 上 Mangum
+# 會 buffer 整個 response 直到結束，串流無法送出，前端繼續用列表輪詢
+if RESERVATION_CHANGE_FEED_ENABLED:
+    @router.get('/{user_id}/reservations/changes')
+    async def reservation_changes(
+            request: Request,
+            user_id: int = Path(...),
+            change_feed: ReservationChangeFeed = Depends(get_reservation_change_feed),
+    ):
+        return StreamingResponse(
+            change_feed.stream(user_id, request.is_disconnected),
+            media_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                # nginx: flush each event instead of buffering the response
+                'X-Accel-Buffering': 'no',
+            },
+        )
+
+
+# 預約列表頁: 六個 state 的筆數與第一頁，一次查詢
+@router.get('/{user_id}/reservations/summary',
+            responses=idempotent_response('reservation_summary', reservation.ReservationSummaryVO))
+async def reservation_summary(
+        user_id: int = Path(...),
+        query: reservation.ReservationSummaryQueryDTO = Query(...),
+        db: AsyncSession = Depends(db_session),
+        booking_service: Booking = Depends(get_booking_service),
+):
+    res = await booking_service.summary(db, user_id, query)
+    return res_success(data=jsonable_encoder(res))
+
+
 ############################################################################################
 # NOTE: 如何改預約時段? 重新建立後再 cancel 舊的。 (status_code: 201)
 # 用戶可能有很多memtor/memtee預約；為方便檢查時間衝突，要重新建立後再 cancel 舊的。
@@ -121,9 +159,18 @@ async def update_reservation_status(
 async def get_tag_catalog(
         language: str = Path(...),
         kind: Optional[List[TagKind]] = Query(default=None),
+        if_none_match: Optional[str] = Header(default=None),
         db: AsyncSession = Depends(db_session),
         tag_service: TagService = Depends(get_tag_service),
 ):
     # Pass `?kind=skill&kind=topic` to filter; omit for all kinds.
-    res: tag.TagCatalogsVO = await tag_service.get_catalogs(db, kind, language)
-    return res_success(data=jsonable_encoder(res))
+    # The body is pre-rendered per catalog snapshot, so repeat calls skip
+    # serialization and a matching If-None-Match gets a bodiless 304.
+    body, etag = await tag_service.get_catalogs_rendered(
+        db, kind, language,
+        render=lambda res: render_success(data=jsonable_encoder(res)),
+    )
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(if_none_match, etag):
+        return res_not_modified(headers=headers)
+    return res_success_bytes(body, headers=headers)